@@ -0,0 +1,90 @@
+"""
+Per-call latency of the engine with child actors vs. ``inline=True``.
+
+    cd packages/engine && PYTHONPATH=src python benchmarks/bench_inline.py
+
+Needs a running Valkey; ``BENCH_REDIS_URL`` defaults to database 15 of
+``127.0.0.1:6379``, which is **reset** between runs – do not point it at
+real data. Every call goes through the engine proxy like the API does; the
+difference between the columns is the child-actor hops (one cross-thread
+message + future each) that the inline mode skips.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pykka
+import redis
+
+from core._types import OrderSide, TradingPair
+from core.engine_actors import start_engine
+from core.market import Market
+
+URL = os.getenv("BENCH_REDIS_URL", "redis://127.0.0.1:6379/15")
+N = int(os.getenv("BENCH_N", "500"))
+SYMBOL = "BTC/USDT"
+PX = 100.0
+
+
+def _seed() -> None:
+    Market(redis.from_url(URL, decode_responses=True)).set_last_price(
+        TradingPair(
+            symbol=SYMBOL,
+            price=PX,
+            timestamp=int(time.time() * 1000),
+            bid=PX,
+            ask=PX,
+            bid_volume=1e9,
+            ask_volume=1e9,
+        )
+    )
+
+
+def _us(fn: Callable[[int], Any]) -> float:
+    t0 = time.perf_counter()
+    for i in range(N):
+        fn(i)
+    return (time.perf_counter() - t0) / N * 1e6
+
+
+def _run(inline: bool) -> dict[str, float]:
+    engine = start_engine(URL, commission=0.001, inline=inline)
+    try:
+        engine.reset().get()
+        _seed()
+        engine.deposit_asset("USDT", 10.0 * N * PX).get()
+
+        def place_and_fill(_: int) -> None:
+            engine.create_order(
+                symbol=SYMBOL, side="buy", type="limit", amount=1.0, limit_price=PX
+            ).get()
+            engine.process_price_tick(SYMBOL).get()
+
+        return {
+            "set_ticker": _us(lambda i: engine.set_ticker(SYMBOL, PX + i % 2).get()),
+            "limit order + fill": _us(place_and_fill),
+            "deposit (non-cash)": _us(lambda _: engine.deposit_asset("BTC", 0.001).get()),
+            "can_execute": _us(
+                lambda _: engine.can_execute(symbol=SYMBOL, side=OrderSide.BUY, amount=1.0).get()
+            ),
+            "fetch_balance": _us(lambda _: engine.fetch_balance().get()),
+        }
+    finally:
+        engine.reset().get()
+        pykka.ActorRegistry.stop_all()
+
+
+def main() -> None:
+    actors, inline = _run(inline=False), _run(inline=True)
+    print(f"{'per call (N=' + str(N) + ')':<24}{'actors µs':>12}{'inline µs':>12}{'saved':>10}")
+    for name, before in actors.items():
+        after = inline[name]
+        print(f"{name:<24}{before:>12.1f}{after:>12.1f}{1 - after / before:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Tick-sweep throughput with 1, 2, 4 and 8 matching shards.
+
+    cd packages/engine && PYTHONPATH=src python benchmarks/bench_shards.py
+
+Needs a running Valkey; ``BENCH_REDIS_URL`` defaults to database 15 of
+``127.0.0.1:6379``, which is **reset** between runs – do not point it at
+real data. Every run rests ``BENCH_ORDERS`` crossing limit orders on each of
+``BENCH_SYMBOLS`` symbols and times the one sweep that fills them all.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+import pykka
+import redis
+
+from core._types import TradingPair
+from core.engine_actors import start_engine
+from core.market import Market
+
+URL = os.getenv("BENCH_REDIS_URL", "redis://127.0.0.1:6379/15")
+SYMBOLS = [f"S{i:03d}/USDT" for i in range(int(os.getenv("BENCH_SYMBOLS", "32")))]
+ORDERS = int(os.getenv("BENCH_ORDERS", "50"))  # per symbol
+PX = 100.0
+
+
+def _seed() -> None:
+    market = Market(redis.from_url(URL, decode_responses=True))
+    for symbol in SYMBOLS:
+        market.set_last_price(
+            TradingPair(
+                symbol=symbol,
+                price=PX,
+                timestamp=int(time.time() * 1000),
+                bid=PX,
+                ask=PX,
+                bid_volume=1e9,
+                ask_volume=1e9,
+            )
+        )
+
+
+def _run(shards: int) -> tuple[int, float]:
+    engine = start_engine(URL, commission=0.001, inline=True, shards=shards)
+    try:
+        engine.reset().get()
+        _seed()
+        engine.deposit_asset("USDT", 2.0 * len(SYMBOLS) * ORDERS * PX).get()
+        reqs = [
+            {"symbol": s, "side": "buy", "type": "limit", "amount": 1.0, "limit_price": PX}
+            for s in SYMBOLS
+            for _ in range(ORDERS)
+        ]
+        for i in range(0, len(reqs), 200):
+            engine.create_orders(reqs[i : i + 200]).get()
+        t0 = time.perf_counter()
+        stats = engine.process_price_ticks().get()
+        return stats["fills"], time.perf_counter() - t0
+    finally:
+        engine.reset().get()
+        pykka.ActorRegistry.stop_all()
+
+
+def main() -> None:
+    print(f"{len(SYMBOLS)} symbols × {ORDERS} orders")
+    print(f"{'shards':<8}{'fills':>8}{'sweep s':>10}{'fills/s':>10}{'speed-up':>10}")
+    base = None
+    for shards in (1, 2, 4, 8):
+        fills, sec = _run(shards)
+        base = base or sec
+        print(f"{shards:<8}{fills:>8}{sec:>10.3f}{fills / sec:>10.0f}{base / sec:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Create / list / tick cost of the engine on each storage backend.
+
+    cd packages/engine && PYTHONPATH=src python benchmarks/bench_storage.py
+
+Compares Valkey (``BENCH_REDIS_URL``, default database 15 of
+``127.0.0.1:6379``, **reset** between runs – do not point it at real data;
+skipped when unreachable), ``memory://`` and ``sqlite://`` on a temporary
+file. Every run rests ``BENCH_N`` limit orders below the market, lists
+them through the status × symbol index, then moves the price so one sweep
+fills them all. The engine runs inline, so the numbers are the storage
+round trips and little else.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from typing import Any
+
+import pykka
+import redis
+
+from core._types import TradingPair
+from core.engine_actors import start_engine
+from core.logging_config import logger
+from core.market import Market
+from core.orderbook import OrderBook
+from core.storage import open_storage
+
+URL = os.getenv("BENCH_REDIS_URL", "redis://127.0.0.1:6379/15")
+N = int(os.getenv("BENCH_N", "1000"))
+SYMBOL = "BTC/USDT"
+PX = 100.0
+
+
+def _seed(url: str) -> None:
+    Market(open_storage(url)).set_last_price(
+        TradingPair(
+            symbol=SYMBOL,
+            price=PX,
+            timestamp=int(time.time() * 1000),
+            bid=PX,
+            ask=PX,
+            bid_volume=1e9,
+            ask_volume=1e9,
+        )
+    )
+
+
+def _run(url: str) -> dict[str, Any]:
+    engine = start_engine(url, commission=0.001, inline=True)
+    try:
+        engine.reset().get()
+        _seed(url)
+        engine.deposit_asset("USDT", 2.0 * N * PX).get()
+
+        t0 = time.perf_counter()
+        for i in range(N):
+            engine.create_order(
+                symbol=SYMBOL, side="buy", type="limit", amount=1.0, limit_price=PX - 1 - i % 10
+            ).get()
+        create = (time.perf_counter() - t0) / N * 1e6
+
+        book = OrderBook(open_storage(url))
+        t0 = time.perf_counter()
+        listed = len(book.list(status="new", symbol=SYMBOL))
+        tail = len(book.list(tail=50))
+        list_ms = (time.perf_counter() - t0) * 1000
+
+        engine.set_ticker(SYMBOL, PX - 20).get()
+        t0 = time.perf_counter()
+        fills = engine.process_price_ticks().get()["fills"]
+        tick = time.perf_counter() - t0
+        assert listed == fills == N and tail == 50, (listed, fills, tail)
+        return {
+            "create µs": create,
+            "list ms": list_ms,
+            "tick ms": tick * 1000,
+            "fills/s": N / tick,
+        }
+    finally:
+        engine.reset().get()
+        pykka.ActorRegistry.stop_all()
+
+
+def main() -> None:
+    logger.setLevel(logging.WARNING)  # per-order INFO lines would dominate the timings
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "valkey": URL,
+            "memory": "memory://bench",
+            "sqlite": f"sqlite:///{tmp}/bench.db",
+        }
+        results = {}
+        for name, url in backends.items():
+            try:
+                open_storage(url).ping()
+            except redis.ConnectionError:
+                print(f"{name}: {url} unreachable, skipped")
+                continue
+            results[name] = _run(url)
+    print(f"N={N} limit orders on {SYMBOL}")
+    print(f"{'backend':<10}" + "".join(f"{k:>12}" for k in next(iter(results.values()))))
+    for name, row in results.items():
+        print(f"{name:<10}" + "".join(f"{v:>12.1f}" for v in row.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-order encode / decode cost of the order model.
+
+    cd packages/engine && PYTHONPATH=src python benchmarks/bench_types.py
+
+"before" re-creates the previous code paths (``dataclasses.asdict`` +
+``json.dumps`` of a field-name object, ``fields()`` rebuilt on every
+decode); "after" is what the engine runs now (slotted dataclasses,
+precomputed field tuples, :class:`~core.codec.CompactCodec`).
+"""
+
+from __future__ import annotations
+
+import json
+import timeit
+from dataclasses import asdict
+from dataclasses import fields as dataclass_fields
+
+from core._types import Order
+from core.codec import CompactCodec
+from core.constants import OrderSide, OrderState, OrderType
+
+N = 20_000
+
+
+def _order() -> Order:
+    o = Order(
+        id="1792293697_H89dtx",
+        symbol="BTC/USDT",
+        side=OrderSide.BUY,
+        type=OrderType.LIMIT,
+        amount=1.2345,
+        notion_currency="USDT",
+        fee_currency="USDT",
+        fee_rate=0.001,
+        limit_price=101.5,
+        reserved_notion_left=125.3,
+        reserved_fee_left=0.1253,
+    )
+    for i in range(4):  # a few partial fills
+        o.status = OrderState.PARTIALLY_FILLED
+        o.add_history(ts=o.ts_create + i, status=o.status, actual_filled=0.1 * i)
+    return o
+
+
+# ---------- previous code paths -------------------------------------- #
+def _before_to_dict(o: Order, include_history: bool) -> dict:
+    d = asdict(o)
+    d["side"], d["type"], d["status"] = o.side.value, o.type.value, o.status.value
+    if not include_history:
+        d.pop("history", None)
+    d.pop("_seed_history", None)
+    d.pop("_history_saved", None)
+    return d
+
+
+def _before_encode(o: Order) -> str:
+    return json.dumps(_before_to_dict(o, False), separators=(",", ":"))
+
+
+def _before_decode(blob: str) -> Order:
+    data = json.loads(blob)
+    data["side"], data["type"] = OrderSide(data["side"]), OrderType(data["type"])
+    data["status"] = OrderState(data["status"])
+    allowed = {f.name for f in dataclass_fields(Order)}
+    data["_seed_history"] = False
+    return Order(**{k: v for k, v in data.items() if k in allowed})
+
+
+def _us(stmt) -> float:
+    return min(timeit.repeat(stmt, number=N, repeat=5)) / N * 1e6
+
+
+def main() -> None:
+    o = _order()
+    codec = CompactCodec()
+    old_blob, new_blob = _before_encode(o), codec.encode_order(o)
+    rows = [
+        ("to_dict (with history)", _us(lambda: _before_to_dict(o, True)),
+         _us(lambda: o.to_dict(include_history=True))),
+        ("to_dict (no history)", _us(lambda: _before_to_dict(o, False)),
+         _us(lambda: o.to_dict(include_history=False))),
+        ("encode blob", _us(lambda: _before_encode(o)), _us(lambda: codec.encode_order(o))),
+        ("decode blob", _us(lambda: _before_decode(old_blob)),
+         _us(lambda: codec.decode_order(new_blob))),
+    ]  # fmt: skip
+    print(f"{'per order':<24}{'before µs':>12}{'after µs':>12}{'speed-up':>10}")
+    for name, before, after in rows:
+        print(f"{name:<24}{before:>12.2f}{after:>12.2f}{before / after:>9.1f}x")
+    print(f"{'blob size (bytes)':<24}{len(old_blob):>12}{len(new_blob):>12}")
+
+
+if __name__ == "__main__":
+    main()
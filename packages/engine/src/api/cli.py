@@ -132,6 +132,8 @@ def build_parser() -> argparse.ArgumentParser:
     for a in ("status", "symbol", "side"):
         ol.add_argument(f"--{a}")
     ol.add_argument("--tail", type=int)
+    ol.add_argument("--since", type=int, help="ms timestamp (ts_update ≥ since)")
+    ol.add_argument("--until", type=int, help="ms timestamp (ts_update ≤ until)")
 
     og = sub.add_parser("order-get")
     og.add_argument("order_id")
@@ -214,6 +216,8 @@ def main() -> None:  # noqa: C901 – big matcher is fine here
                     symbol=args.symbol,
                     side=args.side,
                     tail=args.tail,
+                    since=args.since,
+                    until=args.until,
                 )
             )
         case "order-get":
@@ -16,8 +16,14 @@ Environment variables
 ---------------------
 API_KEY required key for every request (default: "invalid-key")
 REDIS_URL redis://host:port/db (default: localhost:6379/0)
+STORAGE_URL storage backend: redis://…, memory://[name] or sqlite:///path (default: Valkey above)
 COMMISSION trading fee, e.g. 0.001 (default: 0.001 = 0.1 %)
 TICK_LOOP_SEC price-tick scan interval (default: 10 s)
+TICK_EVENTS set to 1 / true to also match on ticker change events (default: off)
+TICK_DEBOUNCE_MS coalescing window for ticker change events (default: 50 ms)
+AIO_POOL_SIZE max pooled connections of the async read path (default: 64)
+ENGINE_INLINE set to 1 / true to run the stores on the engine thread (default: off)
+MATCH_SHARDS number of per-symbol matching actors (default: 1 = match on the engine actor)
 TEST_ENV set to 1 / true to disable auth & expose /docs
 
 HTTP Endpoints
@@ -38,11 +44,17 @@ POST **/balance/{asset}/withdrawal**   → withdraw asset (e.g. ``USDT``)
 Orders
 ~~~~~~
 GET  **/orders**                       → display all orders, optional filters
+                                         (``?limit=&cursor=`` pages, see ``X-Next-Cursor``)
 GET  **/orders/list**                  → list orders, optional filters
+GET  **/orders/stream**                → every matching order as NDJSON
 GET  **/orders/{oid}**                 → single order by id
+POST **/orders/query**                 → many orders by id (one HMGET), optional field projection
 POST **/orders**                       → create *market* | *limit* order
+POST **/orders/batch**                 → create many orders in one call
 POST **/orders/can_execute**           → dry-run balance check
 POST **/orders/{oid}/cancel**          → cancel *open* order
+POST **/orders/cancel**                → cancel open orders by ids / symbol / side, or all
+PATCH **/orders/{oid}**                → amend limit_price / amount of an open limit order
 
 Overview
 ~~~~~~~~~~~
@@ -59,9 +71,33 @@ GET **/admin/health**                   → check service health
 
 Implementation notes
 --------------------
-* The background *tick-loop* scans keys ``tickers:*`` in Redis every
-  ``TICK_LOOP_SEC`` seconds and settles limit orders whose prices have
-  crossed.
+* The background *tick-loop* walks the symbols that have open orders
+  (``open:symbols``) every ``TICK_LOOP_SEC`` seconds and settles limit
+  orders whose prices have crossed.
+* With ``MATCH_SHARDS=N`` the sweep fans out over N matching actors, each
+  owning a fixed subset of symbols (fills, settlements, cancels, amends).
+* Several workers / replicas may share one Valkey. Each holds a fair share
+  of the per-shard leases (:class:`core.lease.ShardLeases`) and sweeps and
+  expires only those shards, fenced by the lease token; the holder of
+  shard 0 also prunes and runs the sanity check. Give every worker the
+  same ``MATCH_SHARDS`` – it is also the number of leases.
+* With ``TICK_EVENTS=true`` the engine also subscribes to Valkey keyspace
+  notifications on ``tickers:*`` and matches only the symbols that changed,
+  coalescing bursts over ``TICK_DEBOUNCE_MS``. The polling loop keeps
+  running as a fallback.
+* ``STORAGE_URL=memory://…`` or ``sqlite:///…`` runs the whole service on an
+  in-process store (see :func:`core.storage.open_storage`): reads query it
+  directly, leases use the scripts' Python twins, and ``TICK_EVENTS`` is
+  ignored (no pub/sub). ``memory://`` lives in one process – run a single
+  worker; several workers may share one SQLite file.
+* Read endpoints (``/tickers``, ``/balance``, every ``GET /orders…``,
+  ``/orders/query``, ``/orders/can_execute``, ``/overview``) are
+  ``async def`` and query Valkey through :class:`core.aio.AsyncEngine` on a
+  pooled ``redis.asyncio`` client. Only mutations go through the engine
+  actor, so reads never wait behind a tick sweep, a prune or a bulk cancel.
+* ``/orders?limit=`` and ``/orders/stream`` walk the orders oldest update
+  first, one page at a time, so large exports run in constant memory.
+  The opaque ``X-Next-Cursor`` header resumes a paged walk (``?cursor=``).
 * API docs (`/docs`) and the raw OpenAPI JSON are **disabled in
   production** for safety; they are exposed automatically when
   ``TEST_ENV=true``.
@@ -74,20 +110,29 @@ from __future__ import annotations
 # Standard library imports
 import asyncio
 import contextlib
+import json
 import os
 import socket
 import time
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from datetime import timedelta
 from pathlib import Path
 from typing import Any
 
 import redis
+import redis.asyncio as aioredis
 from core._types import OrderSide, OrderState, OrderType  # domain enums
+from core.aio import AsyncEngine, keyspace_channel
+from core.codec import ORDER_FIELDS
 from core.engine_actors import start_engine  # NEW import
+from core.lease import ShardLeases
 from core.logging_config import logger
+from core.orderbook import OrderBook
+from core.storage import is_local, open_storage
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi import Body, Depends, FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from pykka import Future
 
@@ -111,6 +156,24 @@ class OrderReq(BaseModel):
     limit_price: float | None = None
 
 
+class CancelReq(BaseModel):
+    ids: list[str] | None = None
+    symbol: str | None = None
+    side: OrderSide | None = None
+    all: bool = Field(False, description="Required to cancel every open order (no filter)")
+
+
+class QueryReq(BaseModel):
+    ids: list[str]
+    fields: list[str] | None = Field(None, description="Only return these order fields (+ id)")
+    include_history: bool = False
+
+
+class AmendReq(BaseModel):
+    limit_price: float | None = Field(None, ge=0)
+    amount: float | None = Field(None, gt=0)
+
+
 class BalanceReq(BaseModel):
     free: float = Field(1.0, ge=0)
     used: float = Field(0.0, ge=0)
@@ -128,12 +191,11 @@ class ModifyTickerReq(BaseModel):
 
 # ───────────────────── initialise actor engine ──────────────────────── #
 REFRESH_S = int(os.getenv("TICK_LOOP_SEC", "10"))
+TICK_EVENTS = os.getenv("TICK_EVENTS", "FALSE").lower() in ("1", "true", "yes")
+TICK_DEBOUNCE_MS = int(os.getenv("TICK_DEBOUNCE_MS", "50"))
 VALKEY_HOST = os.getenv("VALKEY_HOST", "localhost")
 VALKEY_PORT = int(os.getenv("VALKEY_PORT", "6379"))
 VALKEY_PASSWORD = os.getenv("VALKEY_PASSWORD", "")
-_r = redis.Redis(
-    host=VALKEY_HOST, port=VALKEY_PORT, password=VALKEY_PASSWORD, decode_responses=True
-)
 MY_ID = f"{socket.gethostname()}:{os.getpid()}"
 TEST_ENV = os.getenv("TEST_ENV", "FALSE").lower() in ("1", "true", "yes")
 API_KEY = os.getenv("API_KEY", "invalid-key")
@@ -142,16 +204,33 @@ PRUNE_EVERY_SEC = int(float(os.getenv("PRUNE_EVERY_MIN", "60")) * 60)
 STALE_AFTER_SEC = int(float(os.getenv("STALE_AFTER_H", "24")) * 3600)
 EXPIRE_AFTER_SEC = int(float(os.getenv("EXPIRE_AFTER_H", "24")) * 3600)
 SANITY_CHECK_EVERY_SEC = int(float(os.getenv("SANITY_CHECK_EVERY_MIN", 5)) * 60)
+ORDERS_PAGE_DEFAULT = 100  # /orders?cursor= without an explicit limit
+ORDERS_PAGE_MAX = 1000
+ORDERS_BATCH_MAX = 200  # orders per POST /orders/batch
+ORDERS_QUERY_MAX = 1000  # ids per POST /orders/query
+AIO_POOL_SIZE = int(os.getenv("AIO_POOL_SIZE", "64"))
+ENGINE_INLINE = os.getenv("ENGINE_INLINE", "FALSE").lower() in ("1", "true", "yes")
+MATCH_SHARDS = int(os.getenv("MATCH_SHARDS", "1"))
 
 REDIS_URL = (
     f"redis://:{VALKEY_PASSWORD}@{VALKEY_HOST}:{VALKEY_PORT}/0"
     if VALKEY_PASSWORD
     else f"redis://{VALKEY_HOST}:{VALKEY_PORT}/0"
 )
-ENGINE = start_engine(redis_url=REDIS_URL, commission=COMMISSION)
+STORAGE_URL = os.getenv("STORAGE_URL", REDIS_URL)
+LOCAL_STORAGE = is_local(STORAGE_URL)  # memory:// or sqlite:// – no Valkey server
+_r = open_storage(STORAGE_URL)
+ENGINE = start_engine(
+    redis_url=STORAGE_URL, commission=COMMISSION, inline=ENGINE_INLINE, shards=MATCH_SHARDS
+)
+# read-only endpoints: asyncio client (or the in-process store), bypasses the actor
+AIO = AsyncEngine(
+    STORAGE_URL, cash_asset=CASH_ASSET, commission=COMMISSION, max_connections=AIO_POOL_SIZE
+)
 
-LOCK_KEY = "engine:leader"
-LOCK_TTL = 30  # seconds
+# background work is split between workers by shard lease (see core.lease)
+LEASE_TTL_SEC = max(30, 3 * REFRESH_S)
+LEASES = ShardLeases(_r, shards=MATCH_SHARDS, owner=MY_ID, ttl_ms=LEASE_TTL_SEC * 1000)
 
 
 # auth dependency
@@ -166,22 +245,34 @@ prod_depends = [] if TEST_ENV else [Depends(verify_key)]
 # ───────────────────────────── FastAPI app ──────────────────────────── #
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # type: ignore
-    # Run expiration check on startup
+    # Take our share of the shard leases, then run the expiration check on startup
     expire_age = timedelta(seconds=EXPIRE_AFTER_SEC)
-    ENGINE.expire_orders_older_than(age=expire_age).get()
+    held = LEASES.refresh()
+    ENGINE.expire_orders_older_than(age=expire_age, leases=held).get()
 
     # Start background tasks
     logger.info(
         f"Starting background tasks - TICK_LOOP_SEC: {REFRESH_S}s, PRUNE_EVERY_SEC: {PRUNE_EVERY_SEC}s"
     )
-    tick_task = asyncio.create_task(tick_loop())
-    prune_task = asyncio.create_task(prune_and_expire_loop())
-    sanity_task = asyncio.create_task(sanity_loop())
-    yield
-    for t in (tick_task, prune_task, sanity_task):
-        t.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            await t
+    tasks = [
+        asyncio.create_task(tick_loop()),
+        asyncio.create_task(prune_and_expire_loop()),
+        asyncio.create_task(sanity_loop()),
+    ]
+    if TICK_EVENTS and LOCAL_STORAGE:
+        logger.warning("TICK_EVENTS needs Valkey keyspace notifications; polling only")
+    elif TICK_EVENTS:
+        logger.info(f"Event-driven matching enabled - TICK_DEBOUNCE_MS: {TICK_DEBOUNCE_MS}ms")
+        tasks.append(asyncio.create_task(ticker_events_loop()))
+    try:
+        yield
+    finally:
+        for t in tasks:
+            t.cancel()
+        # a loop that died with an error must not skip the cleanup below
+        await asyncio.gather(*tasks, return_exceptions=True)
+        LEASES.release()
+        await AIO.aclose()
 
 
 app = FastAPI(
@@ -211,12 +302,12 @@ def root() -> dict[str, str]:
 
 # market ----------------------------------------------------------------- #
 @app.get("/tickers", tags=["Market"])
-def all_tickers() -> list[str]:
-    return ENGINE.tickers.get()  # type: ignore
+async def all_tickers() -> list[str]:
+    return await AIO.tickers()
 
 
 @app.get("/tickers/{symbols:path}", tags=["Market"])
-def ticker(symbols: str = "BTC/USDT") -> dict[str, Any]:
+async def ticker(symbols: str = "BTC/USDT") -> dict[str, Any]:
     """Return one ticker (str) or many tickers (comma-separated list).
 
     Examples
@@ -226,31 +317,28 @@ def ticker(symbols: str = "BTC/USDT") -> dict[str, Any]:
     """
     # split on ',' and strip whitespace
     requested = [s.strip() for s in symbols.split(",") if s.strip()]
-    out: dict[str, dict] = {}
-    # many symbols → aggregate, but don’t blow up if one is unknown
-    for sym in requested:
-        try:
-            out[sym] = _g(ENGINE.fetch_ticker(sym))
-        except ValueError as e:  # unknown or inactive symbol
-            out[sym] = {"error": str(e)}
+    out: dict[str, Any] = {}
+    # many symbols → one pipeline, but don’t blow up if one is unknown
+    for sym, tick in (await AIO.fetch_tickers(requested)).items():
+        out[sym] = tick if tick is not None else {"error": f"Ticker {sym} not available"}
     return out
 
 
 # portfolio -------------------------------------------------------------- #
 @app.get("/balance", tags=["Portfolio"])
-def balance() -> dict[str, Any]:
-    return _g(ENGINE.fetch_balance())  # type: ignore
+async def balance() -> dict[str, Any]:
+    return await AIO.fetch_balance()
 
 
 @app.get("/balance/list", tags=["Portfolio"])
-def balance_list() -> dict[str, Any]:
-    asset_owned_list = _g(ENGINE.fetch_balance_list())
+async def balance_list() -> dict[str, Any]:
+    asset_owned_list = await AIO.fetch_balance_list()
     return {"length": len(asset_owned_list), "assets": asset_owned_list}
 
 
 @app.get("/balance/{asset}", tags=["Portfolio"])
-def asset_balance(asset: str) -> dict[str, Any]:
-    return _g(ENGINE.fetch_balance(asset))  # type: ignore
+async def asset_balance(asset: str) -> dict[str, Any]:
+    return await AIO.fetch_balance(asset)
 
 
 @app.post("/balance/{asset}/deposit", tags=["Portfolio"], dependencies=prod_depends)
@@ -273,52 +361,147 @@ def withdraw_asset(req: FundReq, asset: str = CASH_ASSET) -> dict[str, Any]:
 
 # orders ----------------------------------------------------------------- #
 @app.get("/orders", tags=["Orders"])
-def list_orders(
+async def list_orders(
+    response: Response,
     status: OrderState | None = Query(None),
     symbol: str | None = None,
     side: OrderSide | None = Query(None),
     tail: int | None = None,
+    since: int | None = Query(None, description="Only orders updated at/after this ms timestamp"),
+    until: int | None = Query(None, description="Only orders updated at/before this ms timestamp"),
     include_history: bool = Query(False, description="Include order history in response"),
+    limit: int | None = Query(
+        None, ge=1, le=ORDERS_PAGE_MAX, description="Page size (oldest update first)"
+    ),
+    cursor: str | None = Query(None, description="Resume after this X-Next-Cursor value"),
 ) -> list[dict[str, Any]]:
-    order_book = _g(ENGINE.order_book)
-    orders = _g(
-        order_book.list(
-            status=status,
-            symbol=symbol,
-            side=side,
-            tail=tail,
-            include_history=include_history,
-        )
+    if limit is not None or cursor is not None:
+        if tail is not None:
+            raise HTTPException(status_code=400, detail="tail cannot be combined with limit/cursor")
+        try:
+            orders, next_cursor = await AIO.order_book.page(
+                limit=limit or ORDERS_PAGE_DEFAULT,
+                cursor=cursor,
+                status=status,
+                symbol=symbol,
+                side=side,
+                since=since,
+                until=until,
+                include_history=include_history,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return [o.to_dict(include_history=include_history) for o in orders]
+    orders = await AIO.order_book.list(
+        status=status,
+        symbol=symbol,
+        side=side,
+        tail=tail,
+        since=since,
+        until=until,
+        include_history=include_history,
     )
     return [o.to_dict(include_history=include_history) for o in orders]
 
 
 @app.get("/orders/list", tags=["Orders"])
-def list_orders_simple(
+async def list_orders_simple(
     status: OrderState | None = Query(None),
     symbol: str | None = None,
     side: OrderSide | None = Query(None),
     tail: int | None = None,
+    since: int | None = Query(None, description="Only orders updated at/after this ms timestamp"),
+    until: int | None = Query(None, description="Only orders updated at/before this ms timestamp"),
 ) -> dict[str, Any]:
-    order_book = _g(ENGINE.order_book)
-    orders = _g(order_book.list(status=status, symbol=symbol, side=side, tail=tail))
+    orders = await AIO.order_book.list(
+        status=status, symbol=symbol, side=side, tail=tail, since=since, until=until
+    )
     ids = [o.id for o in orders]
     return {"length": len(ids), "orders": ids}
 
 
+@app.get("/orders/stream", tags=["Orders"])
+async def stream_orders(
+    status: OrderState | None = Query(None),
+    symbol: str | None = None,
+    side: OrderSide | None = Query(None),
+    since: int | None = Query(None, description="Only orders updated at/after this ms timestamp"),
+    until: int | None = Query(None, description="Only orders updated at/before this ms timestamp"),
+    include_history: bool = Query(False, description="Include order history in response"),
+    cursor: str | None = Query(None, description="Start after this X-Next-Cursor value"),
+) -> StreamingResponse:
+    """
+    Every matching order as one JSON object per line, oldest update first.
+    Fetched one page at a time, so memory stays flat whatever the size.
+    """
+    if cursor is not None:
+        try:
+            OrderBook.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    async def _lines() -> AsyncIterator[bytes]:
+        async for o in AIO.order_book.iter(
+            status=status,
+            symbol=symbol,
+            side=side,
+            since=since,
+            until=until,
+            cursor=cursor,
+            include_history=include_history,
+        ):
+            line = json.dumps(o.to_dict(include_history=include_history), separators=(",", ":"))
+            yield line.encode() + b"\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
 @app.get("/orders/{oid}", tags=["Orders"])
-def get_order(
+async def get_order(
     oid: str,
     include_history: bool = Query(False, description="Include order history in response"),
 ) -> dict[str, Any]:
     try:
-        order_book = _g(ENGINE.order_book)
-        o = _g(order_book.get(oid, include_history=include_history))
-        return o.to_dict(include_history=include_history)  # type: ignore
+        o = await AIO.order_book.get(oid, include_history=include_history)
+        return o.to_dict(include_history=include_history)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
+@app.post("/orders/query", tags=["Orders"])
+async def query_orders(req: QueryReq) -> dict[str, Any]:
+    """
+    Look up to ``ORDERS_QUERY_MAX`` orders by id in one Redis round trip.
+    Returns ``{"orders": [...], "missing": [...]}``, orders in request order.
+    """
+    if not 1 <= len(req.ids) <= ORDERS_QUERY_MAX:
+        raise HTTPException(status_code=400, detail=f"send between 1 and {ORDERS_QUERY_MAX} ids")
+    keep = None
+    if req.fields is not None:
+        unknown = set(req.fields) - set(ORDER_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+        keep = ["id", *(f for f in req.fields if f != "id")]
+        if req.include_history:
+            keep.append("history")
+    orders, missing = await AIO.order_book.lookup(req.ids, include_history=req.include_history)
+    rows = [o.to_dict(include_history=req.include_history) for o in orders]
+    if keep is not None:
+        rows = [{f: d[f] for f in keep} for d in rows]
+    return {"orders": rows, "missing": missing}
+
+
+@app.patch("/orders/{oid}", tags=["Orders"], dependencies=prod_depends)
+def amend(oid: str, req: AmendReq) -> dict[str, Any]:
+    """Amend an open limit order in place (same id, only the reservation delta moves)."""
+    try:
+        return _g(ENGINE.amend_order(oid, limit_price=req.limit_price, amount=req.amount))  # type: ignore
+    except ValueError as e:
+        return {"error": str(e)}
+
+
 @app.post("/orders", tags=["Orders"], dependencies=prod_depends)
 def new_order(req: OrderReq) -> dict[str, Any]:
     """
@@ -331,16 +514,27 @@ def new_order(req: OrderReq) -> dict[str, Any]:
         return {"error": str(e)}
 
 
+@app.post("/orders/batch", tags=["Orders"], dependencies=prod_depends)
+def new_orders(reqs: list[OrderReq] = Body(...)) -> list[dict[str, Any]]:
+    """
+    Place up to ``ORDERS_BATCH_MAX`` orders with one engine call: one
+    snapshot of tickers and balances, funds checked cumulatively in list
+    order, one atomic write. Returns one result per item, in order (the
+    order, or ``{"error": …}`` like ``POST /orders``).
+    """
+    if not 1 <= len(reqs) <= ORDERS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"send between 1 and {ORDERS_BATCH_MAX} orders")
+    return _g(ENGINE.create_orders([r.model_dump() for r in reqs]))  # type: ignore
+
+
 @app.post("/orders/can_execute", tags=["Orders"])
-def dry_run(req: OrderReq) -> dict[str, Any]:
-    return _g(
-        ENGINE.can_execute(
-            symbol=req.symbol,
-            side=req.side,  # Now properly typed as OrderSide enum
-            amount=req.amount,
-            price=req.limit_price,
-        )
-    )  # type: ignore
+async def dry_run(req: OrderReq) -> dict[str, Any]:
+    return await AIO.can_execute(  # type: ignore[return-value]
+        symbol=req.symbol,
+        side=req.side,  # Now properly typed as OrderSide enum
+        amount=req.amount,
+        price=req.limit_price,
+    )
 
 
 @app.post("/orders/{oid}/cancel", tags=["Orders"], dependencies=prod_depends)
@@ -352,9 +546,23 @@ def cancel(oid: str) -> dict[str, Any]:
         return {"error": str(e)}
 
 
+@app.post("/orders/cancel", tags=["Orders"], dependencies=prod_depends)
+def cancel_many(req: CancelReq) -> dict[str, Any]:
+    """
+    Cancel every open order matching the filters with one engine call
+    (one atomic write for all releases and order updates).
+    """
+    if req.ids is None and req.symbol is None and req.side is None and not req.all:
+        raise HTTPException(status_code=400, detail="pass ids, symbol, side or all=true")
+    try:
+        return _g(ENGINE.cancel_orders(ids=req.ids, symbol=req.symbol, side=req.side))  # type: ignore
+    except ValueError as e:
+        return {"error": str(e)}
+
+
 # overview --------------------------------------------------------------- #
 @app.get("/overview/capital", tags=["Overview"])
-def get_summary_capital(
+async def get_summary_capital(
     aggregation: bool = Query(True, description="Portfolio aggregated capital"),
 ) -> dict[str, Any]:
     """
@@ -364,28 +572,26 @@ def get_summary_capital(
     - Total withdrawn funds.
     - Profit and Loss.
     """
-    sum_capital = _g(ENGINE.get_summary_capital(aggregation=aggregation))
+    sum_capital = await AIO.get_summary_capital(aggregation=aggregation)
     # If aggregation is True, we return a single dict with all assets aggregated
     # If aggregation is False, we return a dict with each asset's capital separately
     return sum_capital  # type: ignore
 
 
 @app.get("/overview/assets", tags=["Overview"])
-def get_summary_assets() -> dict[str, Any]:
-    sum_assets_bal = _g(ENGINE.get_summary_assets())
-    return sum_assets_bal  # type: ignore
+async def get_summary_assets() -> dict[str, Any]:
+    return await AIO.get_summary_assets()
 
 
 @app.get("/overview/trades", tags=["Overview"])
-def get_summary_trades(
+async def get_summary_trades(
     assets: str | None = Query(None),
     # assets: str | None = None,
     side: OrderSide | None = Query(None),
 ) -> dict[str, Any]:
     # turn "BTC,ETH" → ["BTC", "ETH"]; keep None if nothing supplied
     assets_list = [s.strip() for s in assets.split(",") if s.strip()] if assets else None
-    sum_trades = _g(ENGINE.get_trade_stats(assets=assets_list, side=side))
-    return sum_trades  # type: ignore
+    return await AIO.get_trade_stats(assets=assets_list, side=side)
 
 
 # admin ------------------------------------------------------------------ #
@@ -424,44 +630,29 @@ def purge_all() -> dict[str, str]:
 
 
 @app.get("/admin/health", tags=["Admin"])
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
 # ─────────────────────── background tasks ────────────────────────────── #
 
 
-def i_am_leader() -> bool:
-    # atomic: SET key val NX EX ttl
-    # returns True if lock acquired
-    got = _r.set(LOCK_KEY, MY_ID, nx=True, ex=LOCK_TTL)
-    if got:
-        logger.debug(f"Acquired leader lock: {MY_ID}")
-        return True
-    # already held? renew if it's me
-    current_leader = _r.get(LOCK_KEY)
-    if current_leader == MY_ID:
-        _r.expire(LOCK_KEY, LOCK_TTL)
-        logger.debug(f"Renewed leader lock: {MY_ID}")
-        return True
-    logger.debug(f"Not leader. Current leader: {current_leader}, My ID: {MY_ID}")
-    return False
-
-
 async def tick_loop() -> None:
     while True:
         logger.debug(f"Tick loop started - REFRESH_S: {REFRESH_S} seconds")
         start_time = time.time()
         try:
-            if i_am_leader():
-                tickers = ENGINE.tickers.get()
-                logger.debug(f"Found {len(tickers)} tickers to process")
-                for t in tickers:
-                    ENGINE.process_price_tick(t).get()
+            held = await asyncio.to_thread(LEASES.refresh)
+            if held:
+                # one batched sweep over the symbols with open orders of our shards
+                stats = await asyncio.to_thread(ENGINE.process_price_ticks(leases=held).get)
                 # run every REFRESH_S seconds, so we don't hammer Redis
-                logger.debug(f"Refreshed tickers data - processed {len(tickers)} tickers")
+                logger.debug(
+                    f"Refreshed tickers data - processed {stats['symbols']} symbols, "
+                    f"{stats['fills']} fills in {stats['ms']:.1f} ms"
+                )
             else:
-                logger.debug("Not the leader, skipping tick processing")
+                logger.debug("No shard lease held, skipping tick processing")
         except Exception as e:
             logger.exception("Error in tick_loop: %s", e)
             # If an error occurs, we log it and continue the loop
@@ -471,15 +662,101 @@ async def tick_loop() -> None:
             await asyncio.sleep(max(1, REFRESH_S - elapsed))
 
 
+def _enable_keyspace_events() -> bool:
+    """
+    Make sure Valkey publishes keyspace events for hash writes (flags ``K`` + ``h``).
+    Returns ``False`` if the server refuses CONFIG (managed instances, ACLs).
+    """
+    try:
+        # CONFIG is Valkey-only, outside the Storage protocol: use a plain client
+        with redis.Redis.from_url(STORAGE_URL, decode_responses=True) as admin:
+            flags: str = (
+                admin.config_get("notify-keyspace-events").get("notify-keyspace-events") or ""
+            )
+            wanted = flags
+            if "K" not in wanted:
+                wanted += "K"
+            if "h" not in wanted and "A" not in wanted:  # "A" already implies "h"
+                wanted += "h"
+            if wanted != flags:
+                admin.config_set("notify-keyspace-events", wanted)
+        return True
+    except redis.RedisError as e:
+        logger.warning("Cannot enable keyspace notifications (%s); polling only", e)
+        return False
+
+
+async def ticker_events_loop() -> None:
+    """
+    Match on ticker writes as they happen: every ``HSET tickers:<SYMBOL>``
+    queues the symbol, a burst is coalesced for ``TICK_DEBOUNCE_MS`` and the
+    changed symbols are settled with one batched engine call. A lost
+    subscription is re-established with exponential backoff.
+    """
+    if not _enable_keyspace_events():
+        return
+    debounce = TICK_DEBOUNCE_MS / 1000
+    loop = asyncio.get_running_loop()
+    changed: set[str] = set()
+    backoff = 1.0
+
+    def _collect(msg: dict[str, Any] | None) -> None:
+        if msg and msg["data"] in ("hset", "hmset"):
+            changed.add(msg["channel"][len(prefix) :])
+
+    while True:
+        client = aioredis.from_url(STORAGE_URL, decode_responses=True)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        prefix = keyspace_channel(client, "tickers:")  # db from the URL, e.g. __keyspace@3__
+        try:
+            await pubsub.psubscribe(f"{prefix}*")
+            backoff = 1.0
+            while True:
+                _collect(await pubsub.get_message(timeout=1.0))
+                if not changed:
+                    continue
+                # coalesce the rest of the burst (the oracle writes tickers back-to-back)
+                deadline = loop.time() + debounce
+                while (remaining := deadline - loop.time()) > 0:
+                    _collect(await pubsub.get_message(timeout=remaining))
+                symbols = sorted(changed)
+                changed.clear()
+                await _match_changed(symbols)
+        except Exception as e:
+            logger.warning("Ticker events lost (%s), resubscribing in %.0f s", e, backoff)
+        finally:
+            with contextlib.suppress(Exception):
+                await pubsub.aclose()
+                await client.aclose()
+        # the polling tick_loop still covers the symbols changed meanwhile
+        await asyncio.sleep(backoff)
+        backoff = min(2 * backoff, 30.0)
+
+
+async def _match_changed(symbols: list[str]) -> None:
+    """Settle the crossing orders of *symbols* on the shards this worker holds."""
+    try:
+        if held := LEASES.held:
+            stats = await asyncio.to_thread(ENGINE.process_price_ticks(symbols, leases=held).get)
+            logger.debug(
+                f"Ticker events - {len(symbols)} changed, {stats['symbols']} active, "
+                f"{stats['fills']} fills in {stats['ms']:.1f} ms"
+            )
+    except Exception as e:
+        logger.exception("Error in ticker_events_loop: %s", e)
+
+
 async def prune_and_expire_loop() -> None:
     prune_age = timedelta(seconds=STALE_AFTER_SEC)
     expire_age = timedelta(seconds=EXPIRE_AFTER_SEC)
     while True:
         logger.debug(f"Prune and expire loop started - PRUNE_EVERY_SEC: {PRUNE_EVERY_SEC} seconds")
         try:
-            if i_am_leader():
+            held = LEASES.held
+            if 0 in held:
                 ENGINE.prune_orders_older_than(age=prune_age).get()
-                ENGINE.expire_orders_older_than(age=expire_age).get()
+            if held:
+                ENGINE.expire_orders_older_than(age=expire_age, leases=held).get()
         except Exception as e:
             logger.exception(f"Error in prune_and_expire_loop: {e}")
             # If an error occurs, we log it and continue the loop
@@ -494,7 +771,7 @@ async def sanity_loop() -> None:
             f"Sanity loop started - SANITY_CHECK_EVERY_SEC: {SANITY_CHECK_EVERY_SEC} seconds"
         )
         try:
-            if i_am_leader():
+            if 0 in LEASES.held:
                 ENGINE.check_consistency().get()
         except Exception as e:
             logger.exception(f"Error in sanity_loop: {e}")
@@ -1,6 +1,10 @@
 """
 Shared tiny enums / dataclasses used across the package.
 Keeps circular-import headaches away from the business logic.
+
+The dataclasses are slotted and serialise through precomputed field tuples
+(see the bottom of the module) instead of ``asdict`` / ``fields()``: tens of
+thousands of orders go through them per ``list()``.
 """
 
 # _types.py
@@ -8,15 +12,16 @@ from __future__ import annotations
 
 import json
 import time
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from dataclasses import fields as dataclass_fields
+from operator import attrgetter
 from typing import Any
 
 from .constants import CLOSED_STATUS, OrderSide, OrderState, OrderType
 
 
 # ─── Data classes ────────────────────────────────────────────────────────
-@dataclass
+@dataclass(slots=True)
 class AssetBalance:
     """
     One row inside the portfolio hash.
@@ -52,7 +57,7 @@ class AssetBalance:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class TradingPair:
     """
     Trading pair data structure.
@@ -105,7 +110,7 @@ class TradingPair:
         return json.dumps(self.to_dict(), separators=(",", ":"))
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderHistory:
     """
     Order history entry.
@@ -135,8 +140,19 @@ class OrderHistory:
     reserved_fee_left: float | None = None
     comment: str | None = None
 
+    # (De)serialise ------------------------------------------------------
+    def to_dict(self) -> dict[str, Any]:
+        return dict(zip(_HISTORY_FIELDS, _history_values(self), strict=True))
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, blob: str) -> OrderHistory:
+        return cls(**json.loads(blob))
+
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     """
     Internal order representation (kept small on purpose).
@@ -167,10 +183,14 @@ class Order:
     history         transaction history of every order update
     history_count  number of history entries (used to index the history)
     _seed history   only if this is a fresh object (no history loaded yet)
+    _history_saved  entries below this index are already persisted
 
     Notes
     -----
     Fees are quoted in the *quote* currency (usually `USDT`).
+    The stored order blob never embeds ``history``: entries are appended to
+    their own list (see :class:`~core.orderbook.OrderBook`) and are only
+    loaded when asked for.
     """
 
     id: str
@@ -200,6 +220,7 @@ class Order:
     history: dict[int, OrderHistory] = field(default_factory=dict)
     history_count: int = 0  # next free index (not last!)
     _seed_history: bool = True
+    _history_saved: int = 0
 
     def __post_init__(self) -> None:
         # Only seed history if requested and it's a fresh object (no history yet)
@@ -218,14 +239,16 @@ class Order:
     # (De)serialise ------------------------------------------------------
     def to_dict(self, *, include_history: bool = True) -> dict:
         """Return a plain dict representation. Optionally strip history to keep payloads small."""
-        d = asdict(self)
+        # field by field: ``asdict`` would deep-copy the whole history
+        d = dict(zip(_ORDER_DICT_FIELDS, _order_values(self), strict=True))
         # enums -> their raw value so json.dumps works
         d["side"] = self.side.value
         d["type"] = self.type.value
         d["status"] = self.status.value
-        if not include_history:
-            d.pop("history", None)
-        d.pop("_seed_history", None)
+        if include_history:
+            d["history"] = {i: h.to_dict() for i, h in self.history.items()}
+        else:
+            del d["history"]
         return d
 
     def to_json(self, *, include_history: bool = True) -> str:
@@ -234,7 +257,11 @@ class Order:
 
     @classmethod
     def from_json(cls, blob: str, *, include_history: bool = False) -> Order:
-        data = json.loads(blob)
+        return cls.from_dict(json.loads(blob), include_history=include_history)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], *, include_history: bool = False) -> Order:
+        data = dict(data)
         # normalise string literals back to Enum instances
         if isinstance(data.get("side"), str):
             data["side"] = OrderSide(data["side"])
@@ -242,7 +269,6 @@ class Order:
             data["type"] = OrderType(data["type"])
         if isinstance(data.get("status"), str):
             data["status"] = OrderState(data["status"])
-        allowed = {f.name for f in dataclass_fields(cls)}
         if include_history:
             raw_hist = data.get("history", {}) or {}
             hist: dict[int, OrderHistory] = {}
@@ -252,7 +278,7 @@ class Order:
             ):
                 hist[i] = OrderHistory(**v)
             data["history"] = hist
-            data["history_count"] = len(hist)
+            data["history_count"] = max(len(hist), data.get("history_count", 0))
             data["_seed_history"] = False  # already have history, do not seed again
         else:
             # keep counter correct even if we drop the heavy history payload
@@ -265,8 +291,10 @@ class Order:
             data["history_count"] = next_idx
             # drop heavy fields and mark to skip seeding
             data["_seed_history"] = False
+        # whatever was loaded is persisted already
+        data["_history_saved"] = data["history_count"]
         # keep only known fields
-        data = {k: v for k, v in data.items() if k in allowed}
+        data = {k: v for k, v in data.items() if k in _ORDER_INIT_FIELDS}
         return cls(**data)
 
     # History management ---------------------------------------------
@@ -300,6 +328,13 @@ class Order:
         self.history[idx] = history
         self.history_count = idx + 1
 
+    def unsaved_history(self) -> list[OrderHistory]:
+        """Entries added since the order was loaded / last stored, oldest first."""
+        return [self.history[i] for i in sorted(self.history) if i >= self._history_saved]
+
+    def mark_history_saved(self) -> None:
+        self._history_saved = self.history_count
+
     # Residuals handling -----------------------------------
     @property
     def residual_base(self) -> float:
@@ -349,3 +384,12 @@ class Order:
     def public_payload(self) -> dict:
         d = self.to_dict(include_history=False)
         return d
+
+
+# ─── Precomputed field tuples ────────────────────────────────────────────
+_HISTORY_FIELDS = tuple(f.name for f in dataclass_fields(OrderHistory))
+_history_values = attrgetter(*_HISTORY_FIELDS)
+_ORDER_INIT_FIELDS = frozenset(f.name for f in dataclass_fields(Order))
+# public fields in declaration order (private bookkeeping excluded)
+_ORDER_DICT_FIELDS = tuple(f.name for f in dataclass_fields(Order) if not f.name.startswith("_"))
+_order_values = attrgetter(*_ORDER_DICT_FIELDS)
@@ -0,0 +1,484 @@
+"""
+Asyncio read façade over the keys the engine writes.
+
+Every call into :class:`~core.engine_actors.ExchangeEngineActor` blocks a
+worker thread on ``Future.get()`` while the actor does blocking Redis I/O,
+so concurrent reads queue for the threadpool first. Reads need none of the
+actor's serialisation: :class:`AsyncEngine` answers them with
+``redis.asyncio`` on one bounded connection pool, so concurrency is limited
+by Valkey instead of by thread count. Mutations still go through the actor.
+
+Nothing is re-implemented: key layout, decoding and filters come from
+:class:`~core.orderbook._OrderBookBase`, :meth:`Market._parse
+<core.market.Market._parse>` and :meth:`Portfolio._from_hash
+<core.portfolio.Portfolio._from_hash>`, and the overview maths from
+:class:`~core.summary.Summaries`, so both paths return the same payloads.
+"""
+
+# aio.py
+from __future__ import annotations
+
+import asyncio
+import builtins
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any, TypeAlias
+
+import redis.asyncio as aioredis
+
+from ._types import AssetBalance, Order, TradingPair
+from .codec import DEFAULT_CODEC, JsonCodec
+from .constants import OPEN_STATUS_STR, OrderSide
+from .market import Market
+from .orderbook import SideArg, StatusArg, _OrderBookBase
+from .portfolio import Portfolio
+from .storage import Storage, is_local, open_storage
+from .summary import (
+    DEPOSITS_INDEX,
+    TRADES_INDEX,
+    WITHDRAWALS_INDEX,
+    CanExecuteResult,
+    Summaries,
+)
+
+# The clients decode responses, so every reply is ``str`` – which redis-py's
+# ``bytes | str`` annotations cannot express. Typed like core.storage.Storage.
+_Conn: TypeAlias = Any
+
+
+def keyspace_channel(conn: aioredis.Redis, key: str) -> str:
+    """The keyspace-notification channel of *key* in the db *conn* is connected to."""
+    db = conn.connection_pool.connection_kwargs.get("db", 0)
+    return f"__keyspace@{db}__:{key}"
+
+
+class _LocalConn:
+    """
+    The ``redis.asyncio`` calls of the readers, answered by an in-process
+    store (``memory://``, ``sqlite://``, see core.storage) through its
+    synchronous API. Each call runs on a worker thread, so an engine write
+    holding the store's lock never stalls the event loop.
+    """
+
+    def __init__(self, store: Storage) -> None:
+        self._store = store
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._store, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+    def pipeline(self, transaction: bool = True) -> _LocalPipe:
+        return _LocalPipe(self._store.pipeline(transaction))
+
+    async def scan_iter(
+        self, match: str | None = None, count: int | None = None
+    ) -> AsyncIterator[str]:
+        for key in await asyncio.to_thread(lambda: list(self._store.scan_iter(match, count))):
+            yield key
+
+
+class _LocalPipe:
+    """Queues like a ``redis.asyncio`` pipeline; only :meth:`execute` is awaited."""
+
+    def __init__(self, pipe: Any) -> None:
+        self._pipe = pipe
+
+    def __getattr__(self, name: str) -> Callable[..., _LocalPipe]:
+        method = getattr(self._pipe, name)
+
+        def queue(*args: Any, **kwargs: Any) -> _LocalPipe:
+            method(*args, **kwargs)
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        return await asyncio.to_thread(self._pipe.execute)
+
+
+class AsyncMarket:
+    """Read-only ``tickers:<PAIR>`` hashes, see :class:`core.market.Market`."""
+
+    def __init__(self, conn: aioredis.Redis, root_key: str = "tickers:") -> None:
+        self.conn: _Conn = conn
+        self.root_key = root_key
+
+    async def tickers(self) -> list[str]:
+        n = len(self.root_key)
+        return [
+            k[n:]
+            async for k in self.conn.scan_iter(f"{self.root_key}*")
+            if k.startswith(self.root_key)
+        ]
+
+    async def fetch_ticker(self, ticker: str) -> TradingPair | None:
+        return Market._parse(ticker, await self.conn.hgetall(f"{self.root_key}{ticker}"))
+
+    async def fetch_tickers(self, tickers: list[str]) -> dict[str, TradingPair | None]:
+        """Every HGETALL in one pipeline; missing or malformed tickers map to ``None``."""
+        if not tickers:
+            return {}
+        pipe = self.conn.pipeline(transaction=False)
+        for t in tickers:
+            pipe.hgetall(f"{self.root_key}{t}")
+        raw = await pipe.execute()
+        return {t: Market._parse(t, h) for t, h in zip(tickers, raw, strict=True)}
+
+
+class AsyncPortfolio:
+    """Read-only view of the ``balances`` hash, see :class:`core.portfolio.Portfolio`."""
+
+    def __init__(self, conn: aioredis.Redis, key: str = "balances") -> None:
+        self.conn: _Conn = conn
+        self.key = key
+
+    async def get(self, asset: str) -> AssetBalance:
+        asset = asset.upper()
+        free, used = await self.conn.hmget(self.key, Portfolio._fields(asset))
+        return Portfolio._bal(asset, free, used)
+
+    async def all(self) -> dict[str, AssetBalance]:
+        return Portfolio._from_hash(await self.conn.hgetall(self.key))
+
+
+class AsyncOrderBook(_OrderBookBase):
+    """The read half of :class:`core.orderbook.OrderBook` on an asyncio connection."""
+
+    def __init__(self, conn: aioredis.Redis, *, codec: JsonCodec | None = None) -> None:
+        self.r: _Conn = conn
+        self.codec = codec or DEFAULT_CODEC
+
+    async def _attach_history(self, orders: list[Order]) -> None:
+        if not orders:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        for o in orders:
+            pipe.lrange(self.HIST_KEY.format(oid=o.id), 0, -1)
+        for o, raw in zip(orders, await pipe.execute(), strict=True):
+            self._set_history(o, raw)
+
+    async def get(self, oid: str, *, include_history: bool = False) -> Order:
+        blob = await self.r.hget(self.HASH_KEY, oid)
+        if blob is None:
+            raise ValueError(f"Order {oid} not found")
+        o = self.codec.decode_order(blob)
+        if include_history:
+            await self._attach_history([o])
+        return o
+
+    async def lookup(
+        self, oids: Iterable[str], *, include_history: bool = False
+    ) -> tuple[list[Order], list[str]]:
+        """Same as :meth:`OrderBook.lookup <core.orderbook.OrderBook.lookup>`: one round trip."""
+        oids = list(dict.fromkeys(oids))
+        if not oids:
+            return [], []
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hmget(self.HASH_KEY, oids)
+        if include_history:
+            for oid in oids:
+                pipe.lrange(self.HIST_KEY.format(oid=oid), 0, -1)
+        blobs, *hists = await pipe.execute()
+        return self._resolve(oids, blobs, hists if include_history else None)
+
+    async def list(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None = None,
+        symbol: str | None = None,
+        side: SideArg | None = None,
+        tail: int | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        include_history: bool = False,
+    ) -> list[Order]:
+        """Same semantics as :meth:`OrderBook.list <core.orderbook.OrderBook.list>`."""
+        status_set = self._status_set(status)
+        side_set = self._side_set(side)
+        if status_set and all(s in OPEN_STATUS_STR for s in status_set):
+            key = self.OPEN_SYM_KEY.format(sym=symbol) if symbol else self.OPEN_ALL_KEY
+            ids = list(await self.r.smembers(key))
+            blobs = await self.r.hmget(self.HASH_KEY, ids) if ids else []
+            orders = self._filter_open(
+                blobs, status=status_set, side_set=side_set, tail=tail, since=since, until=until
+            )
+        else:
+            orders = await self._list_by_time(
+                status=status_set,
+                symbol=symbol,
+                side_set=side_set,
+                tail=tail,
+                since=since,
+                until=until,
+            )
+        if include_history:
+            await self._attach_history(orders)
+        return orders
+
+    async def _list_by_time(
+        self,
+        *,
+        status: set[str],
+        symbol: str | None,
+        side_set: set[str] | None,
+        tail: int | None,
+        since: int | None,
+        until: int | None,
+    ) -> builtins.list[Order]:
+        key = self._time_key(status, symbol)
+        hi = "+inf" if until is None else until
+        lo = "-inf" if since is None else since
+        want = tail if tail is not None and tail > 0 else None
+        chunk = want or self.SCAN_CHUNK
+
+        orders: list[Order] = []
+        offset = 0
+        while True:
+            ids = await self.r.zrevrangebyscore(key, hi, lo, start=offset, num=chunk)
+            if not ids:
+                break
+            offset += len(ids)
+            for blob in await self.r.hmget(self.HASH_KEY, ids):
+                if not blob:  # index ahead of a concurrent delete
+                    continue
+                o = self.codec.decode_order(blob)
+                if not self._matches(o, status, symbol, side_set):
+                    continue
+                orders.append(o)
+                if want is not None and len(orders) >= want:
+                    return orders
+            if len(ids) < chunk:
+                break
+        return orders
+
+    async def _walk(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None,
+        symbol: str | None,
+        side: SideArg | None,
+        since: int | None,
+        until: int | None,
+        cursor: str | None,
+        include_history: bool,
+        chunk: int,
+    ) -> AsyncIterator[tuple[Order, tuple[float, int]]]:
+        key, hi, pos, status_set, side_set = self._walk_start(
+            status=status, symbol=symbol, side=side, since=since, until=until, cursor=cursor
+        )
+        while True:
+            lo, skip = pos
+            page = await self.r.zrangebyscore(key, lo, hi, start=skip, num=chunk, withscores=True)
+            if not page:
+                return
+            blobs = await self.r.hmget(self.HASH_KEY, [oid for oid, _ in page])
+            out, pos = self._walk_step(
+                page, blobs, pos, status_set=status_set, symbol=symbol, side_set=side_set
+            )
+            if include_history:
+                await self._attach_history([o for o, _ in out])
+            for item in out:
+                yield item
+            if len(page) < chunk:
+                return
+
+    async def iter(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None = None,
+        symbol: str | None = None,
+        side: SideArg | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+        chunk: int | None = None,
+    ) -> AsyncIterator[Order]:
+        """Same as :meth:`OrderBook.iter <core.orderbook.OrderBook.iter>`, one page in memory."""
+        async for o, _ in self._walk(
+            status=status,
+            symbol=symbol,
+            side=side,
+            since=since,
+            until=until,
+            cursor=cursor,
+            include_history=include_history,
+            chunk=chunk or self.SCAN_CHUNK,
+        ):
+            yield o
+
+    async def page(
+        self,
+        *,
+        limit: int,
+        cursor: str | None = None,
+        status: StatusArg | Iterable[StatusArg] | None = None,
+        symbol: str | None = None,
+        side: SideArg | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        include_history: bool = False,
+    ) -> tuple[builtins.list[Order], str | None]:
+        """Same semantics as :meth:`OrderBook.page <core.orderbook.OrderBook.page>`."""
+        if limit < 1:
+            raise ValueError("limit must be ≥ 1")
+        orders: list[Order] = []
+        async for o, pos in self._walk(
+            status=status,
+            symbol=symbol,
+            side=side,
+            since=since,
+            until=until,
+            cursor=cursor,
+            include_history=include_history,
+            chunk=min(limit, self.SCAN_CHUNK),
+        ):
+            orders.append(o)
+            if len(orders) >= limit:
+                return orders, self.encode_cursor(pos)
+        return orders, None
+
+
+class AsyncEngine(Summaries):
+    """
+    The read-only public API of the engine (tickers, balances, orders,
+    dry runs, overview) on one pooled ``redis.asyncio`` client. At most
+    *max_connections* commands are in flight; further callers wait for a
+    free connection instead of failing.
+
+    On a ``memory://`` or ``sqlite://`` URL the same readers query the
+    engine's in-process store instead (no pool, *max_connections* unused).
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        *,
+        cash_asset: str = "USDT",
+        commission: float = 0.0,
+        max_connections: int = 64,
+    ):
+        self.cash_asset = cash_asset
+        self.commission = commission
+        self.pool: aioredis.BlockingConnectionPool | None = None
+        self.redis: _Conn
+        if is_local(redis_url):
+            self.redis = _LocalConn(open_storage(redis_url))
+        else:
+            self.pool = aioredis.BlockingConnectionPool.from_url(
+                redis_url, decode_responses=True, max_connections=max_connections
+            )
+            self.redis = aioredis.Redis(connection_pool=self.pool)
+        self.market = AsyncMarket(self.redis)
+        self.portfolio = AsyncPortfolio(self.redis)
+        self.order_book = AsyncOrderBook(self.redis)
+
+    async def aclose(self) -> None:
+        if self.pool is not None:
+            await self.pool.disconnect()
+
+    # ---------- market ------------------------------------------------ #
+    async def tickers(self) -> list[str]:
+        return await self.market.tickers()
+
+    async def fetch_ticker(self, symbol: str) -> TradingPair:
+        tick = await self.market.fetch_ticker(symbol)
+        if tick is None:
+            raise ValueError(f"Ticker {symbol} not available")
+        return tick
+
+    async def fetch_tickers(self, symbols: list[str]) -> dict[str, TradingPair | None]:
+        return await self.market.fetch_tickers(symbols)
+
+    async def _last_prices(self, tickers: list[str]) -> dict[str, float]:
+        prices = {}
+        for t, tick in (await self.market.fetch_tickers(tickers)).items():
+            if tick is None:
+                raise RuntimeError(f"Ticker for {t} not available")
+            prices[t] = tick.price
+        return prices
+
+    # ---------- portfolio --------------------------------------------- #
+    async def fetch_balance(self, asset: str | None = None) -> dict[str, Any]:
+        info = {k: b.to_dict() for k, b in (await self.portfolio.all()).items()}
+        bal = info if asset is None else info.get(asset, {})
+        return {k: bal[k] for k in sorted(bal.keys())}  # sort by asset name
+
+    async def fetch_balance_list(self) -> list[str]:
+        return sorted((await self.portfolio.all()).keys())
+
+    # ---------- orders ------------------------------------------------ #
+    async def can_execute(
+        self, *, symbol: str, side: OrderSide, amount: float, price: float | None = None
+    ) -> CanExecuteResult:
+        """Same dry run as ``ExchangeEngineActor.can_execute``."""
+        if not price:
+            tick = await self.market.fetch_ticker(symbol)
+            if tick is None:
+                raise RuntimeError(f"Ticker for {symbol} not available")
+            price = tick.price
+        base, quote = symbol.split("/")
+        have = (await self.portfolio.get(quote if side is OrderSide.BUY else base)).free
+        return self._can_execute(symbol, side, amount, price, have)
+
+    # ---------- overview ---------------------------------------------- #
+    async def get_summary_assets(self) -> dict[str, Any]:
+        portfolio = await self.fetch_balance()
+        open_orders = await self.order_book.list(status=OPEN_STATUS_STR)
+        prices = await self._last_prices(self._summary_assets_tickers(portfolio, open_orders))
+        return self._summary_assets(portfolio, open_orders, prices)
+
+    async def get_trade_stats(
+        self,
+        *,
+        side: OrderSide | str | None = None,
+        assets: list[str] | str | None = None,
+    ) -> dict[str, Any]:
+        """Same payload as ``ExchangeEngineActor.get_trade_stats`` in two round trips."""
+        sides, assets = self._trade_filters(side, assets)
+        pipe = self.redis.pipeline(transaction=False)
+        for index_key in TRADES_INDEX.values():
+            pipe.smembers(index_key)
+        members = dict(zip(TRADES_INDEX, await pipe.execute(), strict=True))
+        wanted = {
+            (s, metric): self._trade_stat_keys(members[metric], s, assets)
+            for s in sides
+            for metric in TRADES_INDEX
+        }
+        for keys in wanted.values():
+            for _, k in keys:
+                pipe.hgetall(k)
+        raw = iter(await pipe.execute())
+        out: dict[str, Any] = {s.value.upper(): {} for s in sides}
+        for (s, metric), keys in wanted.items():
+            out[s.value.upper()][metric] = {
+                base: r for (base, _), r in zip(keys, raw, strict=False) if r
+            }
+        return out
+
+    async def get_summary_capital(self, aggregation: bool = True) -> dict[str, Any]:
+        balance = await self.fetch_balance()
+        tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(balance)[1]
+        prices = await self._last_prices(tickers_list)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.smembers(DEPOSITS_INDEX)
+        pipe.smembers(WITHDRAWALS_INDEX)
+        deposit_keys, withdrawal_keys = await pipe.execute()
+        accounts = [
+            (asset, kind, f"{kind}:{asset}")
+            for asset in self._investment_assets(deposit_keys, withdrawal_keys)
+            for kind in ("deposits", "withdrawals")
+        ]
+        present = [k for _, _, k in accounts if k in deposit_keys or k in withdrawal_keys]
+        for k in present:
+            pipe.hgetall(k)
+        rows = dict(zip(present, await pipe.execute(), strict=True))
+        investment_accounts: dict[str, dict[str, Any]] = {}
+        for asset, kind, k in accounts:
+            investment_accounts.setdefault(asset, {})[kind] = (
+                self._fmt_investment(rows[k]) if k in rows else {}
+            )
+        return self._summary_capital(balance, prices, investment_accounts, aggregation)
@@ -0,0 +1,325 @@
+"""
+All-or-nothing write batches executed as *one* server-side Lua call.
+
+An :class:`AtomicBatch` collects balance checks (require), balance moves
+(reserve / release / credit / debit), guards (expect_len, fence)
+and plain write commands (``HSET``, ``ZADD``, ``SADD`` …) and ships them in a
+single ``EVALSHA``. Every reservation is checked before anything is written,
+so a batch either applies completely or not at all, and concurrent writers
+can no longer interleave a read-modify-write on ``balances``.
+
+The guards extend that to orders and leases across processes: an order
+update carries the history length it was loaded with (every change appends
+one entry, so it doubles as a version) and a lease holder's writes carry
+its fencing token. A batch whose order moved on, or whose lease was taken
+over, is rejected whole.
+
+The batch mimics the subset of the redis-py pipeline API used by
+:class:`~core.orderbook.OrderBook`, so index maintenance can be queued into
+it unchanged.
+
+Note: key names travel in ARGV, so the script is not Redis-Cluster safe –
+fine for the single Valkey instance this engine runs against.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from .storage import Storage, script
+
+# ARGV is a flat list of ops: <name> <argc> <arg1> … <argN>, repeated.
+# Balances (``<ASSET>:free`` / ``<ASSET>:used`` fields, see core.portfolio)
+# are cached per asset and written back once at the end.
+_BATCH_LUA = """
+local bal_key = KEYS[1]
+local cache = {}
+local function load(asset)
+  local b = cache[asset]
+  if not b then
+    local v = redis.call('HMGET', bal_key, asset .. ':free', asset .. ':used')
+    b = {free = tonumber(v[1]) or 0, used = tonumber(v[2]) or 0}
+    cache[asset] = b
+  end
+  return b
+end
+local function num(x) return string.format('%.17g', x) end
+
+local ops, i = {}, 1
+while i <= #ARGV do
+  local argc = tonumber(ARGV[i + 1])
+  local op = {name = ARGV[i]}
+  for j = 1, argc do op[j] = ARGV[i + 1 + j] end
+  ops[#ops + 1] = op
+  i = i + 2 + argc
+end
+
+-- phase 1: every guard, check and reservation must pass, nothing is written otherwise
+for _, op in ipairs(ops) do  -- guards first, so a balance miss always means current state
+  if op.name == 'fence' then
+    if redis.call('GET', op[1]) ~= op[2] then return {'fenced', op[1]} end
+  elseif op.name == 'expect_len' then
+    if redis.call('LLEN', op[1]) ~= tonumber(op[2]) then return {'conflict', op[1]} end
+  end
+end
+local free_left = {}
+for _, op in ipairs(ops) do
+  if op.name == 'reserve' or op.name == 'debit' then
+    local a = op[1]
+    local have = free_left[a] or load(a).free
+    if have < tonumber(op[2]) then return {'insufficient', op.name, a, num(have)} end
+    free_left[a] = have - tonumber(op[2])
+  elseif op.name == 'require' then
+    local b = load(op[1])
+    local have = b.free + b.used
+    if have + tonumber(op[3]) < tonumber(op[2]) then
+      return {'insufficient', 'require', op[1], num(have)}
+    end
+  end
+end
+
+-- phase 2: apply in order
+local out, dirty = {'ok'}, {}
+for _, op in ipairs(ops) do
+  local name = op.name
+  if name == 'reserve' or name == 'release' or name == 'credit' or name == 'debit' then
+    local b, q = load(op[1]), tonumber(op[2])
+    if name == 'reserve' then
+      b.free = b.free - q
+      b.used = b.used + q
+    elseif name == 'release' then
+      if b.used < q then q = b.used end  -- never release more than is used
+      b.used = b.used - q
+      b.free = b.free + q
+      if b.free ~= 0 and b.used / b.free < 1e-10 then b.used = 0 end
+    elseif name == 'debit' then
+      b.free = b.free - q
+    else
+      b.free = b.free + q
+    end
+    dirty[op[1]] = true
+    out[#out + 1] = num(q)
+  elseif name == 'require' or name == 'fence' or name == 'expect_len' then  -- phase 1
+  elseif name == 'srem_if_empty' then
+    if redis.call('SCARD', op[1]) == 0 then redis.call('SREM', op[2], op[3]) end
+  else
+    redis.call(name, unpack(op))
+  end
+end
+for a in pairs(dirty) do
+  redis.call('HSET', bal_key, a .. ':free', num(cache[a].free), a .. ':used', num(cache[a].used))
+end
+return out
+"""
+
+
+@script(_BATCH_LUA)
+def _batch_py(db: Storage, keys: list[str], argv: list[str]) -> list[str]:
+    """In-process twin of ``_BATCH_LUA`` (see :mod:`core.storage`)."""
+    bal_key = keys[0]
+    cache: dict[str, list[float]] = {}  # asset -> [free, used]
+
+    def load(asset: str) -> list[float]:
+        if asset not in cache:
+            free, used = db.hmget(bal_key, [f"{asset}:free", f"{asset}:used"])
+            cache[asset] = [float(free) if free else 0.0, float(used) if used else 0.0]
+        return cache[asset]
+
+    def num(x: float) -> str:
+        return f"{x:.17g}"
+
+    ops: list[list[str]] = []
+    i = 0
+    while i < len(argv):
+        argc = int(argv[i + 1])
+        ops.append([argv[i], *argv[i + 2 : i + 2 + argc]])
+        i += 2 + argc
+
+    # phase 1: every guard, check and reservation must pass, nothing is written otherwise
+    for name, *op in ops:
+        if name == "fence" and db.get(op[0]) != op[1]:
+            return ["fenced", op[0]]
+        if name == "expect_len" and db.llen(op[0]) != int(op[1]):
+            return ["conflict", op[0]]
+    free_left: dict[str, float] = {}
+    for name, *op in ops:
+        if name in ("reserve", "debit"):
+            have = free_left[op[0]] if op[0] in free_left else load(op[0])[0]
+            if have < float(op[1]):
+                return ["insufficient", name, op[0], num(have)]
+            free_left[op[0]] = have - float(op[1])
+        elif name == "require":
+            free, used = load(op[0])
+            if free + used + float(op[2]) < float(op[1]):
+                return ["insufficient", "require", op[0], num(free + used)]
+
+    # phase 2: apply in order
+    out, dirty = ["ok"], set()
+    for name, *op in ops:
+        if name in ("reserve", "release", "credit", "debit"):
+            b, q = load(op[0]), float(op[1])
+            if name == "reserve":
+                b[0] -= q
+                b[1] += q
+            elif name == "release":
+                q = min(q, b[1])  # never release more than is used
+                b[1] -= q
+                b[0] += q
+                if b[0] != 0 and b[1] / b[0] < 1e-10:
+                    b[1] = 0.0
+            elif name == "debit":
+                b[0] -= q
+            else:
+                b[0] += q
+            dirty.add(op[0])
+            out.append(num(q))
+        elif name in ("require", "fence", "expect_len"):  # phase 1
+            continue
+        elif name == "srem_if_empty":
+            if db.scard(op[0]) == 0:
+                db.srem(op[1], op[2])
+        else:
+            db.execute_command(name, *op)
+    for a in dirty:
+        db.hset(bal_key, mapping={f"{a}:free": num(cache[a][0]), f"{a}:used": num(cache[a][1])})
+    return out
+
+
+class InsufficientFunds(ValueError):
+    """
+    A check of an :class:`AtomicBatch` failed: a ``reserve`` did not fit the
+    free balance or a ``require`` exceeded the total. *have* is the free
+    (reserve) or total (require) balance the script saw.
+    """
+
+    def __init__(self, asset: str, have: float, *, op: str = "reserve") -> None:
+        msg = f"insufficient {asset} to reserve" if op == "reserve" else f"insufficient {asset}"
+        super().__init__(msg)
+        self.asset = asset
+        self.have = have
+        self.op = op
+
+
+class WriteConflict(RuntimeError):
+    """An ``expect_len`` guard failed: *key* changed since it was read. Nothing was written."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"{key} changed concurrently")
+        self.key = key
+
+
+class LeaseLost(RuntimeError):
+    """A ``fence`` guard failed: the lease *key* is held by someone else. Nothing was written."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"lease {key} lost")
+        self.key = key
+
+
+class AtomicBatch:
+    """
+    Queue of balance moves and writes applied by one ``EVALSHA``.
+
+    Balance ops return their *effective* quantity from :meth:`execute`, in
+    the order they were queued (a release is clamped to what is used).
+    """
+
+    def __init__(self, conn: Storage, *, balances_key: str = "balances") -> None:
+        self._script = conn.register_script(_BATCH_LUA)
+        self._balances_key = balances_key
+        self._args: list[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._args)
+
+    def _op(self, name: str, *args: Any) -> AtomicBatch:
+        self._args += [name, len(args), *args]
+        return self
+
+    # ---------- balance checks & moves ---------------------------------- #
+    def require(self, asset: str, qty: float, *, eps: float = 1e-12) -> AtomicBatch:
+        """Abort the batch unless free + used of *asset* ≥ *qty* (within *eps*)."""
+        return self._op("require", asset, repr(float(qty)), repr(float(eps)))
+
+    def reserve(self, asset: str, qty: float) -> AtomicBatch:
+        """Move *qty* from free to used; the whole batch fails if free < qty."""
+        return self._op("reserve", asset, repr(float(qty)))
+
+    def release(self, asset: str, qty: float) -> AtomicBatch:
+        """Move up to *qty* from used back to free."""
+        return self._op("release", asset, repr(float(qty)))
+
+    def credit(self, asset: str, dfree: float) -> AtomicBatch:
+        """Add *dfree* (may be negative) to the free balance."""
+        return self._op("credit", asset, repr(float(dfree)))
+
+    def debit(self, asset: str, qty: float) -> AtomicBatch:
+        """Take *qty* off the free balance; the whole batch fails if free < qty."""
+        return self._op("debit", asset, repr(float(qty)))
+
+    # ---------- guards --------------------------------------------------- #
+    def expect_len(self, name: str, length: int) -> AtomicBatch:
+        """Abort the batch with :class:`WriteConflict` unless ``LLEN name == length``."""
+        return self._op("expect_len", name, int(length))
+
+    def fence(self, key: str, token: str) -> AtomicBatch:
+        """Abort the batch with :class:`LeaseLost` unless ``GET key == token``."""
+        return self._op("fence", key, token)
+
+    # ---------- pipeline-compatible writes ----------------------------- #
+    def hset(self, name: str, key: str, value: Any) -> AtomicBatch:
+        return self._op("HSET", name, key, value)
+
+    def hdel(self, name: str, *keys: str) -> AtomicBatch:
+        return self._op("HDEL", name, *keys)
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> AtomicBatch:
+        return self._op("HINCRBY", name, key, int(amount))
+
+    def hincrbyfloat(self, name: str, key: str, amount: float = 1.0) -> AtomicBatch:
+        return self._op("HINCRBYFLOAT", name, key, repr(float(amount)))
+
+    def delete(self, *names: str) -> AtomicBatch:
+        return self._op("DEL", *names)
+
+    def rpush(self, name: str, *values: str) -> AtomicBatch:
+        return self._op("RPUSH", name, *values)
+
+    def sadd(self, name: str, *values: str) -> AtomicBatch:
+        return self._op("SADD", name, *values)
+
+    def srem(self, name: str, *values: str) -> AtomicBatch:
+        return self._op("SREM", name, *values)
+
+    def zadd(self, name: str, mapping: Mapping[str, float]) -> AtomicBatch:
+        flat: list[Any] = []
+        for member, score in mapping.items():
+            flat += [repr(float(score)), member]
+        return self._op("ZADD", name, *flat)
+
+    def zrem(self, name: str, *values: str) -> AtomicBatch:
+        return self._op("ZREM", name, *values)
+
+    def srem_if_empty(self, check_key: str, name: str, value: str) -> AtomicBatch:
+        """``SREM name value`` only if the set *check_key* is empty."""
+        return self._op("srem_if_empty", check_key, name, value)
+
+    # ---------- run ---------------------------------------------------- #
+    def execute(self) -> list[float]:
+        """
+        Apply the batch atomically and return the effective quantity of each
+        balance move. Raises :class:`InsufficientFunds`, :class:`WriteConflict`
+        or :class:`LeaseLost` (nothing written) if a check does not hold.
+        """
+        if not self._args:
+            return []
+        res = self._script(keys=[self._balances_key], args=self._args)
+        self._args = []
+        if res[0] == "insufficient":
+            raise InsufficientFunds(res[2], float(res[3]), op=res[1])
+        if res[0] == "conflict":
+            raise WriteConflict(res[1])
+        if res[0] == "fenced":
+            raise LeaseLost(res[1])
+        return [float(q) for q in res[1:]]
@@ -0,0 +1,191 @@
+"""
+Encoding of order blobs and history entries stored in Valkey.
+
+Two codecs share one reader, so a store may hold both formats at once:
+
+* :class:`JsonCodec`    – the original ``{"field": value, …}`` JSON objects.
+* :class:`CompactCodec` – a JSON *array* ``[<version>, v1, v2, …]`` with the
+  fields in a fixed order (:data:`ORDER_FIELDS` / :data:`HISTORY_FIELDS`)
+  and enums as small integers. No field names, no ``dataclasses.asdict``.
+
+A blob starting with ``[`` is compact, anything else is legacy JSON. The
+leading version number lets the positional layout change later: append
+new fields (or enum members) at the end, or bump :data:`COMPACT_VERSION`.
+
+The payload stays UTF-8 text (the engine's connections use
+``decode_responses=True``). ``orjson`` (the ``fast`` extra) is used when
+installed, otherwise the stdlib ``json`` module with the same separators
+and raw UTF-8. The two can still spell a float differently (``1e+16`` vs
+``1e16``), so blobs are equal as JSON, not always byte for byte – every
+reader here decodes either.
+"""
+
+# codec.py
+from __future__ import annotations
+
+import json
+from operator import attrgetter
+from typing import Any
+
+from ._types import Order, OrderHistory
+from .constants import OrderSide, OrderState, OrderType
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _loads(s: str) -> Any:
+        return orjson.loads(s)
+
+except ImportError:  # pragma: no cover - depends on the environment
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def _loads(s: str) -> Any:
+        return json.loads(s)
+
+
+COMPACT_VERSION = 1
+
+# Positional layout of compact blobs – never reorder, only append.
+ORDER_FIELDS = (
+    "id",
+    "symbol",
+    "side",
+    "type",
+    "amount",
+    "notion_currency",
+    "fee_currency",
+    "fee_rate",
+    "actual_filled",
+    "price",
+    "limit_price",
+    "status",
+    "initial_booked_notion",
+    "reserved_notion_left",
+    "actual_notion",
+    "initial_booked_fee",
+    "reserved_fee_left",
+    "actual_fee",
+    "ts_create",
+    "ts_update",
+    "ts_finish",
+    "comment",
+    "history_count",
+)
+HISTORY_FIELDS = (
+    "ts",
+    "status",
+    "price",
+    "amount_remain",
+    "actual_filled",
+    "actual_notion",
+    "actual_fee",
+    "reserved_notion_left",
+    "reserved_fee_left",
+    "comment",
+)
+
+# Enum members ↔ small ints (definition order – only append new members).
+_SIDES = tuple(OrderSide)
+_TYPES = tuple(OrderType)
+_STATES = tuple(OrderState)
+_SIDE_IDX = {m: i for i, m in enumerate(_SIDES)}
+_TYPE_IDX = {m: i for i, m in enumerate(_TYPES)}
+_STATE_IDX = {m: i for i, m in enumerate(_STATES)}
+
+_order_values = attrgetter(*ORDER_FIELDS)
+_history_values = attrgetter(*HISTORY_FIELDS)
+_I_SIDE = ORDER_FIELDS.index("side")
+_I_TYPE = ORDER_FIELDS.index("type")
+_I_STATUS = ORDER_FIELDS.index("status")
+_I_HIST_STATUS = HISTORY_FIELDS.index("status")
+
+
+def is_compact(blob: str) -> bool:
+    """True if *blob* was written by :class:`CompactCodec`."""
+    return blob[:1] == "["
+
+
+def _check_version(arr: list[Any]) -> None:
+    if arr[0] != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact blob version {arr[0]!r}")
+
+
+class JsonCodec:
+    """
+    Legacy format: one JSON object per order / history entry.
+
+    Decoding accepts both formats; subclasses only change how blobs are
+    written.
+    """
+
+    name = "json"
+
+    # ---------- write -------------------------------------------------- #
+    def encode_order(self, order: Order) -> str:
+        return order.to_json(include_history=False)
+
+    def encode_history(self, entry: OrderHistory) -> str:
+        return entry.to_json()
+
+    def is_current(self, blob: str) -> bool:
+        """True if *blob* is already in this codec's format."""
+        return not is_compact(blob)
+
+    # ---------- read --------------------------------------------------- #
+    def decode_order(self, blob: str) -> Order:
+        if not is_compact(blob):
+            return Order.from_json(blob)
+        arr = _loads(blob)
+        _check_version(arr)
+        data = dict(zip(ORDER_FIELDS, arr[1:], strict=False))
+        data["side"] = _SIDES[data["side"]]
+        data["type"] = _TYPES[data["type"]]
+        data["status"] = _STATES[data["status"]]
+        count = data.get("history_count", 0)
+        return Order(**data, _seed_history=False, _history_saved=count)
+
+    def decode_history(self, blob: str) -> OrderHistory:
+        if not is_compact(blob):
+            return OrderHistory.from_json(blob)
+        arr = _loads(blob)
+        _check_version(arr)
+        data = dict(zip(HISTORY_FIELDS, arr[1:], strict=False))
+        data["status"] = _STATES[data["status"]]
+        return OrderHistory(**data)
+
+    def recode(self, blob: str, *, history: bool = False) -> str:
+        """Re-encode a blob of either format in this codec's format."""
+        if history:
+            return self.encode_history(self.decode_history(blob))
+        return self.encode_order(self.decode_order(blob))
+
+
+class CompactCodec(JsonCodec):
+    """Positional, versioned format (see module docstring). The default."""
+
+    name = "compact"
+
+    def encode_order(self, order: Order) -> str:
+        arr: list[Any] = [COMPACT_VERSION]
+        arr += _order_values(order)
+        arr[1 + _I_SIDE] = _SIDE_IDX[OrderSide(order.side)]
+        arr[1 + _I_TYPE] = _TYPE_IDX[OrderType(order.type)]
+        arr[1 + _I_STATUS] = _STATE_IDX[OrderState(order.status)]
+        return _dumps(arr)
+
+    def encode_history(self, entry: OrderHistory) -> str:
+        arr: list[Any] = [COMPACT_VERSION]
+        arr += _history_values(entry)
+        arr[1 + _I_HIST_STATUS] = _STATE_IDX[OrderState(entry.status)]
+        return _dumps(arr)
+
+    def is_current(self, blob: str) -> bool:
+        return is_compact(blob)
+
+
+DEFAULT_CODEC = CompactCodec()
@@ -7,6 +7,8 @@ Non-blocking, single-threaded semantics inside each actor.
 from __future__ import annotations
 
 import base64
+import builtins
+import contextlib
 import hashlib
 import itertools
 import logging
@@ -15,16 +17,17 @@ import os
 import random
 import threading
 import time
+import uuid
+import zlib
 from collections import defaultdict
-from collections.abc import Mapping
+from collections.abc import Callable, Iterator, Mapping
 from datetime import timedelta
-from typing import Any, TypedDict
+from typing import Any, TypeAlias
 
-import pandas as pd
 import pykka
-import redis
 
 from ._types import AssetBalance, Order, TradingPair
+from .atomic import AtomicBatch, InsufficientFunds, WriteConflict
 from .constants import (
     CLOSED_STATUS,  # {OrderState.FILLED, …}
     OPEN_STATUS,  # {OrderState.NEW, …}
@@ -32,10 +35,23 @@ from .constants import (
     OrderState,
     OrderType,
 )
+from .lease import ShardLeases
 from .logging_config import logger
 from .market import Market
 from .orderbook import OrderBook
 from .portfolio import Portfolio
+from .storage import open_storage, write_batch
+from .summary import (
+    DEPOSITS_INDEX,
+    TRADES_INDEX,
+    TRADES_INDEX_AMOUNT,
+    TRADES_INDEX_COUNT,
+    TRADES_INDEX_FEE,
+    TRADES_INDEX_NOTIONAL,
+    WITHDRAWALS_INDEX,
+    CanExecuteResult,
+    Summaries,
+)
 
 logging.getLogger("pykka").setLevel(logging.WARNING)
 
@@ -44,32 +60,30 @@ logging.getLogger("pykka").setLevel(logging.WARNING)
 MIN_TIME = float(os.getenv("MIN_TIME_ANSWER_ORDER_MARKET", 0))
 MAX_TIME = float(os.getenv("MAX_TIME_ANSWER_ORDER_MARKET", 1))
 SIGMA_FILL = float(os.getenv("SIGMA_FILL_MARKET_ORDER", 0.1))
+SETTLE_BATCH = int(os.getenv("SETTLE_BATCH", 500))
+SETTLE_POLL_SEC = float(os.getenv("SETTLE_POLL_SEC", 1))
+# attempts of a cancel / amend whose order another worker changed meanwhile
+CONFLICT_RETRIES = int(os.getenv("CONFLICT_RETRIES", 5))
 # ────────────────────────────────────────────
 
 # ---------- Constants ------------------------------------------------ #
 
-TRADES_INDEX_COUNT = "trades:index:count"
-TRADES_INDEX_AMOUNT = "trades:index:amount"
-TRADES_INDEX_NOTIONAL = "trades:index:notional"
-TRADES_INDEX_FEE = "trades:index:fee"
-
-DEPOSITS_INDEX = "deposits:index"
-WITHDRAWALS_INDEX = "withdrawals:index"
+# Pending market-order settlements: ZSET oid → due time (ms)
+SETTLE_DUE_KEY = "settle:due"
 
 
-# ---------- Type definitions ------------------------------------------------ #
-class CanExecuteResult(TypedDict):
-    ok: bool
-    reason: str | None
+def shard_of(symbol: str, shards: int) -> int:
+    """Matching shard of *symbol* – stable across processes and restarts."""
+    return zlib.crc32(symbol.encode()) % shards
 
 
 # ---------- Domain actors ------------------------------------------------ #
 class _BaseActor(pykka.ThreadingActor):
-    """Keeps a thread-local Redis client."""
+    """Keeps a thread-local storage client (Valkey, or ``memory://`` – see core.storage)."""
 
     def __init__(self, redis_url: str):
         super().__init__()
-        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.redis = open_storage(redis_url)
 
 
 class MarketActor(_BaseActor):
@@ -83,6 +97,9 @@ class MarketActor(_BaseActor):
     def fetch_ticker(self, symbol: str) -> TradingPair | None:
         return self.market.fetch_ticker(symbol)
 
+    def fetch_tickers(self, symbols: list[str]) -> dict[str, TradingPair | None]:
+        return self.market.fetch_tickers(symbols)
+
     def set_last_price(self, *args: Any, **kwargs: Any) -> None:
         return self.market.set_last_price(*args, **kwargs)
 
@@ -99,12 +116,21 @@ class PortfolioActor(_BaseActor):
     def get(self, asset: str) -> AssetBalance:
         return self.portfolio.get(asset)
 
+    def get_many(self, assets: list[str]) -> dict[str, AssetBalance]:
+        return self.portfolio.get_many(assets)
+
     def set(self, bal: AssetBalance) -> None:
         self.portfolio.set(bal)
 
+    def apply_deltas(self, deltas: dict[str, tuple[float, float]]) -> dict[str, AssetBalance]:
+        return self.portfolio.apply_deltas(deltas)
+
     def all(self) -> dict[str, AssetBalance]:
         return self.portfolio.all()
 
+    def ensure_schema(self) -> int:
+        return self.portfolio.ensure_schema()
+
     def clear(self) -> None:
         self.portfolio.clear()
 
@@ -124,66 +150,239 @@ class OrderBookActor(_BaseActor):
     def get(self, oid: str, include_history: bool = False) -> Order:
         return self.ob.get(oid, include_history=include_history)
 
+    def get_many(self, oids: list[str]) -> list[Order]:
+        return self.ob.get_many(oids)
+
+    def lookup(
+        self, oids: list[str], include_history: bool = False
+    ) -> tuple[list[Order], list[str]]:
+        return self.ob.lookup(oids, include_history=include_history)
+
     def list(self, **kw: Any) -> list[Order]:
         return self.ob.list(**kw)
 
+    def page(self, **kw: Any) -> tuple[builtins.list[Order], str | None]:
+        return self.ob.page(**kw)
+
+    def crossing(self, symbol: str, *, bid: float, ask: float) -> builtins.list[Order]:
+        return self.ob.crossing(symbol, bid=bid, ask=ask)
+
+    def crossing_many(
+        self, quotes: dict[str, tuple[float, float]]
+    ) -> dict[str, builtins.list[Order]]:
+        return self.ob.crossing_many(quotes)
+
+    def active_symbols(self) -> builtins.list[str]:
+        return self.ob.active_symbols()
+
     def remove(self, oid: str) -> None:
         self.ob.remove(oid)
 
+    def remove_many(self, oids: builtins.list[str]) -> int:
+        return self.ob.remove_many(oids)
+
     def clear(self) -> None:
         self.ob.clear()
 
+    def ensure_indexes(self) -> None:
+        self.ob.ensure_indexes()
+
+    def ensure_schema(self) -> None:
+        self.ob.ensure_schema()
+
+
+class _Resolved:
+    """A :class:`pykka.Future` stand-in that already holds its value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def get(self, timeout: float | None = None) -> Any:
+        return self.value
+
+
+class _InlineProxy:
+    """
+    Calls a store (``Market`` / ``Portfolio`` / ``OrderBook``) directly on
+    the caller's thread, with the call shape of a pykka proxy –
+    ``proxy.method(...).get()`` and ``proxy.attr.get()`` – so the engine
+    code is the same in both modes. Errors raise at the call, not at
+    ``.get()``.
+    """
+
+    def __init__(self, target: Any) -> None:
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):  # property: evaluated on every access
+            return _Resolved(attr)
+
+        def call(*args: Any, **kwargs: Any) -> _Resolved:
+            return _Resolved(attr(*args, **kwargs))
+
+        self.__dict__[name] = call  # bound to a fixed target, safe to keep
+        return call
+
+
+# what the engine calls its stores through, in either mode
+_StoreProxy: TypeAlias = "_InlineProxy | pykka.ActorProxy[Any]"
+
 
 # ---------- Engine actor -------------------------------------------------- #
-class ExchangeEngineActor(_BaseActor):
+class ExchangeEngineActor(Summaries, _BaseActor):
     """
     One instance per process.
     Every public method runs in this actor’s thread ⇒ no data races.
+
+    With ``inline=True`` the market, portfolio and order book are called
+    directly on this thread and share its connection pool, instead of
+    living in three child actors with a Redis client each. The engine is
+    their only caller, so the child mailboxes add a cross-thread hop per
+    call and no isolation; the child actors remain the default.
+
+    With ``shards > 1`` every change to an existing order – fills, market
+    settlements, cancels, amends and expiry – runs on the
+    :class:`MatchingShardActor` that owns its symbol (:func:`shard_of`),
+    so sweeps of different symbols run concurrently and a slow symbol only
+    holds up its own shard. Admission, balances and housekeeping stay on
+    this actor; the two sides only meet in atomic script calls.
+
+    Several processes may run an engine on the same Valkey: order ids are
+    unique per process, every order update is a compare-and-set on its
+    history length (:class:`~core.atomic.WriteConflict` when it lost), and
+    sweeps passed ``leases`` (:class:`~core.lease.ShardLeases`) only touch
+    the shards they hold, fenced by the lease token.
     """
 
-    def __init__(self, *, redis_url: str, commission: float, cash_asset: str = "USDT"):
+    def __init__(
+        self,
+        *,
+        redis_url: str,
+        commission: float,
+        cash_asset: str = "USDT",
+        inline: bool = False,
+        shards: int = 1,
+    ):
+        self._init_state(redis_url, commission=commission, cash_asset=cash_asset, inline=inline)
+        # Migrate / back-fill stores written by older versions
+        self.order_book.ensure_schema().get()
+        self.order_book.ensure_indexes().get()
+        self.portfolio.ensure_schema().get()
+
+        # Matching shards (started in on_start, after pending settlements are queued)
+        if shards < 1:
+            raise ValueError("shards must be ≥ 1")
+        self.n_shards = shards
+        self._shards: list[pykka.ActorProxy] = []
+        self._settle_thread: threading.Thread | None = None
+
+    def _init_state(
+        self, redis_url: str, *, commission: float, cash_asset: str, inline: bool
+    ) -> None:
         _BaseActor.__init__(self, redis_url)  # <- brings self.redis
+        self.redis_url = redis_url
         self.cash_asset = cash_asset
         self.commission = commission
+        self.inline = inline
+        self.index = 0  # shard whose lease fences this actor's sweeps
+        self._node = uuid.uuid4().hex  # keeps ids apart from other processes
         self._oid = itertools.count(1)
+        self._fence: tuple[str, str] | None = None  # (lease key, token) while sweeping
+        # One scheduler thread drains the durable settle queue (see _settle_scheduler);
+        # a shard has none, its market orders wait for the engine's next poll
+        self._settle_wake = threading.Event()
+        self._settle_stop = threading.Event()
+        # Re-encodes blobs of older codecs in the background (see on_start)
+        self._codec_stop = threading.Event()
+
+        # Direct views on the same keys for the hot paths that batch reads
+        # into one pipeline and writes into one AtomicBatch script call
+        self._market_store = Market(self.redis)
+        self._portfolio_store = Portfolio(self.redis)
+        self._order_store = OrderBook(self.redis)
+        self.market: _StoreProxy
+        self.portfolio: _StoreProxy
+        self.order_book: _StoreProxy
+        if inline:
+            self.market = _InlineProxy(self._market_store)
+            self.portfolio = _InlineProxy(self._portfolio_store)
+            self.order_book = _InlineProxy(self._order_store)
+        else:  # child actors (proxies)
+            self.market = MarketActor.start(redis_url).proxy()
+            self.portfolio = PortfolioActor.start(redis_url).proxy()
+            self.order_book = OrderBookActor.start(redis_url).proxy()
+
+    # ---------- helpers ------------------------------------------------ #
+    def _owns(self, symbol: str) -> bool:
+        """True if this actor matches *symbol* (see :class:`MatchingShardActor`)."""
+        return True
 
-        # Child actors (proxies)
-        self.market = MarketActor.start(redis_url).proxy()
-        self.portfolio = PortfolioActor.start(redis_url).proxy()
-        self.order_book = OrderBookActor.start(redis_url).proxy()
+    def _shard(self, symbol: str) -> pykka.ActorProxy:
+        return self._shards[shard_of(symbol, self.n_shards)]
 
-        # Keep timer handles so we can cancel on shutdown
-        self._timers: list[threading.Timer] = []
+    def _by_shard(self, orders: list[Order]) -> dict[int, list[str]]:
+        """Order ids grouped by the shard that owns their symbol."""
+        groups: dict[int, list[str]] = defaultdict(list)
+        for o in orders:
+            groups[shard_of(o.symbol, self.n_shards)].append(o.id)
+        return groups
 
-    # ---------- helpers ------------------------------------------------ #
     def _uid(self) -> str:
         ts = int(time.time())  # seconds
-        raw = f"{int(ts*1000)}_{next(self._oid)}".encode()
+        raw = f"{int(ts * 1000)}_{self._node}_{next(self._oid)}".encode()
         hash = base64.urlsafe_b64encode(hashlib.md5(raw).digest()).decode()  # Remove padding
         hash = hash.replace("_", "").replace("-", "")[:6]
         oid = f"{ts:010d}_{hash}"
         return oid
 
-    def _reserve(self, asset: str, qty: float) -> None:
-        bal = self.portfolio.get(asset).get()
-        if bal.free < qty:
-            raise ValueError(f"insufficient {asset} to reserve")
-        bal.free -= qty
-        bal.used += qty
-        self.portfolio.set(bal)
+    def _atomic(self) -> AtomicBatch:
+        batch = AtomicBatch(self.redis, balances_key=self._portfolio_store.key)
+        if self._fence is not None:
+            batch.fence(*self._fence)
+        return batch
+
+    @contextlib.contextmanager
+    def _fenced(self, leases: Mapping[int, str] | None) -> Iterator[None]:
+        """Fence every batch of the block with this shard's lease token, if *leases* are given."""
+        if leases is None:
+            yield
+            return
+        self._fence = (ShardLeases.key(self.index), leases[self.index])
+        try:
+            yield
+        finally:
+            self._fence = None
 
-    def _release(self, asset: str, qty: float) -> float:
-        bal = self.portfolio.get(asset).get()
-        if bal.used < qty:
-            # In case of cancellation, we need to release everything even if used < qty due to rounding
-            # and ensure to have used == 0.0
-            qty = bal.used
-        bal.used -= qty
-        bal.free += qty
-        if bal.free and bal.used / bal.free < 1e-10:
-            bal.used = 0.0
-        self.portfolio.set(bal)
-        return qty
+    @staticmethod
+    def _retry_on_conflict(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Call *fn* – which reloads the order it changes – again while its batch
+        loses a compare-and-set to another writer, up to ``CONFLICT_RETRIES``.
+        """
+        for _ in range(CONFLICT_RETRIES):
+            try:
+                return fn(*args, **kwargs)
+            except WriteConflict as e:
+                logger.debug("Retrying %s: %s", fn.__name__, e)
+        raise ValueError("Order is being changed concurrently, try again")
+
+    def _admission_snapshot(
+        self, symbols: list[str], assets: list[str]
+    ) -> tuple[dict[str, TradingPair | None], dict[str, AssetBalance]]:
+        """Tickers of *symbols* and the balances of *assets* in one round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.hgetall(f"{self._market_store.root_key}{symbol}")
+        pipe.hmget(self._portfolio_store.key, [f for a in assets for f in Portfolio._fields(a)])
+        *tickers, vals = pipe.execute()
+        balances = {
+            a: Portfolio._bal(a, vals[2 * i], vals[2 * i + 1]) for i, a in enumerate(assets)
+        }
+        parsed = {sym: Market._parse(sym, t) for sym, t in zip(symbols, tickers, strict=True)}
+        return parsed, balances
 
     @staticmethod
     def _slippage_simulate(amount: float, sigma: float = 0.5) -> float:
@@ -211,16 +410,18 @@ class ExchangeEngineActor(_BaseActor):
         • sets the status to rejected / partially_rejected,
         • appends a history entry,
         • squashes the residual booking,
-        • updates the order book and emits a log entry.
+        • updates the order book and emits a log entry,
+        all in one atomic batch.
         """
         base, quote = o.symbol.split("/")
 
         # release leftovers
+        batch = self._atomic()
         if o.side is OrderSide.BUY:
-            self._release(quote, o.residual_quote)
+            batch.release(quote, o.residual_quote)
         else:
-            self._release(base, o.residual_base)
-            self._release(quote, o.residual_quote)
+            batch.release(base, o.residual_base)
+            batch.release(quote, o.residual_quote)
 
         # final order status
         o.status = OrderState.REJECTED if o.actual_filled == 0 else OrderState.PARTIALLY_REJECTED
@@ -231,7 +432,8 @@ class ExchangeEngineActor(_BaseActor):
         o.squash_booking()
 
         # persist and log
-        self.order_book.update(o)
+        self._order_store.update(o, pipe=batch)
+        batch.execute()
         self._log_order(o)
 
     # ---------- logging ------------------------------------------------ #
@@ -271,6 +473,8 @@ class ExchangeEngineActor(_BaseActor):
         fee: float,  # quote units
         asset_fee: str,  # fee asset, usually the quote currency
         is_new: bool = True,  # whether this is the first trade for the corresponding order
+        *,
+        pipe: AtomicBatch | None = None,  # queue into the caller's batch instead
     ) -> None:
         """
         Compact trade counters.
@@ -282,7 +486,10 @@ class ExchangeEngineActor(_BaseActor):
         """
         base, quote = symbol.split("/")
 
-        pipe = self.redis.pipeline()
+        own = pipe is None
+        if pipe is None:
+            pipe = self.redis.pipeline()
+        p = pipe
         # Need to keep track of the key structure:
         count_valkey = f"trades:{side.value}:{base}:count"
         amount_valkey = f"trades:{side.value}:{base}:amount"
@@ -292,14 +499,12 @@ class ExchangeEngineActor(_BaseActor):
         if (
             is_new
         ):  # In case the order is already partially filled, we do not increment the counters
-            pipe.hincrby(count_valkey, quote, 1)  # Number of trades for `base` in `quote`
-        pipe.hincrbyfloat(amount_valkey, quote, amount)  # Bought `base` with `quote`
-        pipe.hincrbyfloat(
+            p.hincrby(count_valkey, quote, 1)  # Number of trades for `base` in `quote`
+        p.hincrbyfloat(amount_valkey, quote, amount)  # Bought `base` with `quote`
+        p.hincrbyfloat(
             notional_valkey, quote, notional
         )  # Paid the notional with `quote` to trade `base`
-        pipe.hincrbyfloat(
-            fee_valkey, asset_fee, fee
-        )  # Paid the fee with `asset_fee` to trade `base`
+        p.hincrbyfloat(fee_valkey, asset_fee, fee)  # Paid the fee with `asset_fee` to trade `base`
         # Remember the hash-keys so we can enumerate/reset later -------------
         # a small helper list to avoid repetition
         index_ops = [
@@ -310,9 +515,10 @@ class ExchangeEngineActor(_BaseActor):
         ]
 
         for set_name, hash_key in index_ops:
-            pipe.sadd(set_name, hash_key)
+            p.sadd(set_name, hash_key)
 
-        pipe.execute()  # ← atomic MULTI/EXEC
+        if own:
+            p.execute()  # ← atomic MULTI/EXEC
 
     def _update_deposit_account(
         self,
@@ -368,6 +574,7 @@ class ExchangeEngineActor(_BaseActor):
     # ---------- core balance moves ------------------------------------ #
     def _execute_buy(
         self,
+        batch: AtomicBatch,
         *,
         base: str,
         quote: str,
@@ -377,23 +584,20 @@ class ExchangeEngineActor(_BaseActor):
         order_will_close: bool,
         residual_quote: float,
     ) -> dict[str, float]:
+        """Queue the balance moves and trade stats of one buy fill into *batch*."""
         filled_notion = fillable_amount * price
         filled_fee = filled_notion * self.commission
         # Reduce the cash balance
         if order_will_close:
             # If the order will close, we release the still reserved notion + fee
             # This is to avoid mismatches on the used balances
-            self._release(quote, residual_quote)
+            batch.release(quote, residual_quote)
         else:
             # If the order will not close, we release only the fillable part
-            self._release(quote, filled_notion + filled_fee)
-        cash = self.portfolio.get(quote).get()
-        cash.free -= filled_notion + filled_fee
-        self.portfolio.set(cash)
+            batch.release(quote, filled_notion + filled_fee)
+        batch.credit(quote, -(filled_notion + filled_fee))
         # Increase the asset balance
-        asset = self.portfolio.get(base).get()
-        asset.free += fillable_amount
-        self.portfolio.set(asset)
+        batch.credit(base, fillable_amount)
         self._update_trade_stats(
             symbol=f"{base}/{quote}",
             side=OrderSide.BUY,
@@ -402,11 +606,13 @@ class ExchangeEngineActor(_BaseActor):
             fee=filled_fee,
             asset_fee=quote,  # fee is usually in the quote currency
             is_new=order_is_new,
+            pipe=batch,
         )
         return {"filled_notion": filled_notion, "filled_fee": filled_fee}
 
     def _execute_sell(
         self,
+        batch: AtomicBatch,
         *,
         base: str,
         quote: str,
@@ -416,24 +622,21 @@ class ExchangeEngineActor(_BaseActor):
         order_will_close: bool,
         residual_quote: float,
     ) -> dict[str, float]:
+        """Queue the balance moves and trade stats of one sell fill into *batch*."""
         filled_notion = fillable_amount * price
         filled_fee = filled_notion * self.commission
         # Reduce the asset balance
-        self._release(base, fillable_amount)
-        asset = self.portfolio.get(base).get()
-        asset.free -= fillable_amount
-        self.portfolio.set(asset)
+        batch.release(base, fillable_amount)
+        batch.credit(base, -fillable_amount)
         # Increase the cash balance
         if order_will_close:
             # If the order will close, we release the still reserved fee
             # This is to avoid mismatches on the used balances
-            self._release(quote, residual_quote)
+            batch.release(quote, residual_quote)
         else:
             # If the order will not close, we release only the fillable part
-            self._release(quote, filled_fee)
-        cash = self.portfolio.get(quote).get()
-        cash.free += filled_notion - filled_fee
-        self.portfolio.set(cash)
+            batch.release(quote, filled_fee)
+        batch.credit(quote, filled_notion - filled_fee)
         self._update_trade_stats(
             symbol=f"{base}/{quote}",
             side=OrderSide.SELL,
@@ -442,6 +645,7 @@ class ExchangeEngineActor(_BaseActor):
             fee=filled_fee,
             asset_fee=quote,  # fee is usually in the quote currency
             is_new=order_is_new,
+            pipe=batch,
         )
         return {"filled_notion": filled_notion, "filled_fee": filled_fee}
 
@@ -486,6 +690,10 @@ class ExchangeEngineActor(_BaseActor):
     def tickers(self) -> list[str]:
         return self.market.tickers.get()  # type: ignore
 
+    def active_symbols(self) -> list[str]:
+        """Symbols with at least one open order – the only ones a tick can fill."""
+        return self.order_book.active_symbols().get()  # type: ignore
+
     def fetch_ticker(self, symbol: str) -> TradingPair:
         tick = self.market.fetch_ticker(symbol).get()
         if tick is None:
@@ -503,37 +711,49 @@ class ExchangeEngineActor(_BaseActor):
         assets_owned_list.sort()  # sort by asset name
         return assets_owned_list
 
-    def create_order(
-        self,
-        *,
-        symbol: str,
-        side: OrderSide | str,  # <-- may come in as str
-        type: OrderType | str,  # <-- may come in as str
-        amount: float,
-        limit_price: float | None = None,
-    ) -> dict[str, Any]:
-        # NORMALISE side / type  ────────────────────────────────
+    @staticmethod
+    def _order_kinds(side: OrderSide | str, type: OrderType | str) -> tuple[OrderSide, OrderType]:
+        """Normalise side / type that may come in as str."""
         if isinstance(side, str):
             try:
                 side = OrderSide(side)
             except ValueError as e:
                 raise ValueError(f"invalid side {side!r}") from e
-
         if isinstance(type, str):
             try:
                 type = OrderType(type)
             except ValueError as e:
                 raise ValueError(f"invalid order type {type!r}") from e
+        return side, type
 
+    def _admit(
+        self,
+        *,
+        symbol: str,
+        side: OrderSide,
+        type: OrderType,
+        amount: float,
+        limit_price: float | None,
+        trading_pair: TradingPair | None,
+        free: dict[str, float],
+        ts: int,
+    ) -> tuple[Order, list[tuple[str, float]]]:
+        """
+        Validate one order against a ticker and the *free* balances seen so
+        far, and build it (``NEW`` or ``REJECTED``) with the reservations it
+        needs. Accepted reservations are deducted from *free*, so several
+        orders can be checked cumulatively against one snapshot.
+        """
+        base, _, quote = symbol.partition("/")
         # validation
-        if symbol not in self.market.tickers.get():
+        if trading_pair is None:
             raise ValueError(f"Ticker {symbol} does not exist")
         if amount <= 0:
             raise ValueError("amount must be > 0")
         if type is OrderType.LIMIT and (limit_price is None or limit_price < 0):
             raise ValueError("limit_price must be ≥ 0 for limit orders")
 
-        last = self.market.last_price(symbol).get()
+        last = trading_pair.price
         px = last
         if type is OrderType.LIMIT:
             if limit_price is None:
@@ -543,27 +763,26 @@ class ExchangeEngineActor(_BaseActor):
             else:  # sell – must reserve against worst-case (higher) price
                 px = max(limit_price, last)
 
-        base, quote = symbol.split("/")
         notion, fee = amount * px, amount * px * self.commission
 
         # funds check
         comment = None
         enough_funds = False
         if side is OrderSide.BUY:
-            have = self.portfolio.get(quote).get().free
+            have = free[quote]
             if have >= notion + fee:
                 enough_funds = True
             else:
                 comment = f"Need {notion + fee:.2f} {quote}, have {have:.2f}"
         else:
             # Test if we have enough base to sell
-            have = self.portfolio.get(base).get().free
+            have = free[base]
             if have >= amount:
                 enough_funds = True
             else:
                 comment = f"Need {amount:.8f} {base}, have {have:.8f}"
             # Test if we have enough quote to pay the fee
-            have = self.portfolio.get(quote).get().free
+            have = free[quote]
             if have >= fee:
                 enough_funds = enough_funds and True
             else:
@@ -572,12 +791,14 @@ class ExchangeEngineActor(_BaseActor):
                     if comment is None
                     else comment + f", need {fee:.2f} {quote}, have {have:.2f}"
                 )
+        reserves: list[tuple[str, float]] = []
         if enough_funds:
             if side is OrderSide.BUY:
-                self._reserve(quote, notion + fee)
+                reserves = [(quote, notion + fee)]
             else:
-                self._reserve(base, amount)
-                self._reserve(quote, fee)
+                reserves = [(base, amount), (quote, fee)]
+            for asset, qty in reserves:
+                free[asset] -= qty
         # set booked values per side
         booked_notion = notion if side is OrderSide.BUY else 0.0
         status = OrderState.NEW if enough_funds else OrderState.REJECTED
@@ -586,7 +807,6 @@ class ExchangeEngineActor(_BaseActor):
         initial_booked_fee = fee if enough_funds else 0.0
         reserved_fee_left = fee if enough_funds else 0.0
         # open order
-        ts = int(time.time() * 1000)
         order = Order(
             id=self._uid(),
             symbol=symbol,
@@ -607,42 +827,153 @@ class ExchangeEngineActor(_BaseActor):
             ts_finish=ts if status in CLOSED_STATUS else None,
             comment=comment,
         )
-        self.order_book.add(order)
-        self._log_order(order)
+        return order, reserves
 
+    def _queue_admission(
+        self, batch: AtomicBatch, order: Order, reserves: list[tuple[str, float]]
+    ) -> None:
+        """Queue the reservations, the order with its indexes and its settle entry."""
+        for asset, qty in reserves:
+            batch.reserve(asset, qty)
+        self._order_store.add(order, pipe=batch)
         # market order ⇒ schedule async settle
-        if type is OrderType.MARKET:
-            delay = random.uniform(MIN_TIME, MAX_TIME)
-            t = threading.Timer(
-                delay,
-                lambda: self.actor_ref.tell({"cmd": "_settle_market", "oid": order.id}),
-            )
-            t.start()
-            self._timers.append(t)
+        if order.type is OrderType.MARKET and order.status is OrderState.NEW:
+            due = order.ts_create + int(random.uniform(MIN_TIME, MAX_TIME) * 1000)
+            batch.zadd(SETTLE_DUE_KEY, {order.id: due})
 
+    def _admitted(self, order: Order) -> dict[str, Any]:
+        if order.status is OrderState.NEW and order.type is OrderType.MARKET:
+            self._settle_wake.set()
+        self._log_order(order)
         return order.public_payload()
 
+    def create_order(
+        self,
+        *,
+        symbol: str,
+        side: OrderSide | str,  # <-- may come in as str
+        type: OrderType | str,  # <-- may come in as str
+        amount: float,
+        limit_price: float | None = None,
+    ) -> dict[str, Any]:
+        side, type = self._order_kinds(side, type)
+
+        # One pipelined read for the ticker and both legs' balances; the
+        # reservation and every write then go out as one atomic script call.
+        base, _, quote = symbol.partition("/")
+        tickers, balances = self._admission_snapshot([symbol], [base, quote])
+        ts = int(time.time() * 1000)
+        order, reserves = self._admit(
+            symbol=symbol,
+            side=side,
+            type=type,
+            amount=amount,
+            limit_price=limit_price,
+            trading_pair=tickers[symbol],
+            free={a: b.free for a, b in balances.items()},
+            ts=ts,
+        )
+        batch = self._atomic()
+        self._queue_admission(batch, order, reserves)
+        try:
+            batch.execute()
+        except InsufficientFunds as e:
+            # Balances moved between the snapshot and the script (another
+            # writer) – nothing was written, book the order as rejected.
+            order.status = OrderState.REJECTED
+            order.ts_finish = ts
+            order.comment = f"Insufficient {e.asset} at admission, have {e.have:.8f}"
+            order.initial_booked_notion = order.initial_booked_fee = 0.0
+            order.squash_booking()
+            seed = order.history[0]
+            seed.status, seed.comment = order.status, order.comment
+            seed.reserved_notion_left = seed.reserved_fee_left = 0.0
+            self._order_store.add(order)
+        return self._admitted(order)
+
+    def create_orders(self, orders: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Admit many orders (``create_order`` keyword dicts) at once: one
+        pipelined read of every ticker and balance involved, funds checked
+        cumulatively in list order, then one atomic script call for all
+        reservations and writes. Returns one result per item, in order: the
+        order payload, or ``{"error": …}`` for an invalid item.
+
+        If another writer moved balances since the snapshot the script
+        writes nothing, and the orders are admitted one by one instead.
+        """
+        results: list[dict[str, Any]] = [{} for _ in orders]
+        parsed: list[tuple[int, dict[str, Any]]] = []
+        symbols: dict[str, None] = {}
+        assets: dict[str, None] = {}
+        for i, req in enumerate(orders):
+            try:
+                side, type = self._order_kinds(req["side"], req.get("type", OrderType.MARKET))
+                symbol, amount = req["symbol"], float(req["amount"])
+                base, _, quote = symbol.partition("/")
+            except (KeyError, ValueError, TypeError) as e:
+                results[i] = {"error": f"missing field {e}" if isinstance(e, KeyError) else str(e)}
+                continue
+            symbols[symbol] = assets[base] = assets[quote] = None
+            parsed.append((i, {**req, "side": side, "type": type, "amount": amount}))
+        if not parsed:
+            return results
+
+        tickers, balances = self._admission_snapshot(list(symbols), list(assets))
+        free = {a: b.free for a, b in balances.items()}
+        ts = int(time.time() * 1000)
+        batch = self._atomic()
+        admitted: list[tuple[int, Order]] = []
+        for i, req in parsed:
+            try:
+                order, reserves = self._admit(
+                    symbol=req["symbol"],
+                    side=req["side"],
+                    type=req["type"],
+                    amount=req["amount"],
+                    limit_price=req.get("limit_price"),
+                    trading_pair=tickers[req["symbol"]],
+                    free=free,
+                    ts=ts,
+                )
+            except ValueError as e:
+                results[i] = {"error": str(e)}
+                continue
+            self._queue_admission(batch, order, reserves)
+            admitted.append((i, order))
+        try:
+            batch.execute()
+        except InsufficientFunds:
+            logger.info("Balances moved during batch admission, admitting one by one")
+            for i, req in parsed:
+                if "error" in results[i]:
+                    continue
+                try:
+                    results[i] = self.create_order(**req)
+                except ValueError as e:
+                    results[i] = {"error": str(e)}
+            return results
+        for i, order in admitted:
+            results[i] = self._admitted(order)
+        return results
+
     # expose await-able helper
     def create_order_async(self, **kw: Any) -> dict[str, Any]:
         # This method is called on an ActorProxy, so Pykka automatically wraps the return in a Future
         return self.create_order(**kw)
 
-    def cancel_order(self, oid: str) -> dict[str, Any]:
-        o = self.order_book.get(oid).get()
-        if o.status not in OPEN_STATUS:
-            raise ValueError("Only *open* orders can be canceled")
+    @staticmethod
+    def _mark_canceled(o: Order, ts: int) -> list[tuple[str, float]]:
+        """
+        Close an open order as (partially) canceled and return the
+        ``(asset, qty)`` still reserved for it, to be released.
+        """
         base, quote = o.symbol.split("/")
         if o.side is OrderSide.BUY:
-            rq = o.residual_quote
-            released_quote = self._release(quote, rq)
-            released_base = 0.0
+            releases = [(quote, o.residual_quote)]
         else:
-            rb = o.residual_base
-            rq = o.residual_quote
-            released_base = self._release(base, rb)
-            released_quote = self._release(quote, rq)
+            releases = [(base, o.residual_base), (quote, o.residual_quote)]
         o.status = OrderState.CANCELED if o.actual_filled == 0 else OrderState.PARTIALLY_CANCELED
-        ts = int(time.time() * 1000)
         o.ts_finish = o.ts_update = ts
         o.comment = "Order canceled by user"
         o.add_history(
@@ -651,8 +982,6 @@ class ExchangeEngineActor(_BaseActor):
             comment=o.comment,
         )
         o.squash_booking()
-        self.order_book.update(o)
-        self._log_order(o)
         # Sanity checks (idempotency + no leaks)
         if o.side is OrderSide.BUY:
             assert o.reserved_notion_left >= -1e-9
@@ -660,23 +989,224 @@ class ExchangeEngineActor(_BaseActor):
         else:
             assert o.residual_base >= -1e-9
             assert o.reserved_fee_left >= -1e-9
+        return releases
+
+    def cancel_order(self, oid: str) -> dict[str, Any]:
+        if self._shards:
+            symbol = self._order_store.get(oid).symbol
+            return self._shard(symbol).cancel_order(oid).get()  # type: ignore[no-any-return]
+        return self._retry_on_conflict(self._cancel_order, oid)  # type: ignore[no-any-return]
+
+    def _cancel_order(self, oid: str) -> dict[str, Any]:
+        o = self._order_store.get(oid)
+        if o.status not in OPEN_STATUS:
+            raise ValueError("Only *open* orders can be canceled")
+        base, quote = o.symbol.split("/")
+        releases = self._mark_canceled(o, int(time.time() * 1000))
+        # releases and the order update go out as one atomic script call
+        batch = self._atomic()
+        for asset, qty in releases:
+            batch.release(asset, qty)
+        self._order_store.update(o, pipe=batch)
+        freed = {base: 0.0, quote: 0.0}
+        for (asset, _), qty in zip(releases, batch.execute(), strict=True):
+            freed[asset] += qty
+        self._log_order(o)
 
         return {
             "canceled_order": o.public_payload(),
-            "freed": {base: released_base, quote: released_quote},
+            "freed": freed,
         }
 
+    def cancel_orders(
+        self,
+        *,
+        ids: list[str] | None = None,
+        symbol: str | None = None,
+        side: OrderSide | str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Cancel every open order matching the filters (all open orders if
+        none is given) in one atomic script call: the candidates come from
+        the open indexes (or one HMGET for *ids*), releases are summed per
+        asset, and every order update shares the same batch.
+
+        Returns the canceled orders, the quantity freed per asset and the
+        requested ids that were not open (or unknown).
+        """
+        return self._retry_on_conflict(  # type: ignore[no-any-return]
+            self._cancel_orders, ids=ids, symbol=symbol, side=side
+        )
+
+    def _cancel_orders(
+        self,
+        *,
+        ids: list[str] | None,
+        symbol: str | None,
+        side: OrderSide | str | None,
+    ) -> dict[str, Any]:
+        if isinstance(side, str):
+            try:
+                side = OrderSide(side)
+            except ValueError as e:
+                raise ValueError(f"invalid side {side!r}") from e
+        if ids is not None:
+            found = {o.id: o for o in self._order_store.get_many(ids)}
+            candidates = [
+                o
+                for o in (found[i] for i in dict.fromkeys(ids) if i in found)
+                if (symbol is None or o.symbol == symbol) and (side is None or o.side is side)
+            ]
+        else:
+            candidates = self._order_store.list(status=OPEN_STATUS, symbol=symbol, side=side)
+        to_cancel = [o for o in candidates if o.status in OPEN_STATUS]
+        done = {o.id for o in to_cancel}
+        skipped = [] if ids is None else [i for i in dict.fromkeys(ids) if i not in done]
+        if not to_cancel:
+            return {"canceled_orders": [], "freed": {}, "skipped": skipped}
+        if self._shards:
+            return self._cancel_on_shards(to_cancel, ids)
+
+        ts = int(time.time() * 1000)
+        totals: dict[str, float] = {}
+        for o in to_cancel:
+            for asset, qty in self._mark_canceled(o, ts):
+                totals[asset] = totals.get(asset, 0.0) + qty
+        batch = self._atomic()
+        for asset, qty in totals.items():
+            batch.release(asset, qty)
+        for o in to_cancel:
+            self._order_store.update(o, pipe=batch)
+        freed = dict(zip(totals, batch.execute(), strict=True))
+        for o in to_cancel:
+            self._log_order(o)
+        return {
+            "canceled_orders": [o.public_payload() for o in to_cancel],
+            "freed": freed,
+            "skipped": skipped,
+        }
+
+    def _cancel_on_shards(self, to_cancel: list[Order], ids: list[str] | None) -> dict[str, Any]:
+        """Bulk cancel split by owning shard; the shards re-check every order."""
+        groups = self._by_shard(to_cancel)
+        results = pykka.get_all([self._shards[i].cancel_orders(ids=g) for i, g in groups.items()])
+        canceled = [o for r in results for o in r["canceled_orders"]]
+        freed: dict[str, float] = {}
+        for r in results:
+            for asset, qty in r["freed"].items():
+                freed[asset] = freed.get(asset, 0.0) + qty
+        done = {o["id"] for o in canceled}
+        skipped = [] if ids is None else [i for i in dict.fromkeys(ids) if i not in done]
+        return {"canceled_orders": canceled, "freed": freed, "skipped": skipped}
+
+    def amend_order(
+        self, oid: str, *, limit_price: float | None = None, amount: float | None = None
+    ) -> dict[str, Any]:
+        """
+        Change ``limit_price`` and/or ``amount`` of an open limit order in
+        place: same id, one history entry, and only the reservation delta
+        is moved (reserve or release) together with the order update and its
+        price-index entry in one atomic script call.
+        """
+        if self._shards:
+            symbol = self._order_store.get(oid).symbol
+            return (
+                self._shard(symbol)
+                .amend_order(  # type: ignore[no-any-return]
+                    oid, limit_price=limit_price, amount=amount
+                )
+                .get()
+            )
+        return self._retry_on_conflict(  # type: ignore[no-any-return]
+            self._amend_order, oid, limit_price=limit_price, amount=amount
+        )
+
+    def _amend_order(
+        self, oid: str, *, limit_price: float | None, amount: float | None
+    ) -> dict[str, Any]:
+        o = self._order_store.get(oid)
+        if o.status not in OPEN_STATUS:
+            raise ValueError("Only *open* orders can be amended")
+        if o.type is not OrderType.LIMIT:
+            raise ValueError("Only limit orders can be amended")
+        new_px = o.limit_price if limit_price is None else limit_price
+        new_amount = o.amount if amount is None else amount
+        changes = []
+        if new_px != o.limit_price:
+            changes.append(f"limit_price {o.limit_price} → {new_px}")
+        if new_amount != o.amount:
+            changes.append(f"amount {o.amount} → {new_amount}")
+        if not changes:
+            raise ValueError("Nothing to amend: pass a new limit_price and/or amount")
+        if new_px is None or new_px < 0:
+            raise ValueError("limit_price must be ≥ 0 for limit orders")
+        remain = new_amount - o.actual_filled
+        if remain <= 0:
+            raise ValueError(f"amount must exceed what is already filled ({o.actual_filled:.8f})")
+
+        base, _, quote = o.symbol.partition("/")
+        deltas: dict[str, float] = {}
+        if o.side is OrderSide.BUY:
+            notion = remain * new_px
+            fee = notion * o.fee_rate
+            deltas[quote] = notion + fee - o.residual_quote
+            o.initial_booked_notion += notion - o.reserved_notion_left
+            o.reserved_notion_left = notion
+        else:
+            # sell – the fee is reserved against the worst-case (higher) price
+            trading_pair = self._market_store.fetch_ticker(o.symbol)
+            if trading_pair is None:
+                raise ValueError(f"Ticker {o.symbol} does not exist")
+            fee = remain * max(new_px, trading_pair.price) * o.fee_rate
+            deltas[base] = remain - o.residual_base
+            deltas[quote] = fee - o.residual_quote
+        o.initial_booked_fee += fee - o.reserved_fee_left
+        o.reserved_fee_left = fee
+
+        o.limit_price, o.amount = new_px, new_amount
+        o.ts_update = int(time.time() * 1000)
+        o.add_history(
+            ts=o.ts_update,
+            status=o.status,
+            price=new_px,
+            amount_remain=o.amount_remain,
+            actual_filled=o.actual_filled,
+            reserved_notion_left=o.reserved_notion_left,
+            reserved_fee_left=o.reserved_fee_left,
+            comment="Amended: " + ", ".join(changes),
+        )
+
+        batch = self._atomic()
+        for asset, delta in deltas.items():
+            if delta > 0:
+                batch.reserve(asset, delta)
+            elif delta < 0:
+                batch.release(asset, -delta)
+        self._order_store.update(o, pipe=batch)
+        try:
+            batch.execute()
+        except InsufficientFunds as e:
+            raise ValueError(
+                f"Insufficient {e.asset} to amend, need {deltas[e.asset]:.8f} more, "
+                f"have {e.have:.8f}"
+            ) from e
+        self._log_order(o)
+        return {"amended_order": o.public_payload(), "reserved": deltas}
+
     # ---------- price-tick & housekeeping ----------------------------- #
-    def process_single_order(self, o: Order, trading_pair: TradingPair) -> None:
+    def process_single_order(
+        self, o: Order, trading_pair: TradingPair, *, refresh: bool = True
+    ) -> bool:
         """
         Process a single order based on the current market state.
         This simulates order fills based on the current market state.
+        Pass ``refresh=False`` when *o* was just loaded in this actor turn.
+        Returns ``True`` if the order got a (partial) fill.
         """
-
-        o_fresh = self.order_book.get(o.id, include_history=False).get()
-        if o_fresh.status not in OPEN_STATUS or o_fresh.actual_filled >= o_fresh.amount - 1e-12:
-            return
-        o = o_fresh
+        if refresh:
+            o = self.order_book.get(o.id, include_history=False).get()
+        if o.status not in OPEN_STATUS or o.actual_filled >= o.amount - 1e-12:
+            return False
         fillable = False
         need_amount = o.amount - o.actual_filled
         order_is_new = o.status is OrderState.NEW
@@ -692,7 +1222,7 @@ class ExchangeEngineActor(_BaseActor):
             fillable_amount = need_amount
             order_will_close = True
         if fillable_amount <= 0:
-            return
+            return False
         if o.type is OrderType.MARKET:
             fillable = True
         elif o.type is OrderType.LIMIT:
@@ -702,45 +1232,25 @@ class ExchangeEngineActor(_BaseActor):
                 o.side is OrderSide.SELL and trading_pair.bid >= o.limit_price
             )
         if not fillable:
-            return
+            return False
         base, quote = o.symbol.split("/")
         px = trading_pair.ask if o.side is OrderSide.BUY else trading_pair.bid
 
         # ---------------- reservation check ---------------------------
-        # If the order is not fillable due to insufficient reserves,
-        # we reject it and release the reserved amounts.
+        # The totals still held must cover this fill. The check runs inside
+        # the settlement script, so balances, trade stats and the order move
+        # together in one round trip or not at all.
+        batch = self._atomic()
         if o.side is OrderSide.BUY:
             need_quote = fillable_amount * px * (1 + self.commission)
-            total_balance_q = self.portfolio.get(quote).get().total
-            if total_balance_q + 1e-12 < need_quote:
-                self._rejected_for_insufficient_reserve(
-                    o,
-                    reason=f"Insufficient {quote} reserved to buy (need {need_quote:.8f} {quote}, have {total_balance_q:.8f} {quote})",
-                )
-                return
+            batch.require(quote, need_quote)
         else:  # sell
             need_asset = fillable_amount
             need_fee_q = fillable_amount * px * self.commission
-            total_balance_a = self.portfolio.get(base).get().total
-            total_balance_q = self.portfolio.get(quote).get().total
-            if total_balance_a + 1e-12 < need_asset:
-                self._rejected_for_insufficient_reserve(
-                    o,
-                    reason=(
-                        f"Insufficient {base} reserved for sell (need {need_asset:.8f} {base}, have {total_balance_a:.8f} {base})"
-                    ),
-                )
-                return
-            elif total_balance_q + 1e-12 < need_fee_q:
-                self._rejected_for_insufficient_reserve(
-                    o,
-                    reason=(
-                        f"Insufficient {quote} reserved for sell to pay fee "
-                        f"(need {need_fee_q:.8f} {quote}, have {total_balance_q:.8f} {quote})"
-                    ),
-                )
-                return
+            batch.require(base, need_asset)
+            batch.require(quote, need_fee_q)
         tx = (self._execute_buy if o.side is OrderSide.BUY else self._execute_sell)(
+            batch,
             base=base,
             quote=quote,
             fillable_amount=fillable_amount,
@@ -788,18 +1298,136 @@ class ExchangeEngineActor(_BaseActor):
             reserved_fee_left=o.reserved_fee_left,
         )
         # Update the order book
-        self.order_book.update(o)
+        self._order_store.update(o, pipe=batch)
+        try:
+            batch.execute()
+        except WriteConflict:
+            # another writer (cancel, amend, a second worker) got there first
+            logger.debug("Order %s changed concurrently, fill skipped", o.id)
+            return False
+        except InsufficientFunds as e:
+            # nothing was written – reject from the stored (pre-fill) state
+            have = e.have
+            if o.side is OrderSide.BUY:
+                reason = f"Insufficient {quote} reserved to buy (need {need_quote:.8f} {quote}, have {have:.8f} {quote})"
+            elif e.asset == base:
+                reason = f"Insufficient {base} reserved for sell (need {need_asset:.8f} {base}, have {have:.8f} {base})"
+            else:
+                reason = (
+                    f"Insufficient {quote} reserved for sell to pay fee "
+                    f"(need {need_fee_q:.8f} {quote}, have {have:.8f} {quote})"
+                )
+            try:
+                self._rejected_for_insufficient_reserve(self._order_store.get(o.id), reason=reason)
+            except WriteConflict:
+                logger.debug("Order %s changed concurrently, rejection skipped", o.id)
+            return False
         self._log_order(o)
+        return True
 
     def process_price_tick(self, symbol: str) -> None:
         """
         Process a price tick for the given symbol.
         This simulates order fills based on the current market state.
+        Only orders the current bid/ask crosses are loaded (price index), so
+        the cost follows the number of fills, not the resting book size.
         """
+        if self._shards:
+            self._shard(symbol).process_price_tick(symbol).get()
+            return
         trading_pair = self.fetch_ticker(symbol)  # ask, bid, ask_volume, bid_volume
-        open_orders = self.order_book.list(status=OPEN_STATUS, symbol=symbol).get()
-        for o in open_orders:
-            self.process_single_order(o, trading_pair)
+        candidates = self.order_book.crossing(
+            symbol, bid=trading_pair.bid, ask=trading_pair.ask
+        ).get()
+        for o in candidates:
+            self.process_single_order(o, trading_pair, refresh=False)
+
+    def process_price_ticks(
+        self, symbols: list[str] | None = None, *, leases: Mapping[int, str] | None = None
+    ) -> dict[str, Any]:
+        """
+        Batched :meth:`process_price_tick` for a whole sweep (default: every
+        symbol with open orders). Tickers come back in one pipeline and the
+        crossing candidates of all symbols in one pipeline + one HMGET, so a
+        quiet sweep costs a handful of round trips regardless of symbol count.
+        Explicit *symbols* are narrowed to those with open orders, so callers
+        can pass raw ticker-change notifications straight through.
+
+        Returns per-symbol candidate/fill counts and settle time (ms).
+        With shards, every shard sweeps its own symbols at the same time.
+        With *leases* (shard → fencing token) only the shards held are swept.
+        """
+        t0 = time.perf_counter()
+        if self._shards:
+            return self._sweep_shards(symbols, t0, leases)
+        if leases is not None and self.index not in leases:
+            return {"symbols": 0, "fills": 0, "ms": 0.0, "per_symbol": {}}
+        with self._fenced(leases):
+            return self._sweep(symbols, t0)
+
+    def _sweep(self, symbols: list[str] | None, t0: float) -> dict[str, Any]:
+        active = self.active_symbols()
+        if symbols is None:
+            symbols = active
+        else:
+            active_set = set(active)
+            symbols = [s for s in symbols if s in active_set]
+        tickers = self.market.fetch_tickers(symbols).get()
+        quotes = {s: (tp.bid, tp.ask) for s, tp in tickers.items() if tp is not None}
+        for s in symbols:
+            if tickers.get(s) is None:
+                logger.warning("Skipping tick for %s: ticker not available", s)
+        candidates = self.order_book.crossing_many(quotes).get() if quotes else {}
+        per_symbol: dict[str, dict[str, float]] = {}
+        total_fills = 0
+        with write_batch(self.redis):  # one commit for the sweep's fills (SQLite)
+            for s, orders in candidates.items():
+                t_sym = time.perf_counter()
+                fills = sum(self.process_single_order(o, tickers[s], refresh=False) for o in orders)
+                total_fills += fills
+                per_symbol[s] = {
+                    "candidates": len(orders),
+                    "fills": fills,
+                    "ms": (time.perf_counter() - t_sym) * 1000,
+                }
+        return {
+            "symbols": len(symbols),
+            "fills": total_fills,
+            "ms": (time.perf_counter() - t0) * 1000,
+            "per_symbol": per_symbol,
+        }
+
+    def _held(self, leases: Mapping[int, str] | None) -> list[int]:
+        """Indexes of the shards to run: all of them, or those *leases* cover."""
+        if leases is None:
+            return list(range(self.n_shards))
+        return sorted(i for i in leases if i < self.n_shards)
+
+    def _sweep_shards(
+        self, symbols: list[str] | None, t0: float, leases: Mapping[int, str] | None
+    ) -> dict[str, Any]:
+        held = self._held(leases)
+        if symbols is None:
+            futures = [self._shards[i].process_price_ticks(leases=leases) for i in held]
+        else:
+            groups: dict[int, list[str]] = defaultdict(list)
+            for s in symbols:
+                groups[shard_of(s, self.n_shards)].append(s)
+            futures = [
+                self._shards[i].process_price_ticks(groups[i], leases=leases)
+                for i in held
+                if i in groups
+            ]
+        results = pykka.get_all(futures)
+        per_symbol: dict[str, dict[str, float]] = {}
+        for r in results:
+            per_symbol.update(r["per_symbol"])
+        return {
+            "symbols": sum(r["symbols"] for r in results),
+            "fills": sum(r["fills"] for r in results),
+            "ms": (time.perf_counter() - t0) * 1000,
+            "per_symbol": per_symbol,
+        }
 
     def prune_orders_older_than(
         self,
@@ -810,17 +1438,21 @@ class ExchangeEngineActor(_BaseActor):
         Prune orders that are older than the specified age.
         This removes orders that are in CLOSED_STATUS and older than the specified age.
         Returns the number of orders removed.
+
+        The per-status time indexes return only the candidates below the
+        cutoff, so a run touches just the orders it deletes.
         """
         now_ms = int(time.time() * 1000)
         cutoff = now_ms - int(age.total_seconds() * 1000)
         removed = 0
         for s in CLOSED_STATUS:
-            for o in self.order_book.list(status=s).get():
-                if o.status in CLOSED_STATUS:
-                    ts = o.ts_finish
-                    if ts < cutoff:
-                        self.order_book.remove(o.id)
-                        removed += 1
+            stale = [
+                o.id
+                for o in self.order_book.list(status=s, until=cutoff - 1).get()
+                if o.status in CLOSED_STATUS and o.ts_finish is not None and o.ts_finish < cutoff
+            ]
+            if stale:
+                removed += self.order_book.remove_many(stale).get()
         if removed:
             logger.info("Pruned %d stale orders older than %s", removed, age)
         else:
@@ -831,17 +1463,34 @@ class ExchangeEngineActor(_BaseActor):
         self,
         *,
         age: timedelta,
+        leases: Mapping[int, str] | None = None,
     ) -> int:
         """
         Expire open orders that are older than the specified age.
+        With *leases* (shard → fencing token) only the shards held are expired.
         """
+        if self._shards:
+            return sum(
+                pykka.get_all(
+                    [
+                        self._shards[i].expire_orders_older_than(age=age, leases=leases)
+                        for i in self._held(leases)
+                    ]
+                )
+            )
+        if leases is not None and self.index not in leases:
+            return 0
+        with self._fenced(leases):
+            return self._expire(age)
+
+    def _expire(self, age: timedelta) -> int:
         now_ms = int(time.time() * 1000)
         cutoff = now_ms - int(age.total_seconds() * 1000)
         expired = 0
         comment = "Order expired due to inactivity"
         for s in OPEN_STATUS:
             for o in self.order_book.list(status=s).get():
-                if o.status in OPEN_STATUS:
+                if o.status in OPEN_STATUS and self._owns(o.symbol):
                     if o.status is OrderState.NEW:
                         expired_status = OrderState.EXPIRED
                     else:
@@ -849,12 +1498,13 @@ class ExchangeEngineActor(_BaseActor):
                     base, quote = o.symbol.split("/")
                     ts = o.ts_update
                     if ts < cutoff:
-                        # release leftovers
+                        # release leftovers and close the order in one batch
+                        batch = self._atomic()
                         if o.side is OrderSide.BUY:
-                            self._release(quote, o.residual_quote)
+                            batch.release(quote, o.residual_quote)
                         else:
-                            self._release(base, o.residual_base)
-                            self._release(quote, o.residual_quote)
+                            batch.release(base, o.residual_base)
+                            batch.release(quote, o.residual_quote)
                         o.status = expired_status
                         o.ts_update = o.ts_finish = now_ms
                         o.reserved_notion_left = 0.0
@@ -865,7 +1515,12 @@ class ExchangeEngineActor(_BaseActor):
                             status=expired_status,
                             comment=comment,
                         )
-                        self.order_book.update(o)
+                        self._order_store.update(o, pipe=batch)
+                        try:
+                            batch.execute()
+                        except WriteConflict:
+                            # filled, canceled or expired elsewhere meanwhile
+                            continue
                         self._log_order(o)
                         expired += 1
         if expired:
@@ -885,17 +1540,8 @@ class ExchangeEngineActor(_BaseActor):
         """
         px = price or self.market.last_price(symbol).get()
         base, quote = symbol.split("/")
-        fee = amount * px * self.commission
-        if side is OrderSide.BUY:
-            have = self.portfolio.get(quote).get().free
-            need = amount * px + fee
-            ok = have >= need
-            reason = None if ok else f"need {need:.2f} {quote}, have {have:.2f}"
-        else:  # sell
-            have = self.portfolio.get(base).get().free
-            ok = have >= amount
-            reason = None if ok else f"need {amount:.8f} {base}, have {have:.8f}"
-        return {"ok": ok, "reason": reason}
+        have = self.portfolio.get(quote if side is OrderSide.BUY else base).get().free
+        return self._can_execute(symbol, side, amount, px, have)
 
     # ----- overview helpers --------------------------------------------- #
 
@@ -914,168 +1560,18 @@ class ExchangeEngineActor(_BaseActor):
         assetslist = [t.split("/")[0] for t in trading_pairs]
         return assetslist, trading_pairs
 
-    def _get_assetslist_and_tickerslist_from_portfolio(
-        self, portfolio: Mapping[str, Any]
-    ) -> tuple[list[str], list[str]]:
-        """Get a list of assets and their tickers from the portfolio.
-        This function extracts the assets from the portfolio, EXCLUDING the cash asset.
-        It returns a tuple of two lists: the first list contains the asset names,
-        the second list contains the asset tickers.
-        """
-        assets_list = [a for a in portfolio.keys() if a != self.cash_asset]
-        tickers_list = [f"{a}/{self.cash_asset}" for a in assets_list]
-        if not assets_list:
-            logger.warning("No assets found in portfolio, returning empty lists")
-            return ([], [])
-        return (assets_list, tickers_list)
-
-    def _get_summary_assets_balance(
-        self, portfolio: Mapping[str, Mapping[str, float]], prices: Mapping[str, float]
-    ) -> dict[str, float]:
-        """Get a summary of the assets in the portfolio.
-        This function calculates the total value of all assets in the portfolio.
-        It returns a dict with the total value of each asset, including cash.
-        The values are calculated based on the prices of the assets in the portfolio.
-        If there are no assets in the portfolio, it returns a dict with all values set to 0.0.
-        """
-        _assets = {}
-        assets_list, tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(portfolio)
-        cash_balance = portfolio.get(self.cash_asset)
-        if cash_balance is None:
-            cash = {"free": 0.0, "used": 0.0}
-        else:
-            # cash_balance is a dict from AssetBalance.to_dict()
-            cash = {
-                "free": cash_balance.get("free", 0.0),
-                "used": cash_balance.get("used", 0.0),
-            }
-        for a, t in zip(assets_list, tickers_list, strict=False):
-            asset_balance = {}
-            if a == self.cash_asset:
-                continue
-            if prices.get(t) is None:
-                logger.warning("No price for asset %s, skipping", t)
-                continue
-            # portfolio[a] is a dict from AssetBalance.to_dict()
-            asset_balance["free"] = portfolio[a].get("free", 0.0)
-            asset_balance["used"] = portfolio[a].get("used", 0.0)
-            asset_balance["price"] = prices[t]
-            _assets[a] = asset_balance
-        # Convert to pandas to vector operations
-        assets_pd = pd.DataFrame(_assets).T
-        # If there are no assets, return a dict with all values set to 0.0
-        if assets_pd.empty:
-            _tmp_assets_dict = {
-                "assets_free_value": 0.0,
-                "assets_frozen_value": 0.0,
-                "assets_total_value": 0.0,
-            }
-            assets_pd_summary = pd.Series(_tmp_assets_dict)
-        else:
-            assets_pd["assets_free_value"] = assets_pd["free"] * assets_pd["price"]
-            assets_pd["assets_frozen_value"] = assets_pd["used"] * assets_pd["price"]
-            assets_pd["assets_total_value"] = (
-                assets_pd["assets_free_value"] + assets_pd["assets_frozen_value"]
-            )
-            assets_pd.drop(columns=["free", "used", "price"], inplace=True)
-            assets_pd_summary = assets_pd.sum(numeric_only=True)
-        balance_value = assets_pd_summary.to_dict()
-        balance_value["cash_free_value"] = cash.get("free", 0.0)
-        balance_value["cash_frozen_value"] = cash.get("used", 0.0)
-        balance_value["cash_total_value"] = (
-            balance_value["cash_free_value"] + balance_value["cash_frozen_value"]
-        )
-        balance_value["total_free_value"] = (
-            balance_value["cash_free_value"] + balance_value["assets_free_value"]
-        )
-        balance_value["total_frozen_value"] = (
-            balance_value["cash_frozen_value"] + balance_value["assets_frozen_value"]
-        )
-        balance_value["total_equity"] = (
-            balance_value["cash_total_value"] + balance_value["assets_total_value"]
-        )
-        return balance_value
-
-    def _get_summary_assets_orders(
-        self, open_orders: list[Order], prices: dict[str, float]
-    ) -> dict[str, float]:
-        """Get a summary of the frozen assets in open orders.
-        This function calculates the total value of reserved assets and fees in open orders.
-        It returns a dict with the total reserved value of assets and quotes, and the total frozen value.
-        The values are calculated based on the prices of the assets in the open orders.
-        If there are no open orders, it returns a dict with all values set to 0.0.
-        """
-        RELEVANT_COLS = [
-            "symbol",
-            "side",
-            "amount",
-            "actual_filled",
-            "reserved_notion_left",
-            "reserved_fee_left",
-        ]
-        if not open_orders:
-            return {
-                "assets_frozen_value": 0.0,
-                "cash_frozen_value": 0.0,
-                "total_frozen_value": 0.0,
-            }
-        open_orders_pd = pd.DataFrame([o.to_dict() for o in open_orders])
-        open_orders_pd = open_orders_pd[RELEVANT_COLS]
-        open_orders_pd["price"] = open_orders_pd["symbol"].map(prices)  # type: ignore[attr-defined]
-        # We need to calculate the reserved assets, but this only makes sense for SELL orders.
-        open_orders_pd["assets_frozen_value"] = 0.0
-        open_orders_pd.loc[open_orders_pd["side"] == OrderSide.SELL, "assets_frozen_value"] = (
-            open_orders_pd["amount"] - open_orders_pd["actual_filled"]
-        ) * open_orders_pd["price"]
-        open_orders_pd["cash_frozen_value"] = (
-            open_orders_pd["reserved_notion_left"] + open_orders_pd["reserved_fee_left"]
-        )
-        open_orders_pd = open_orders_pd[["assets_frozen_value", "cash_frozen_value"]]
-        open_orders_pd_summary = open_orders_pd.sum(numeric_only=True)  # type: ignore[attr-defined]
-        orders_frozen_value = open_orders_pd_summary.to_dict()
-        orders_frozen_value["total_frozen_value"] = (
-            orders_frozen_value["assets_frozen_value"] + orders_frozen_value["cash_frozen_value"]
-        )
-        return orders_frozen_value  # type: ignore[dict-item,unused-ignore]
-
     def get_summary_assets(self) -> dict[str, Any]:
         """
         Get a summary of all value assets in the portfolio and frozen assets in open orders.
         """
         # To be sure that we have the same price on both balance and orders, we want to fetch the latest prices
         # only once. Therefore, we need to prepare the portfolio and orders first.
-        # Portfolio data:
         portfolio = self.fetch_balance()
-        tickers_list_portfolio = self._get_assetslist_and_tickerslist_from_portfolio(portfolio)[1]
-        # Get open orders and their tickers
         open_orders = self.order_book.list(status=OPEN_STATUS, include_history=False).get()
-        tickers_list_orders = [o.symbol for o in open_orders]
-        # My expectation is that all open orders tickers are also in the portfolio,
-        # but I am not sure if this is always the case.
-        tickers_list = list(set(tickers_list_portfolio + tickers_list_orders))
+        tickers_list = self._summary_assets_tickers(portfolio, open_orders)
         # Now we can fetch the prices for all tickers
         prices = {t: self.market.last_price(t).get() for t in tickers_list}
-        output = {}
-        output["balance_source"] = self._get_summary_assets_balance(portfolio, prices)
-        output["orders_source"] = self._get_summary_assets_orders(open_orders, prices)
-        b_source = output["balance_source"]
-        o_source = output["orders_source"]
-        # Check for mismatches between balance and orders
-        _mismatch = {}
-        TOLERANCE = 1e-3  # in cash value units (e.g. 0.001 USDT)
-        for k in o_source.keys():
-            o_val = o_source[k]
-            b_val = b_source.get(k, 0.0)
-            if math.isclose(o_val, b_val, rel_tol=0.0, abs_tol=TOLERANCE):  # type: ignore[arg-type,unused-ignore]
-                _mismatch[k] = False
-            else:
-                _mismatch[k] = True
-
-        output["misc"] = {  # type: ignore[dict-item]
-            "cash_asset": self.cash_asset,
-            "mismatch": _mismatch,
-        }
-        return output  # type: ignore[return-value]
+        return self._summary_assets(portfolio, open_orders, prices)
 
     def get_trade_stats(
         self,
@@ -1097,11 +1593,7 @@ class ExchangeEngineActor(_BaseActor):
         asset  – return only fields whose *name* equals that asset
         """
         # 1️⃣ normalise input ----------------------------------------------------
-        if isinstance(side, str):
-            side = OrderSide(side)
-
-        if isinstance(assets, str):
-            assets = [assets]
+        wanted_sides, assets = self._trade_filters(side, assets)
 
         # helper ────────────────────────────────────────────────────────────────
         def _collect(metric: str, _side: OrderSide, _assets: list[str] | None) -> dict[str, float]:
@@ -1109,23 +1601,17 @@ class ExchangeEngineActor(_BaseActor):
             Gather all hashes whose key matches:
                 trades:<_side>:*:<metric>
             """
-            index_key = f"trades:index:{metric}"
-            keys = [k for k in self.redis.smembers(index_key) if k.split(":")[1] == _side.value]
-
+            wanted = self._trade_stat_keys(
+                self.redis.smembers(TRADES_INDEX[metric]), _side, _assets
+            )
             pipe = self.redis.pipeline()
-            base_list = []
-            for k in keys:
-                base = k.split(":")[2]
-                if _assets and base not in _assets:
-                    continue
-                base_list.append(base)
+            for _, k in wanted:
                 pipe.hgetall(k)
-            raw = pipe.execute() if keys else []
-            raw_dict = {base: r for base, r in zip(base_list, raw, strict=False) if r}
+            raw = pipe.execute() if wanted else []
+            raw_dict = {base: r for (base, _), r in zip(wanted, raw, strict=True) if r}
             return raw_dict  # type: ignore[dict-item,unused-ignore]
 
         # 2️⃣ build the response -------------------------------------------------
-        wanted_sides = [side] if side else (OrderSide.BUY, OrderSide.SELL)
         out: dict[str, Any] = {}
         for s in wanted_sides:
             out[s.value.upper()] = {
@@ -1149,21 +1635,9 @@ class ExchangeEngineActor(_BaseActor):
             A list of asset names that have either a deposit or withdrawal account.
             If no assets have a deposit or withdrawal account, it returns an empty list.
         """
-        assets = set()
-        hash_deposits = self.redis.smembers(DEPOSITS_INDEX)
-        hash_withdrawals = self.redis.smembers(WITHDRAWALS_INDEX)
-        if hash_deposits:
-            for key in hash_deposits:
-                asset = key.split(":")[1]
-                assets.add(asset)
-        if hash_withdrawals:
-            for key in hash_withdrawals:
-                asset = key.split(":")[1]
-                assets.add(asset)
-        # If no assets found, return empty list
-        if not assets:
-            return []
-        return list(assets)
+        return self._investment_assets(
+            self.redis.smembers(DEPOSITS_INDEX), self.redis.smembers(WITHDRAWALS_INDEX)
+        )
 
     def _get_investment_asset(self, asset: str) -> dict[str, Any]:
         """
@@ -1185,8 +1659,7 @@ class ExchangeEngineActor(_BaseActor):
         If the asset does not have a deposit or withdrawal account, the corresponding value will be an empty dict.
         If the asset does not exist, it will return empty dicts for both accounts.
         """
-        FLOAT_KEYS = ("asset_quantity", "ref_value")
-        fmt_investment = lambda d: {k: float(v) if k in FLOAT_KEYS else v for k, v in d.items()}
+        fmt_investment = self._fmt_investment
         deposit_key = f"deposits:{asset}"
         withdrawal_key = f"withdrawals:{asset}"
         output = {}
@@ -1212,48 +1685,14 @@ class ExchangeEngineActor(_BaseActor):
         # BALANCE ----------------------------------------------------
         balance = self.fetch_balance()
         # Get the prices for all assets in the portfolio
-        assets_list, tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(balance)
+        tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(balance)[1]
         prices = {t: self.market.last_price(t).get() for t in tickers_list}
-        for a, t in zip(assets_list, tickers_list, strict=False):
-            _price = prices.get(t)
-            balance[a]["price"] = _price
-            balance[a]["value"] = _price * balance[a]["total"]
-        if balance.get(self.cash_asset) is not None:
-            balance[self.cash_asset]["price"] = 1.0  # cash asset is always 1.0
-            balance[self.cash_asset]["value"] = balance[self.cash_asset]["total"]
         # INVESTMENT ASSETS ----------------------------------------
         investment_accounts = {}
         # We will also use this to get the deposit and withdrawal accounts for each asset.
         for asset in self._get_investment_assets_list():
             investment_accounts[asset] = self._get_investment_asset(asset)
-        # AGGREGATION ----------------------------------------
-        # If aggregation is requested, we will aggregate the investment accounts
-        # by summing up the free and used amounts for each asset.
-        # This will give us a total capital in the portfolio.
-        if aggregation:
-            # Aggregate the investment accounts
-            equity = 0.0
-            deposits = 0.0
-            withdrawals = 0.0
-            for b in balance.values():
-                equity += b["value"]
-            for invest in investment_accounts.values():
-                deposits += invest.get("deposits", {}).get("ref_value", 0.0)  # type: ignore[union-attr,call-overload]
-                withdrawals += invest.get("withdrawals", {}).get("ref_value", 0.0)  # type: ignore[union-attr,call-overload]
-            # Prepare the output
-            output = {
-                "equity": equity,
-                "deposits": deposits,
-                "withdrawals": withdrawals,
-                "profit_loss": equity - (deposits - withdrawals),
-            }
-            return output
-        else:
-            # If aggregation is not requested, we will return the balance and investment accounts as is
-            return {
-                "balance": balance,
-                "investment_assets": investment_accounts,
-            }
+        return self._summary_capital(balance, prices, investment_accounts, aggregation)
 
     # ----- admin helpers ---------------------------------------------------- #
     def set_balance(self, asset: str, *, free: float = 0.0, used: float = 0.0) -> dict[str, float]:
@@ -1320,9 +1759,7 @@ class ExchangeEngineActor(_BaseActor):
         # Check if the amount is valid
         if amount <= 0:
             raise ValueError("Amount must be > 0")
-        bal = self.portfolio.get(asset).get()  # type: ignore[union-attr,no-any-return]
-        bal.free += amount
-        self.portfolio.set(bal)
+        bal = self.portfolio.apply_deltas({asset: (amount, 0.0)}).get()[asset.upper()]
         self._update_deposit_account(asset, amount)
         # Return the updated balance
         return bal.to_dict()  # type: ignore[no-any-return,unused-ignore]
@@ -1354,21 +1791,17 @@ class ExchangeEngineActor(_BaseActor):
             tradeable_assets = self._get_tradeable_assetslist_tickerslist_from_current_market()[0]
             if asset not in tradeable_assets:
                 raise ValueError(f"Asset {asset} unknown or not tradeable")
-        # Try to get the balance of the asset
-        # If the asset does not exist, create a temporal new balance with 0.0
-        try:
-            bal = self.portfolio.get(asset).get()  # type: ignore[union-attr,no-any-return]
-        except KeyError:
-            bal = AssetBalance(asset, 0.0, 0.0)
         # Check if the amount is valid and if there is enough balance
         if amount <= 0:
             raise ValueError("Amount must be > 0")
-        if bal.free < amount:
+        # check and debit in one script call, so concurrent withdrawals cannot overdraw
+        try:
+            self._atomic().debit(asset.upper(), amount).execute()
+        except InsufficientFunds as e:
             raise ValueError(
-                f"Insufficient balance: {bal.free} {asset}, requested {amount} {asset}"
-            )
-        bal.free -= amount
-        self.portfolio.set(bal)
+                f"Insufficient balance: {e.have} {asset}, requested {amount} {asset}"
+            ) from e
+        bal = self._portfolio_store.get(asset)
         self._update_withdrawal_account(asset, amount)
         # Return the updated balance
         return bal.to_dict()  # type: ignore[no-any-return,unused-ignore]
@@ -1448,10 +1881,8 @@ class ExchangeEngineActor(_BaseActor):
     def reset(self) -> None:
         self.portfolio.clear()
         self.order_book.clear()
-        # cancel and drain timers
-        for t in self._timers:
-            t.cancel()
-        self._timers.clear()
+        # drop pending settlements
+        self.redis.delete(SETTLE_DUE_KEY)
         self._oid = itertools.count(1)
         INDEX_SETS = (
             TRADES_INDEX_COUNT,
@@ -1464,48 +1895,204 @@ class ExchangeEngineActor(_BaseActor):
         # Reset all hash keys in the index sets
         self._reset_hash_keys(index_set=list(INDEX_SETS))  # type: ignore[arg-type,unused-ignore]
 
+    # ---------- delayed market settlement ----------------------------- #
+    def _schedule_unsettled(self) -> int:
+        """
+        Queue open market orders that have no pending settlement, e.g. orders
+        accepted by a version that still used in-process timers. Due now.
+        """
+        orders = [
+            o for o in self.order_book.list(status=OPEN_STATUS).get() if o.type is OrderType.MARKET
+        ]
+        if not orders:
+            return 0
+        now = int(time.time() * 1000)
+        return self.redis.zadd(SETTLE_DUE_KEY, {o.id: now for o in orders}, nx=True)
+
+    def settle_due(self, limit: int = SETTLE_BATCH) -> dict[str, Any]:
+        """
+        Settle up to *limit* market orders whose due time has passed.
+        Entries are claimed with ZREM first, so several engine processes can
+        drain the same queue without settling an order twice. Orders and
+        tickers are loaded in bulk (one HMGET, one pipeline).
+
+        Returns ``{"settled", "fills", "next_due"}`` – ``next_due`` is the
+        earliest remaining due time in ms, or ``None`` if the queue is empty.
+        With shards the claimed orders are handed to their shards without
+        waiting, so ``settled`` counts the hand-offs and ``fills`` is ``None``.
+        """
+        now = int(time.time() * 1000)
+        oids = self.redis.zrangebyscore(SETTLE_DUE_KEY, "-inf", now, start=0, num=limit)
+        claimed: list[str] = []
+        if oids:
+            pipe = self.redis.pipeline(transaction=False)
+            for oid in oids:
+                pipe.zrem(SETTLE_DUE_KEY, oid)
+            claimed = [oid for oid, n in zip(oids, pipe.execute(), strict=True) if n]
+        if self._shards:
+            # an entry lost here (shard error, crash) is still filled by the tick loop
+            orders = [o for o in self._order_store.get_many(claimed) if o.status in OPEN_STATUS]
+            for i, group in self._by_shard(orders).items():
+                self._shards[i].settle_orders(group)
+            stats: dict[str, Any] = {"settled": len(orders), "fills": None}
+        else:
+            stats = self.settle_orders(claimed)
+        head = self.redis.zrange(SETTLE_DUE_KEY, 0, 0, withscores=True)
+        return {**stats, "next_due": int(head[0][1]) if head else None}
+
+    def settle_orders(self, oids: list[str]) -> dict[str, Any]:
+        """Settle the claimed market orders *oids* (loaded in bulk, closed ones skipped)."""
+        orders = self.order_book.get_many(oids).get() if oids else []
+        orders = [o for o in orders if o.status in OPEN_STATUS]
+        if len(orders) < len(oids):
+            logger.debug("%d settlements skipped (order gone or closed)", len(oids) - len(orders))
+        tickers = self.market.fetch_tickers(sorted({o.symbol for o in orders})).get()
+        fills = 0
+        with write_batch(self.redis):
+            for o in orders:
+                trading_pair = tickers.get(o.symbol)
+                if trading_pair is None:
+                    logger.warning(
+                        "Ticker %s missing; settlement of %s left to tick loop", o.symbol, o.id
+                    )
+                    continue
+                fills += self.process_single_order(o, trading_pair, refresh=False)
+        return {"settled": len(orders), "fills": fills}
+
+    def _settle_scheduler(self) -> None:
+        """
+        Runs in its own thread: asks the actor to drain due settlements, then
+        sleeps until the next due time (or ``SETTLE_POLL_SEC``, to pick up
+        entries queued by other processes). New market orders wake it early.
+        """
+        while not self._settle_stop.is_set():
+            self._settle_wake.clear()
+            try:
+                stats = self.actor_ref.ask({"cmd": "_settle_due"}, block=True)
+            except pykka.ActorDeadError:
+                return
+            except Exception as e:
+                logger.exception("Error draining settle queue: %s", e)
+                stats = {"next_due": None}
+            wait = SETTLE_POLL_SEC
+            if stats["next_due"] is not None:
+                wait = min(wait, max(0.0, stats["next_due"] / 1000 - time.time()))
+            self._settle_wake.wait(wait)
+
+    def _migrate_codec(self) -> None:
+        """
+        Runs in its own thread: re-encode order blobs written with another
+        codec. Readers accept every format, so nothing waits for it.
+        """
+        try:
+            self._order_store.ensure_codec(stop=self._codec_stop)
+        except Exception as e:
+            logger.exception("Order codec migration failed: %s", e)
+
     # ---------- message handler & lifecycle --------------------------- #
-    def on_receive(self, msg: Any) -> None:
+    def on_start(self) -> None:
+        """
+        Resume pending settlements (they live in Valkey), start the scheduler
+        and, if needed, the background codec migration.
+        """
+        self._schedule_unsettled()
+        if self.n_shards > 1:
+            self._shards = [
+                MatchingShardActor.start(
+                    redis_url=self.redis_url,
+                    commission=self.commission,
+                    cash_asset=self.cash_asset,
+                    index=i,
+                    shards=self.n_shards,
+                ).proxy()
+                for i in range(self.n_shards)
+            ]
+        self._settle_thread = threading.Thread(
+            target=self._settle_scheduler, name="settle-scheduler", daemon=True
+        )
+        self._settle_thread.start()
+        if not self._order_store.codec_migrated():
+            threading.Thread(target=self._migrate_codec, name="codec-migrator", daemon=True).start()
+
+    def on_receive(self, msg: Any) -> Any:
         """
         Handle incoming messages.
         This method processes commands sent to the actor.
         """
-        if msg.get("cmd") == "_settle_market":
-            oid = msg["oid"]
-            try:
-                o = self.order_book.get(oid).get()
-            except KeyError:
-                logger.warning("Order %s vanished before settle; ignoring", oid)
-                return
-            if o.status not in OPEN_STATUS or o.actual_filled >= o.amount - 1e-12:
-                return
-            trading_pair = self.fetch_ticker(o.symbol)
-            self.process_single_order(o, trading_pair)
+        if msg.get("cmd") == "_settle_due":
+            return self.settle_due()
+        return None
 
     def on_stop(self) -> None:
         """
         Stop the actor and clean up resources.
         This method is called when the actor is stopped.
-        It cancels all pending timers and stops the market, portfolio, and order book actors.
+        It stops the settle scheduler (pending entries stay queued in Valkey)
+        and the market, portfolio, and order book actors.
         """
         logger.info("Stopping ExchangeEngineActor %s", self.actor_ref)
-        # stop all timers
-        self._timers.clear()
+        # stop the scheduler thread; it exits on its next wake-up
+        self._settle_stop.set()
+        self._settle_wake.set()
+        self._codec_stop.set()
+        for shard in self._shards:
+            shard.stop()
         # stop the market, portfolio, and order book actors
-        logger.info("Stopping market, portfolio, and order book actors")
-        # Note: we do not need to call `stop()` on the market, portfolio, and order_book actors,
-        # as they are already managed by the actor system.
-        # cancel pending timers
-        for t in self._timers:
-            t.cancel()
-        for a in (self.market, self.portfolio, self.order_book):
-            a.stop()
+        if not self.inline:
+            logger.info("Stopping market, portfolio, and order book actors")
+            for a in (self.market, self.portfolio, self.order_book):
+                a.stop()
+
+
+class MatchingShardActor(ExchangeEngineActor):
+    """
+    Matches the symbols with ``shard_of(symbol, shards) == index`` for an
+    :class:`ExchangeEngineActor` started with ``shards > 1``: tick sweeps,
+    market settlements, cancels, amends and expiry of those symbols' orders
+    run here, serialized per shard. Inline stores on its own connection
+    pool; migrations, the settle queue and the admission of new orders stay
+    with the engine.
+    """
+
+    def __init__(
+        self, *, redis_url: str, commission: float, cash_asset: str, index: int, shards: int
+    ):
+        self._init_state(redis_url, commission=commission, cash_asset=cash_asset, inline=True)
+        self.index, self.n_shards = index, shards
+        self._shards = []
+
+    def _owns(self, symbol: str) -> bool:
+        return shard_of(symbol, self.n_shards) == self.index
+
+    def active_symbols(self) -> list[str]:
+        return [s for s in super().active_symbols() if self._owns(s)]
+
+    def settle_orders(self, oids: list[str]) -> dict[str, Any]:
+        # called fire-and-forget by the engine: nobody reads the future
+        try:
+            return super().settle_orders(oids)
+        except Exception as e:
+            logger.exception("Shard %d failed to settle %d orders: %s", self.index, len(oids), e)
+            raise
+
+    def on_start(self) -> None:
+        pass
+
+    def on_stop(self) -> None:
+        logger.info("Stopping matching shard %d/%d", self.index, self.n_shards)
 
 
 # ---------- façade helper ---------------------------------------------- #
-def start_engine(redis_url: str, commission: float) -> pykka.ActorProxy:
+def start_engine(
+    redis_url: str, commission: float, *, inline: bool = False, shards: int = 1
+) -> pykka.ActorProxy:
     """
     Convenience for tests / server:
         engine = start_engine("redis://127.0.0.1:6379/0", commission=0.001)
+        engine = start_engine("memory://", commission=0.001, inline=True)  # no Valkey
+        engine = start_engine("sqlite:///engine.db", commission=0.001)  # persistent, no Valkey
+    The URL picks the storage backend, see :func:`core.storage.open_storage`.
     """
-    return ExchangeEngineActor.start(redis_url=redis_url, commission=commission).proxy()
+    return ExchangeEngineActor.start(
+        redis_url=redis_url, commission=commission, inline=inline, shards=shards
+    ).proxy()
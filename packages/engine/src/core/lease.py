@@ -0,0 +1,138 @@
+"""
+Per-shard leases with fencing tokens, so that several engine processes
+(uvicorn workers, replicas) split the background matching work between
+them instead of racing for one global leader lock.
+
+Lease ``i`` (``engine:lease:{i}``) covers matching shard ``i`` (see
+:func:`core.engine_actors.shard_of`). Its value is the holder's *fencing
+token*, drawn from ``INCR engine:lease:{i}:token`` on every takeover, so a
+new holder never reuses an old token. Every batch a sweep of shard ``i``
+writes carries ``fence(engine:lease:{i}, token)``
+(:meth:`core.atomic.AtomicBatch.fence`): a process that lost the lease –
+paused past the TTL, partitioned away – has its late writes rejected by
+Valkey instead of double-filling orders.
+
+Live processes heartbeat in the ``engine:workers`` sorted set; each keeps
+at most its fair share (``ceil(shards / workers)``) and hands back the
+rest, so leases spread out as replicas join and are picked up again within
+one TTL when a replica dies.
+"""
+
+# lease.py
+from __future__ import annotations
+
+import time
+import zlib
+
+from .logging_config import logger
+from .storage import Storage, script
+
+# renew when we hold it, take it when it is free, otherwise leave it
+ACQUIRE_LUA = """
+local cur = redis.call('GET', KEYS[1])
+if cur then
+  if cur == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return cur
+  end
+  return false
+end
+local token = tostring(redis.call('INCR', KEYS[2]))
+redis.call('SET', KEYS[1], token, 'PX', ARGV[2])
+return token
+"""
+
+
+@script(ACQUIRE_LUA)
+def _acquire_py(db: Storage, keys: list[str], argv: list[str]) -> str | None:
+    cur = db.get(keys[0])
+    if cur is not None:
+        if cur != argv[0]:
+            return None
+        db.pexpire(keys[0], int(argv[1]))
+        return cur
+    token = str(db.incr(keys[1]))
+    db.set(keys[0], token, px=int(argv[1]))
+    return token
+
+
+# delete the lease only while it still carries our token
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+@script(RELEASE_LUA)
+def _release_py(db: Storage, keys: list[str], argv: list[str]) -> int:
+    return db.delete(keys[0]) if db.get(keys[0]) == argv[0] else 0
+
+
+class ShardLeases:
+    """
+    The leases one process holds. Call :meth:`refresh` more often than
+    *ttl_ms* (the API does it on every tick loop) and pass :attr:`held` to
+    the engine's sweeps.
+    """
+
+    KEY = "engine:lease:{shard}"
+    TOKEN_KEY = "engine:lease:{shard}:token"
+    WORKERS_KEY = "engine:workers"
+
+    def __init__(self, conn: Storage, *, shards: int, owner: str, ttl_ms: int = 30_000):
+        if shards < 1:
+            raise ValueError("shards must be ≥ 1")
+        self.r = conn
+        self.shards = shards
+        self.owner = owner
+        self.ttl_ms = ttl_ms
+        self.held: dict[int, str] = {}  # shard -> fencing token
+        self._acquire = conn.register_script(ACQUIRE_LUA)
+        self._release = conn.register_script(RELEASE_LUA)
+        # every owner probes the free shards from a different starting point
+        start = zlib.crc32(owner.encode()) % shards
+        self._preference = [(start + k) % shards for k in range(shards)]
+
+    @classmethod
+    def key(cls, shard: int) -> str:
+        return cls.KEY.format(shard=shard)
+
+    def _workers(self) -> int:
+        """Heartbeat and return the number of live workers (including this one)."""
+        now = int(time.time() * 1000)
+        pipe = self.r.pipeline(transaction=False)
+        pipe.zadd(self.WORKERS_KEY, {self.owner: now})
+        pipe.zremrangebyscore(self.WORKERS_KEY, "-inf", now - self.ttl_ms)
+        pipe.zcard(self.WORKERS_KEY)
+        return max(int(pipe.execute()[2]), 1)
+
+    def refresh(self) -> dict[int, str]:
+        """
+        Renew the leases held, take free ones up to the fair share and give
+        back the excess. Returns (and stores in :attr:`held`) shard → token.
+        """
+        fair = -(-self.shards // self._workers())
+        held: dict[int, str] = {}
+        for shard in sorted(self.held) + [s for s in self._preference if s not in self.held]:
+            if len(held) >= fair:
+                break
+            token = self._acquire(
+                keys=[self.key(shard), self.TOKEN_KEY.format(shard=shard)],
+                args=[self.held.get(shard, ""), self.ttl_ms],
+            )
+            if token is not None:
+                held[shard] = token
+        for shard, token in self.held.items():
+            if shard not in held:
+                self._release(keys=[self.key(shard)], args=[token])
+        if held.keys() != self.held.keys():
+            logger.info("%s holds shard leases %s of %d", self.owner, sorted(held), self.shards)
+        self.held = held
+        return held
+
+    def release(self) -> None:
+        """Hand back every lease still held (shutdown) and leave the worker set."""
+        for shard, token in self.held.items():
+            self._release(keys=[self.key(shard)], args=[token])
+        self.held = {}
+        self.r.zrem(self.WORKERS_KEY, self.owner)
@@ -7,10 +7,9 @@ from __future__ import annotations
 import time
 from dataclasses import dataclass
 
-import redis
-
 from ._types import TradingPair
 from .logging_config import logger
+from .storage import Storage
 
 
 @dataclass
@@ -26,7 +25,7 @@ class Market:
     default to sensible fall-backs.
     """
 
-    conn: redis.Redis
+    conn: Storage
     root_key: str = "tickers:"
 
     # Public API ---------------------------------------------------------
@@ -62,7 +61,21 @@ class Market:
         :raises ValueError: if the ticker is malformed or missing mandatory fields.
         :raises RuntimeError: if the ticker cannot be parsed correctly.
         """
-        h = self.conn.hgetall(f"{self.root_key}{ticker}")
+        return self._parse(ticker, self.conn.hgetall(f"{self.root_key}{ticker}"))
+
+    def fetch_tickers(self, tickers: list[str]) -> dict[str, TradingPair | None]:
+        """
+        Batch :meth:`fetch_ticker` – every HGETALL goes out in one pipeline.
+        Missing or malformed tickers map to ``None``.
+        """
+        pipe = self.conn.pipeline(transaction=False)
+        for t in tickers:
+            pipe.hgetall(f"{self.root_key}{t}")
+        return {t: self._parse(t, h) for t, h in zip(tickers, pipe.execute(), strict=True)}
+
+    # Internal helpers ---------------------------------------------------
+    @staticmethod
+    def _parse(ticker: str, h: dict) -> TradingPair | None:
         if not h:
             return None  # ticker vanished – treat as absent
         try:
@@ -1,69 +1,485 @@
 """
 Redis-backed order book with secondary indexes:
 
-* Hash  : orders          (id → json blob)             – canonical store
+* Hash  : orders          (id → order blob)            – canonical store
+* List  : orders:hist:{id} (history entries)           – append-only order history
 * Set   : open:set        (ids)                        – every open order
 * Set   : open:{symbol}   (ids)                        – open orders per symbol
+* Set   : open:symbols    (symbols)                    – symbols with ≥ 1 open order
+* ZSet  : orders:ts       (id → ts_update)             – every order, by last update
+* ZSet  : orders:ts:status:{status}                    – same, one per status
+* ZSet  : orders:ts:sym:{symbol}                       – same, one per symbol
+* ZSet  : orders:ts:status:{status}:{symbol}           – same, per status × symbol
+* ZSet  : open:px:{symbol}:{side} (id → limit_price)  – open orders by limit price
+                                                         (market buy = +inf, sell = -inf)
+
+Closed orders are never updated again, so for them ``ts_update == ts_finish``
+and the status ZSETs double as finish-time indexes (pruning, history queries).
+
+The price index lets a tick range-query only the orders its bid/ask crosses.
+The time indexes let ``list(tail=N)`` and ``since``/``until`` ranges resolve
+with one ZREVRANGEBYSCORE + one HMGET instead of scanning the whole hash.
+
+History entries are RPUSHed to their own list as they happen, so a fill
+rewrites a small fixed-size order blob instead of the whole history, and
+history is only read when ``include_history=True``.
+
+Blobs and history entries are written by a pluggable codec (compact
+positional arrays by default, see :mod:`core.codec`); readers accept every
+format, and :meth:`OrderBook.migrate_codec` re-encodes older blobs online.
 """
 
 # orderbook.py
 from __future__ import annotations
 
-from collections.abc import Iterable
+import base64
+import builtins
+import json
+import math
+import threading
+from collections.abc import Iterable, Iterator, Mapping
 from typing import TypeAlias
 
 import redis
 
-from ._types import Order
-from .constants import OPEN_STATUS, OPEN_STATUS_STR, OrderSide, OrderState
+from ._types import Order, OrderHistory
+from .atomic import AtomicBatch
+from .codec import DEFAULT_CODEC, JsonCodec, is_compact
+from .constants import (
+    ALL_STATUS_STR,
+    OPEN_STATUS,
+    OPEN_STATUS_STR,
+    OrderSide,
+    OrderState,
+    OrderType,
+)
+from .logging_config import logger
+from .storage import Storage, script
+
+# Drop a symbol from the active set once its last open order is gone.
+# Runs inside the same MULTI as the SREM so no concurrent add can slip between.
+_RELEASE_SYMBOL_LUA = """
+if redis.call('SCARD', KEYS[1]) == 0 then
+    return redis.call('SREM', KEYS[2], ARGV[1])
+end
+return 0
+"""
+
+
+@script(_RELEASE_SYMBOL_LUA)
+def _release_symbol_py(db: Storage, keys: list[str], argv: list[str]) -> int:
+    return db.srem(keys[1], argv[0]) if db.scard(keys[0]) == 0 else 0
+
+
+# Compare-and-set rewrites for the codec migration: a blob is only replaced
+# if nobody wrote it since it was read. ARGV: (field, old, new) triples.
+_CAS_HSET_LUA = """
+local n = 0
+for i = 1, #ARGV, 3 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+        n = n + 1
+    end
+end
+return n
+"""
+
+
+@script(_CAS_HSET_LUA)
+def _cas_hset_py(db: Storage, keys: list[str], argv: list[str]) -> int:
+    n = 0
+    for field, old, new in zip(argv[::3], argv[1::3], argv[2::3], strict=True):
+        if db.hget(keys[0], field) == old:
+            db.hset(keys[0], field, new)
+            n += 1
+    return n
+
+
+# Same for list entries. ARGV: (key, index, old, new) quadruples.
+_CAS_LSET_LUA = """
+local n = 0
+for i = 1, #ARGV, 4 do
+    if redis.call('LINDEX', ARGV[i], ARGV[i + 1]) == ARGV[i + 2] then
+        redis.call('LSET', ARGV[i], ARGV[i + 1], ARGV[i + 3])
+        n = n + 1
+    end
+end
+return n
+"""
+
+
+@script(_CAS_LSET_LUA)
+def _cas_lset_py(db: Storage, keys: list[str], argv: list[str]) -> int:
+    n = 0
+    for i in range(0, len(argv), 4):
+        key, index, old, new = argv[i : i + 4]
+        if db.lindex(key, int(index)) == old:
+            db.lset(key, int(index), new)
+            n += 1
+    return n
+
 
 StatusArg: TypeAlias = str | OrderState  # one element
 SideArg: TypeAlias = str | OrderSide  # one element
 
 
-class OrderBook:
+def _raw(v: str | OrderState | OrderSide) -> str:
+    """Enum member → raw string value (plain strings pass through)."""
+    return v.value if isinstance(v, OrderState | OrderSide) else v
+
+
+class _OrderBookBase:
+    """
+    Key layout and the pure query helpers (filters, cursors, page decoding)
+    shared by :class:`OrderBook` and the asyncio reader
+    :class:`core.aio.AsyncOrderBook`. No I/O happens here.
+    """
+
     HASH_KEY = "orders"
+    HIST_KEY = "orders:hist:{oid}"  # .format(oid=order_id)
     OPEN_ALL_KEY = "open:set"
     OPEN_SYM_KEY = "open:{sym}"  # .format(sym=symbol)
+    OPEN_PX_KEY = "open:px:{sym}:{side}"  # .format(sym=symbol, side=raw_side)
+    ACTIVE_SYMBOLS_KEY = "open:symbols"
+    TS_ALL_KEY = "orders:ts"
+    TS_STATUS_KEY = "orders:ts:status:{status}"  # .format(status=raw_status)
+    TS_SYM_KEY = "orders:ts:sym:{sym}"  # .format(sym=symbol)
+    TS_STATUS_SYM_KEY = "orders:ts:status:{status}:{sym}"
+    INDEX_VERSION_KEY = "orders:index:version"
+    INDEX_VERSION = 4  # bump whenever the index layout changes
+    SCHEMA_VERSION_KEY = "orders:schema:version"
+    SCHEMA_VERSION = 2  # 2: history moved out of the order blob
+    CODEC_KEY = "orders:codec"  # name of the codec every blob is encoded with
+    SCAN_CHUNK = 500  # ids fetched per ZREVRANGEBYSCORE page
+
+    codec: JsonCodec
+
+    # ------------ filters ---------------------------------------------- #
+    @staticmethod
+    def _status_set(status: StatusArg | Iterable[StatusArg] | None) -> set[str]:
+        """Normalise `status` to a *set of raw-string values* (None → every status)."""
+        if status is None:
+            return {s.value for s in OrderState}
+        if isinstance(status, OrderState):
+            return {status.value}
+        if isinstance(status, str):
+            return {status}
+        if isinstance(status, Iterable):  # iterable of str | OrderState
+            return {s.value if isinstance(s, OrderState) else s for s in status}
+        return set()  # type: ignore[unreachable]  # fallback
+
+    @staticmethod
+    def _side_set(side: SideArg | Iterable[SideArg] | None) -> set[str] | None:
+        """Normalise `side` to a *set of raw-string values* (None → no filtering)."""
+        if side is None:
+            return None
+        if isinstance(side, OrderSide):
+            return {side.value}
+        if isinstance(side, str):
+            return {side}
+        if isinstance(side, Iterable):  # iterable of str | OrderSide
+            return {s.value if isinstance(s, OrderSide) else s for s in side}
+        raise TypeError(
+            f"side must be str | OrderSide | Iterable[str|OrderSide] | None, got {type(side)!r}"
+        )
+
+    @classmethod
+    def _time_key(cls, status: set[str], symbol: str | None) -> str:
+        """The narrowest ``ts_update`` ZSET covering *status* × *symbol*."""
+        if len(status) == 1 and symbol:
+            return cls.TS_STATUS_SYM_KEY.format(status=next(iter(status)), sym=symbol)
+        if len(status) == 1:
+            return cls.TS_STATUS_KEY.format(status=next(iter(status)))
+        if symbol:
+            return cls.TS_SYM_KEY.format(sym=symbol)
+        return cls.TS_ALL_KEY
+
+    @staticmethod
+    def _matches(o: Order, status: set[str], symbol: str | None, side_set: set[str] | None) -> bool:
+        """Filters the time index cannot express, applied on decoded orders."""
+        if _raw(o.status) not in status:
+            return False
+        if symbol and o.symbol != symbol:
+            return False
+        return side_set is None or _raw(o.side) in side_set
+
+    def _set_history(self, o: Order, raw: list[str]) -> None:
+        """Attach the history list *raw* (as read from ``HIST_KEY``) to *o*."""
+        o.history = {i: self.codec.decode_history(h) for i, h in enumerate(raw)}
+        if raw:
+            o.history_count = o._history_saved = len(raw)
+
+    def _resolve(
+        self, oids: list[str], blobs: list[str | None], hists: list[list[str]] | None
+    ) -> tuple[list[Order], list[str]]:
+        """Split an HMGET of *oids* into decoded orders and missing ids (see ``lookup``)."""
+        found: list[Order] = []
+        missing: list[str] = []
+        for i, (oid, blob) in enumerate(zip(oids, blobs, strict=True)):
+            if blob is None:
+                missing.append(oid)
+                continue
+            o = self.codec.decode_order(blob)
+            if hists is not None:
+                self._set_history(o, hists[i])
+            found.append(o)
+        return found, missing
+
+    def _filter_open(
+        self,
+        blobs: Iterable[str | None],
+        *,
+        status: set[str],
+        side_set: set[str] | None,
+        tail: int | None,
+        since: int | None,
+        until: int | None,
+    ) -> list[Order]:
+        """Decode blobs read through the open-order sets and apply the list filters."""
+        orders = [self.codec.decode_order(b) for b in blobs if b]
+        # Even when using indexes, re-filter by status to be robust to stale sets
+        orders = [o for o in orders if _raw(o.status) in status]
+
+        # Apply side filtering
+        if side_set is not None:
+            orders = [o for o in orders if _raw(o.side) in side_set]
+
+        # Apply time window
+        if since is not None:
+            orders = [o for o in orders if o.ts_update >= since]
+        if until is not None:
+            orders = [o for o in orders if o.ts_update <= until]
 
-    def __init__(self, conn: redis.Redis) -> None:
+        # chronological order on update timestamp
+        orders.sort(key=lambda o: o.ts_update, reverse=True)
+        if tail is not None and tail > 0:
+            orders = orders[:tail]
+        return orders
+
+    # ---------- streaming / pagination -------------------------------- #
+    @staticmethod
+    def encode_cursor(pos: tuple[float, int]) -> str:
+        """Opaque cursor for a position ``(ts_update, #ids already seen at it)``."""
+        score, skip = pos
+        return base64.urlsafe_b64encode(f"{score!r}:{skip}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[float, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            score, skip = raw.split(":")
+            return float(score), int(skip)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+    def _walk_start(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None,
+        symbol: str | None,
+        side: SideArg | None,
+        since: int | None,
+        until: int | None,
+        cursor: str | None,
+    ) -> tuple[str, float, tuple[float, int], set[str], set[str] | None]:
+        """``(index key, hi, start position, status set, side set)`` of a walk."""
+        status_set, side_set = self._status_set(status), self._side_set(side)
+        hi = math.inf if until is None else until
+        pos = (-math.inf if since is None else since, 0)
+        if cursor:
+            pos = self.decode_cursor(cursor)
+        return self._time_key(status_set, symbol), hi, pos, status_set, side_set
+
+    def _walk_step(
+        self,
+        page: list[tuple[str, float]],
+        blobs: list[str | None],
+        pos: tuple[float, int],
+        *,
+        status_set: set[str],
+        symbol: str | None,
+        side_set: set[str] | None,
+    ) -> tuple[list[tuple[Order, tuple[float, int]]], tuple[float, int]]:
+        """
+        Decode one ZRANGEBYSCORE page: the matching orders with the position
+        after each, and the position after the whole page. A position is the
+        score plus how many ids with that score were passed, so runs of equal
+        timestamps resume correctly.
+        """
+        lo, skip = pos
+        out: list[tuple[Order, tuple[float, int]]] = []
+        for (_, score), blob in zip(page, blobs, strict=True):
+            lo, skip = (lo, skip + 1) if score == lo else (score, 1)
+            if not blob:  # index ahead of a concurrent delete
+                continue
+            o = self.codec.decode_order(blob)
+            if self._matches(o, status_set, symbol, side_set):
+                out.append((o, (lo, skip)))
+        return out, (lo, skip)
+
+
+class OrderBook(_OrderBookBase):
+    def __init__(self, conn: Storage, *, codec: JsonCodec | None = None) -> None:
         self.r = conn
+        self.codec = codec or DEFAULT_CODEC
+        self._release_symbol = conn.register_script(_RELEASE_SYMBOL_LUA)
+        self._cas_hset = conn.register_script(_CAS_HSET_LUA)
+        self._cas_lset = conn.register_script(_CAS_LSET_LUA)
 
     # ------------ internal helpers ------------------------------------ #
-    def _index_add(self, order: Order) -> None:
-        """Add id to the open indexes (only if order is OPEN)."""
-        is_open = order.status in OPEN_STATUS or (
+    @staticmethod
+    def _is_open(order: Order) -> bool:
+        return order.status in OPEN_STATUS or (
             isinstance(order.status, str) and order.status in OPEN_STATUS_STR
         )
-        if not is_open:
-            # If the order is not open, we don't need to index it.
-            # This is important for performance, as we don't want to index
-            # orders that are already closed (filled, canceled, etc.).
-            # Only add to indexes if the order is open (new or partially filled)
+
+    @staticmethod
+    def _px_score(order: Order) -> float:
+        """Price-index score: market orders always cross, so they sit at ±inf."""
+        if _raw(order.type) == OrderType.MARKET.value or order.limit_price is None:
+            return math.inf if _raw(order.side) == OrderSide.BUY.value else -math.inf
+        return float(order.limit_price)
+
+    def _index_add(self, pipe: redis.client.Pipeline | AtomicBatch, order: Order) -> None:
+        """
+        Queue every index write for *order* in its current state.
+
+        The ts_update ZSETs follow the status, so a transition moves the id
+        out of the previous status' ZSETs; closed orders leave the open sets.
+        """
+        status = _raw(order.status)
+        sym = order.symbol
+        mapping = {order.id: order.ts_update}
+        pipe.zadd(self.TS_ALL_KEY, mapping)
+        pipe.zadd(self.TS_SYM_KEY.format(sym=sym), mapping)
+        pipe.zadd(self.TS_STATUS_KEY.format(status=status), mapping)
+        pipe.zadd(self.TS_STATUS_SYM_KEY.format(status=status, sym=sym), mapping)
+        for s in ALL_STATUS_STR - {status}:
+            pipe.zrem(self.TS_STATUS_KEY.format(status=s), order.id)
+            pipe.zrem(self.TS_STATUS_SYM_KEY.format(status=s, sym=sym), order.id)
+        px_key = self.OPEN_PX_KEY.format(sym=sym, side=_raw(order.side))
+        if self._is_open(order):
+            pipe.sadd(self.OPEN_ALL_KEY, order.id)
+            pipe.sadd(self.OPEN_SYM_KEY.format(sym=sym), order.id)
+            pipe.sadd(self.ACTIVE_SYMBOLS_KEY, sym)
+            pipe.zadd(px_key, {order.id: self._px_score(order)})
+        else:
+            pipe.srem(self.OPEN_ALL_KEY, order.id)
+            pipe.srem(self.OPEN_SYM_KEY.format(sym=sym), order.id)
+            pipe.zrem(px_key, order.id)
+            self._queue_release_symbol(pipe, sym)
+
+    def _queue_release_symbol(self, pipe: redis.client.Pipeline | AtomicBatch, sym: str) -> None:
+        open_key = self.OPEN_SYM_KEY.format(sym=sym)
+        if isinstance(pipe, AtomicBatch):  # already inside a script
+            pipe.srem_if_empty(open_key, self.ACTIVE_SYMBOLS_KEY, sym)
             return
-        self.r.sadd(self.OPEN_ALL_KEY, order.id)
-        self.r.sadd(self.OPEN_SYM_KEY.format(sym=order.symbol), order.id)
+        self._release_symbol(keys=[open_key, self.ACTIVE_SYMBOLS_KEY], args=[sym], client=pipe)
+
+    def _index_rem(self, pipe: redis.client.Pipeline | AtomicBatch, order: Order) -> None:
+        """Queue the removal of *order* from every index."""
+        status = _raw(order.status)
+        sym = order.symbol
+        pipe.srem(self.OPEN_ALL_KEY, order.id)
+        pipe.srem(self.OPEN_SYM_KEY.format(sym=sym), order.id)
+        pipe.zrem(self.OPEN_PX_KEY.format(sym=sym, side=_raw(order.side)), order.id)
+        self._queue_release_symbol(pipe, sym)
+        pipe.zrem(self.TS_ALL_KEY, order.id)
+        pipe.zrem(self.TS_SYM_KEY.format(sym=sym), order.id)
+        pipe.zrem(self.TS_STATUS_KEY.format(status=status), order.id)
+        pipe.zrem(self.TS_STATUS_SYM_KEY.format(status=status, sym=sym), order.id)
 
-    def _index_rem(self, order: Order) -> None:
-        """Remove id from the open indexes."""
-        self.r.srem(self.OPEN_ALL_KEY, order.id)
-        self.r.srem(self.OPEN_SYM_KEY.format(sym=order.symbol), order.id)
+    def _write(self, pipe: redis.client.Pipeline | AtomicBatch, order: Order, *, new: bool) -> None:
+        """Queue the order blob, its new history entries and its indexes."""
+        pipe.hset(self.HASH_KEY, order.id, self.codec.encode_order(order))
+        hist_key = self.HIST_KEY.format(oid=order.id)
+        if new:  # (re)write the whole list – a retried add must not duplicate entries
+            pipe.delete(hist_key)
+            entries = [order.history[i] for i in sorted(order.history)]
+        else:
+            entries = order.unsaved_history()
+        if entries:
+            pipe.rpush(hist_key, *(self.codec.encode_history(h) for h in entries))
+        order.mark_history_saved()
+        self._index_add(pipe, order)
+
+    def _attach_history(self, orders: list[Order]) -> None:
+        """Load the history lists of *orders* in one pipeline."""
+        if not orders:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        for o in orders:
+            pipe.lrange(self.HIST_KEY.format(oid=o.id), 0, -1)
+        for o, raw in zip(orders, pipe.execute(), strict=True):
+            self._set_history(o, raw)
 
     # ------------ CRUD ------------------------------------------------- #
-    def add(self, order: Order) -> None:
-        self.r.hset(self.HASH_KEY, order.id, order.to_json())
-        self._index_add(order)
+    def add(self, order: Order, *, pipe: AtomicBatch | None = None) -> None:
+        """
+        Store a new order with its indexes. With *pipe* (an :class:`AtomicBatch`)
+        the writes are only queued, to be applied by the caller's ``execute()``.
+        """
+        own = pipe is None
+        if pipe is None:
+            pipe = self.r.pipeline()
+        p = pipe
+        self._write(p, order, new=True)
+        if own:
+            p.execute()
 
-    def update(self, order: Order) -> None:
-        """Update an existing order."""
-        self.r.hset(self.HASH_KEY, order.id, order.to_json(include_history=True))
+    def update(self, order: Order, *, pipe: AtomicBatch | None = None) -> None:
+        """
+        Update an existing order and move it between indexes on status changes.
+        Only history entries added since the order was loaded are appended.
+        Inside an :class:`AtomicBatch` the update is a compare-and-set: the
+        batch fails with :class:`~core.atomic.WriteConflict` if another writer
+        appended history since *order* was loaded.
+        """
+        own = pipe is None
+        if pipe is None:
+            pipe = self.r.pipeline()
+        p = pipe
+        if isinstance(p, AtomicBatch):
+            p.expect_len(self.HIST_KEY.format(oid=order.id), order._history_saved)
+        self._write(p, order, new=False)
+        if own:
+            p.execute()
 
     def get(self, oid: str, *, include_history: bool = False) -> Order:
         blob = self.r.hget(self.HASH_KEY, oid)
         if blob is None:
             raise ValueError(f"Order {oid} not found")
-        else:
-            return Order.from_json(blob, include_history=include_history)
+        o = self.codec.decode_order(blob)
+        if include_history:
+            self._attach_history([o])
+        return o
+
+    def get_many(self, oids: Iterable[str]) -> list[Order]:
+        """Bulk :meth:`get` with one HMGET; unknown ids are skipped."""
+        oids = list(oids)
+        if not oids:
+            return []
+        return [self.codec.decode_order(blob) for blob in self.r.hmget(self.HASH_KEY, oids) if blob]
+
+    def lookup(
+        self, oids: Iterable[str], *, include_history: bool = False
+    ) -> tuple[list[Order], list[str]]:
+        """
+        Resolve *oids* in one round trip: the HMGET and, with
+        *include_history*, every history LRANGE share one pipeline.
+        Returns the orders found (request order, duplicates dropped) and the
+        ids that do not exist.
+        """
+        oids = list(dict.fromkeys(oids))
+        if not oids:
+            return [], []
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hmget(self.HASH_KEY, oids)
+        if include_history:
+            for oid in oids:
+                pipe.lrange(self.HIST_KEY.format(oid=oid), 0, -1)
+        blobs, *hists = pipe.execute()
+        return self._resolve(oids, blobs, hists if include_history else None)
 
     def list(
         self,
@@ -72,111 +488,389 @@ class OrderBook:
         symbol: str | None = None,
         side: SideArg | None = None,
         tail: int | None = None,
+        since: int | None = None,
+        until: int | None = None,
         include_history: bool = False,
     ) -> list[Order]:
         """
         List orders by status, symbol, side, and limit the tail size.
         Open orders are indexed by symbol, so they can be fetched quickly.
+        Everything else walks the ``ts_update`` ZSETs newest-first, so the
+        cost is bounded by ``tail`` (and the ``since``/``until`` window in ms)
+        rather than by the size of the ``orders`` hash.
         """
         orders: list[Order]
-        # ── normalise `status` to a *set of raw-string values* ───────────────
-        if status is None:
-            status = {s.value for s in OrderState}
-        elif isinstance(status, OrderState):
-            status = {status.value}
-        elif isinstance(status, str):
-            status = {status}
-        elif isinstance(status, Iterable):  # iterable of str | OrderState
-            status = {s.value if isinstance(s, OrderState) else s for s in status}
-        else:  # type: ignore[unreachable]
-            status = set()  # fallback
-        # ── normalise `side` to a *set of raw-string values* ────────────────
-        if side is None:
-            side_set = None  # means “no filtering”
-        elif isinstance(side, OrderSide):
-            side_set = {side.value}
-        elif isinstance(side, str):
-            side_set = {side}
-        elif isinstance(side, Iterable):  # iterable of str | OrderSide
-            side_set = {s.value if isinstance(s, OrderSide) else s for s in side}
-        else:
-            raise TypeError(
-                f"side must be str | OrderSide | Iterable[str|OrderSide] | None, got {type(side)!r}"
-            )
+        status = self._status_set(status)
+        side_set = self._side_set(side)
         # Use indexes only if caller asked exclusively for OPEN statuses and the set is non-empty
         use_indexes = bool(status) and all(s in OPEN_STATUS_STR for s in status)
-        if use_indexes:
-            # Use secondary indexes
-            if symbol:
-                ids = self.r.smembers(self.OPEN_SYM_KEY.format(sym=symbol))
-            else:
-                ids = self.r.smembers(self.OPEN_ALL_KEY)
-            if not ids:
-                return []
-            blobs = self.r.hmget(
-                self.HASH_KEY, *list(ids)
-            )  # 1 round-trip, convert to list for stable order
-            orders = [Order.from_json(b, include_history=include_history) for b in blobs if b]
-            # Even when using indexes, re-filter by status to be robust to stale sets
-            orders = [
-                o
-                for o in orders
-                if (o.status.value if isinstance(o.status, OrderState) else o.status) in status
-            ]
+        if not use_indexes:
+            orders = self._list_by_time(
+                status=status,
+                symbol=symbol,
+                side_set=side_set,
+                tail=tail,
+                since=since,
+                until=until,
+            )
+            if include_history:
+                self._attach_history(orders)
+            return orders
+        # Use secondary indexes
+        if symbol:
+            ids = self.r.smembers(self.OPEN_SYM_KEY.format(sym=symbol))
         else:
-            # Legacy full scan
-            orders = [
-                Order.from_json(blob, include_history=include_history)
-                for _, blob in self.r.hscan_iter(self.HASH_KEY)
-            ]
-            # Apply symbol filtering for legacy scan
-            if symbol:
-                orders = [o for o in orders if o.symbol == symbol]
+            ids = self.r.smembers(self.OPEN_ALL_KEY)
+        if not ids:
+            return []
+        blobs = self.r.hmget(
+            self.HASH_KEY, *list(ids)
+        )  # 1 round-trip, convert to list for stable order
+        orders = self._filter_open(
+            blobs, status=status, side_set=side_set, tail=tail, since=since, until=until
+        )
+        if include_history:
+            self._attach_history(orders)
+        return orders
 
-        # Apply side filtering
-        if side_set is not None:
-            orders = [
-                o
-                for o in orders
-                if (o.side.value if isinstance(o.side, OrderSide) else o.side) in side_set
-            ]
+    def active_symbols(self) -> builtins.list[str]:
+        """Symbols with at least one open order (maintained on open/close)."""
+        return sorted(self.r.smembers(self.ACTIVE_SYMBOLS_KEY))
 
-        # Apply status filtering (only for legacy scan, index already filters for OPEN_STATUS)
-        if not use_indexes:
-            orders = [
-                o
-                for o in orders
-                if (o.status.value if isinstance(o.status, OrderState) else o.status) in status
-            ]
+    def crossing(self, symbol: str, *, bid: float, ask: float) -> builtins.list[Order]:
+        """
+        Open orders of *symbol* whose limit is satisfied by the given quote:
+        buys with ``limit_price ≥ ask`` (best first) then sells with
+        ``limit_price ≤ bid`` (best first). Market orders always qualify.
+        One pipelined range query per side + one HMGET.
+        """
+        return self.crossing_many({symbol: (bid, ask)})[symbol]
 
-        # chronological order on update timestamp
-        orders.sort(key=lambda o: o.ts_update, reverse=True)
-        if tail is not None and tail > 0:
-            orders = orders[:tail]
+    def crossing_many(
+        self, quotes: Mapping[str, tuple[float, float]]
+    ) -> dict[str, builtins.list[Order]]:
+        """
+        :meth:`crossing` for many symbols at once (``{symbol: (bid, ask)}``):
+        every range query shares one pipeline and every candidate one HMGET.
+        """
+        pipe = self.r.pipeline(transaction=False)
+        for sym, (bid, ask) in quotes.items():
+            pipe.zrevrangebyscore(self.OPEN_PX_KEY.format(sym=sym, side="buy"), "+inf", ask)
+            pipe.zrangebyscore(self.OPEN_PX_KEY.format(sym=sym, side="sell"), "-inf", bid)
+        ranges = pipe.execute() if quotes else []
+        ids_by_sym = {sym: [*ranges[2 * i], *ranges[2 * i + 1]] for i, sym in enumerate(quotes)}
+        ids = [oid for sym_ids in ids_by_sym.values() for oid in sym_ids]
+        out: dict[str, list[Order]] = {sym: [] for sym in quotes}
+        if not ids:
+            return out
+        for blob in self.r.hmget(self.HASH_KEY, ids):
+            if not blob:
+                continue
+            o = self.codec.decode_order(blob)
+            if self._is_open(o) and o.symbol in out:
+                out[o.symbol].append(o)
+        return out
+
+    def _list_by_time(
+        self,
+        *,
+        status: set[str],
+        symbol: str | None,
+        side_set: set[str] | None,
+        tail: int | None,
+        since: int | None,
+        until: int | None,
+    ) -> builtins.list[Order]:
+        """
+        Walk the narrowest ``ts_update`` ZSET newest-first, one page at a time,
+        until ``tail`` matches are collected (or the window is exhausted).
+        Filters the index cannot express are applied on the decoded page.
+        """
+        key = self._time_key(status, symbol)
+        hi = "+inf" if until is None else until
+        lo = "-inf" if since is None else since
+        want = tail if tail is not None and tail > 0 else None
+        chunk = want or self.SCAN_CHUNK
+
+        orders: list[Order] = []
+        offset = 0
+        while True:
+            ids = self.r.zrevrangebyscore(key, hi, lo, start=offset, num=chunk)
+            if not ids:
+                break
+            offset += len(ids)
+            for blob in self.r.hmget(self.HASH_KEY, ids):
+                if not blob:  # index ahead of a concurrent delete
+                    continue
+                o = self.codec.decode_order(blob)
+                if not self._matches(o, status, symbol, side_set):
+                    continue
+                orders.append(o)
+                if want is not None and len(orders) >= want:
+                    return orders
+            if len(ids) < chunk:
+                break
         return orders
 
+    # ---------- streaming / pagination -------------------------------- #
+    def _walk(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None,
+        symbol: str | None,
+        side: SideArg | None,
+        since: int | None,
+        until: int | None,
+        cursor: str | None,
+        include_history: bool,
+        chunk: int,
+    ) -> Iterator[tuple[Order, tuple[float, int]]]:
+        """
+        Yield ``(order, position after it)`` oldest ``ts_update`` first, one
+        ZRANGEBYSCORE page + one HMGET at a time (see :meth:`_walk_step`).
+        """
+        key, hi, pos, status_set, side_set = self._walk_start(
+            status=status, symbol=symbol, side=side, since=since, until=until, cursor=cursor
+        )
+        while True:
+            lo, skip = pos
+            page = self.r.zrangebyscore(key, lo, hi, start=skip, num=chunk, withscores=True)
+            if not page:
+                return
+            blobs = self.r.hmget(self.HASH_KEY, [oid for oid, _ in page])
+            out, pos = self._walk_step(
+                page, blobs, pos, status_set=status_set, symbol=symbol, side_set=side_set
+            )
+            if include_history:
+                self._attach_history([o for o, _ in out])
+            yield from out
+            if len(page) < chunk:
+                return
+
+    def iter(
+        self,
+        *,
+        status: StatusArg | Iterable[StatusArg] | None = None,
+        symbol: str | None = None,
+        side: SideArg | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        cursor: str | None = None,
+        include_history: bool = False,
+        chunk: int | None = None,
+    ) -> Iterator[Order]:
+        """
+        Lazily yield every matching order, oldest ``ts_update`` first, with
+        at most *chunk* orders in memory. An order updated while the walk is
+        running moves to the end of the index, so it is yielded again with
+        its new state rather than missed.
+        """
+        for o, _ in self._walk(
+            status=status,
+            symbol=symbol,
+            side=side,
+            since=since,
+            until=until,
+            cursor=cursor,
+            include_history=include_history,
+            chunk=chunk or self.SCAN_CHUNK,
+        ):
+            yield o
+
+    def page(
+        self,
+        *,
+        limit: int,
+        cursor: str | None = None,
+        status: StatusArg | Iterable[StatusArg] | None = None,
+        symbol: str | None = None,
+        side: SideArg | None = None,
+        since: int | None = None,
+        until: int | None = None,
+        include_history: bool = False,
+    ) -> tuple[builtins.list[Order], str | None]:
+        """
+        Up to *limit* orders after *cursor* (same order as :meth:`iter`) and
+        the cursor to pass for the next page, or ``None`` once exhausted.
+        Callers must repeat the same filters with every cursor.
+        """
+        if limit < 1:
+            raise ValueError("limit must be ≥ 1")
+        orders: list[Order] = []
+        for o, pos in self._walk(
+            status=status,
+            symbol=symbol,
+            side=side,
+            since=since,
+            until=until,
+            cursor=cursor,
+            include_history=include_history,
+            chunk=min(max(limit, 1), self.SCAN_CHUNK),
+        ):
+            orders.append(o)
+            if len(orders) >= limit:
+                return orders, self.encode_cursor(pos)
+        return orders, None
+
     # ---------- hard delete ------------------------------------------ #
     def remove(self, oid: str) -> None:
         """Erase an order from storage and all indexes. Idempotent."""
         blob = self.r.hget(self.HASH_KEY, oid)
         if not blob:  # already gone
             return
-        o = Order.from_json(blob)
-        is_open = o.status in OPEN_STATUS or (
-            isinstance(o.status, str) and o.status in OPEN_STATUS_STR
-        )
-        if is_open:
-            self._index_rem(o)
+        o = self.codec.decode_order(blob)
         pipe = self.r.pipeline()
         pipe.hdel(self.HASH_KEY, oid)
+        pipe.delete(self.HIST_KEY.format(oid=oid))
+        self._index_rem(pipe, o)
         pipe.execute()
 
+    def remove_many(self, oids: Iterable[str]) -> int:
+        """Bulk :meth:`remove` – one HMGET + one pipeline per chunk. Returns #removed."""
+        oids = list(oids)
+        removed = 0
+        for i in range(0, len(oids), self.SCAN_CHUNK):
+            chunk = oids[i : i + self.SCAN_CHUNK]
+            pipe = self.r.pipeline()
+            for oid, blob in zip(chunk, self.r.hmget(self.HASH_KEY, chunk), strict=True):
+                if not blob:
+                    continue
+                pipe.hdel(self.HASH_KEY, oid)
+                pipe.delete(self.HIST_KEY.format(oid=oid))
+                self._index_rem(pipe, self.codec.decode_order(blob))
+                removed += 1
+            pipe.execute()
+        return removed
+
+    # ---------- index maintenance ------------------------------------ #
+    def _index_keys(self) -> builtins.list[str]:
+        keys = [self.OPEN_ALL_KEY]
+        for pattern in (self.OPEN_SYM_KEY.format(sym="*"), f"{self.TS_ALL_KEY}*"):
+            keys.extend(self.r.keys(pattern))
+        return keys
+
+    def rebuild_indexes(self) -> int:
+        """
+        Drop and re-derive every secondary index from the ``orders`` hash
+        (one HSCAN). Used to back-fill stores written by older versions.
+        Returns the number of orders indexed.
+        """
+        pipe = self.r.pipeline()
+        for key in self._index_keys():
+            pipe.delete(key)
+        pipe.execute()
+        count = 0
+        for _, blob in self.r.hscan_iter(self.HASH_KEY):
+            self._index_add(pipe, self.codec.decode_order(blob))
+            count += 1
+            if count % self.SCAN_CHUNK == 0:
+                pipe.execute()
+        pipe.set(self.INDEX_VERSION_KEY, self.INDEX_VERSION)
+        pipe.execute()
+        logger.info("Rebuilt order indexes for %d orders", count)
+        return count
+
+    def ensure_indexes(self) -> None:
+        """Rebuild the indexes if they predate the current layout or miss orders."""
+        version = self.r.get(self.INDEX_VERSION_KEY)
+        if str(version) != str(self.INDEX_VERSION) or self.r.hlen(self.HASH_KEY) != self.r.zcard(
+            self.TS_ALL_KEY
+        ):
+            self.rebuild_indexes()
+
+    def migrate_history(self) -> int:
+        """
+        Move history embedded in order blobs (stores written before
+        ``SCHEMA_VERSION`` 2) into the ``orders:hist:{id}`` lists and
+        strip it from the blob. Returns the number of orders rewritten.
+        """
+        pipe = self.r.pipeline()
+        count = 0
+        for oid, blob in self.r.hscan_iter(self.HASH_KEY):
+            if is_compact(blob):  # written after the migration
+                continue
+            data = json.loads(blob)
+            if "history" not in data:
+                continue
+            raw_hist = data.pop("history") or {}
+            entries = [
+                OrderHistory(**v) for _, v in sorted((int(k), v) for k, v in raw_hist.items())
+            ]
+            hist_key = self.HIST_KEY.format(oid=oid)
+            pipe.delete(hist_key)
+            if entries:
+                pipe.rpush(hist_key, *(self.codec.encode_history(e) for e in entries))
+            data["history_count"] = len(entries)
+            pipe.hset(self.HASH_KEY, oid, self.codec.encode_order(Order.from_dict(data)))
+            count += 1
+            if count % self.SCAN_CHUNK == 0:
+                pipe.execute()
+        pipe.execute()
+        if count:
+            logger.info("Moved embedded history of %d orders to history lists", count)
+        return count
+
+    def ensure_schema(self) -> None:
+        """Migrate the order blobs if they predate the current schema."""
+        if str(self.r.get(self.SCHEMA_VERSION_KEY)) != str(self.SCHEMA_VERSION):
+            self.migrate_history()
+            self.r.set(self.SCHEMA_VERSION_KEY, self.SCHEMA_VERSION)
+
+    def migrate_codec(self, *, stop: threading.Event | None = None) -> int:
+        """
+        Re-encode order blobs and history entries written in another format
+        with :attr:`codec`, one HSCAN page at a time. Every rewrite is a
+        compare-and-set, so it can run next to live writers (a blob updated
+        meanwhile is already in the new format). Stops early once *stop* is
+        set. Returns the number of blobs + entries rewritten.
+        """
+        count, cursor = 0, 0
+        while True:
+            cursor, page = self.r.hscan(self.HASH_KEY, cursor, count=self.SCAN_CHUNK)
+            args: list[str | int] = []
+            for oid, blob in page.items():
+                if not self.codec.is_current(blob):
+                    args += [oid, blob, self.codec.recode(blob)]
+            if args:
+                count += int(self._cas_hset(keys=[self.HASH_KEY], args=args))
+            pipe = self.r.pipeline(transaction=False)
+            for oid in page:
+                pipe.lrange(self.HIST_KEY.format(oid=oid), 0, -1)
+            args = []
+            for oid, raw in zip(page, pipe.execute() if page else [], strict=True):
+                hist_key = self.HIST_KEY.format(oid=oid)
+                for i, h in enumerate(raw):
+                    if not self.codec.is_current(h):
+                        args += [hist_key, i, h, self.codec.recode(h, history=True)]
+            if args:
+                count += int(self._cas_lset(args=args))
+            if cursor == 0 or (stop is not None and stop.is_set()):
+                break
+        if count:
+            logger.info("Re-encoded %d order blobs/history entries as %s", count, self.codec.name)
+        return count
+
+    def codec_migrated(self) -> bool:
+        """True once every blob is known to use :attr:`codec`."""
+        return self.r.get(self.CODEC_KEY) == self.codec.name
+
+    def ensure_codec(self, *, stop: threading.Event | None = None) -> None:
+        """Run :meth:`migrate_codec` unless done already; record it when complete."""
+        if self.codec_migrated():
+            return
+        self.migrate_codec(stop=stop)
+        if stop is None or not stop.is_set():
+            self.r.set(self.CODEC_KEY, self.codec.name)
+
     # ---------- admin ------------------------------------------ #
     def clear(self) -> None:
         pipe = self.r.pipeline()
         pipe.delete(self.HASH_KEY)
-        pipe.delete(self.OPEN_ALL_KEY)
-        # nuke every per-symbol set in one pass
-        for key in self.r.keys(self.OPEN_SYM_KEY.format(sym="*")):
+        # nuke every per-symbol set and time index in one pass
+        for key in self._index_keys():
             pipe.delete(key)
         pipe.execute()
+        # history lists: one key per order, drop them in chunks
+        hist_keys = list(self.r.scan_iter(self.HIST_KEY.format(oid="*"), count=self.SCAN_CHUNK))
+        for i in range(0, len(hist_keys), self.SCAN_CHUNK):
+            self.r.delete(*hist_keys[i : i + self.SCAN_CHUNK])
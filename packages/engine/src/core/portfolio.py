@@ -1,51 +1,147 @@
 """
-Balances live in *one* Valkey hash:  HSET balances <ASSET> <json>.
+Balances live in *one* Valkey hash with two numeric fields per asset:
+
+    HSET balances <ASSET>:free <float> <ASSET>:used <float>
+
+so every move is a plain ``HINCRBYFLOAT`` and reading needs no JSON.
+Stores written by older versions (``HSET balances <ASSET> <json>``) are
+converted in place by :meth:`Portfolio.ensure_schema`.
 """
 
 from __future__ import annotations
 
 import json
+from collections.abc import Mapping
 
 import redis
 
 from ._types import AssetBalance
+from .storage import Storage, script
+
+# Convert legacy JSON rows (field without ':') into the numeric fields.
+_MIGRATE_LUA = """
+local n = 0
+local flat = redis.call('HGETALL', KEYS[1])
+for i = 1, #flat, 2 do
+  local asset, blob = flat[i], flat[i + 1]
+  if not string.find(asset, ':', 1, true) then
+    local d = cjson.decode(blob)
+    redis.call('HSET', KEYS[1],
+      asset .. ':free', string.format('%.17g', tonumber(d.free) or 0),
+      asset .. ':used', string.format('%.17g', tonumber(d.used) or 0))
+    redis.call('HDEL', KEYS[1], asset)
+    n = n + 1
+  end
+end
+return n
+"""
+
+
+@script(_MIGRATE_LUA)
+def _migrate_py(db: Storage, keys: list[str], argv: list[str]) -> int:
+    n = 0
+    for asset, blob in db.hgetall(keys[0]).items():
+        if ":" not in asset:
+            d = json.loads(blob)
+            db.hset(
+                keys[0],
+                mapping={
+                    f"{asset}:free": f"{float(d.get('free') or 0):.17g}",
+                    f"{asset}:used": f"{float(d.get('used') or 0):.17g}",
+                },
+            )
+            db.hdel(keys[0], asset)
+            n += 1
+    return n
 
 
 class Portfolio:
     """
     Thin CRUD wrapper over *one* Redis hash called ``balances``.
 
-    Keys   : asset symbol (BTC, USDT…)
-    Values : compact JSON produced by :class:`AssetBalance.to_dict`
+    Fields : ``<ASSET>:free`` and ``<ASSET>:used`` (BTC:free, USDT:used…)
+    Values : numbers as strings, updated in place with ``HINCRBYFLOAT``
     """
 
-    def __init__(self, conn: redis.Redis) -> None:
+    FREE_FIELD = "{asset}:free"  # .format(asset=asset)
+    USED_FIELD = "{asset}:used"
+
+    def __init__(self, conn: Storage) -> None:
         self.conn, self.key = conn, "balances"
 
     # Internal helpers ---------------------------------------------------
-    def _dump(self, bal: AssetBalance) -> str:
-        return json.dumps(bal.to_dict(), separators=(",", ":"))
+    @classmethod
+    def _fields(cls, asset: str) -> tuple[str, str]:
+        return cls.FREE_FIELD.format(asset=asset), cls.USED_FIELD.format(asset=asset)
+
+    @staticmethod
+    def _bal(asset: str, free: str | None, used: str | None) -> AssetBalance:
+        return AssetBalance(asset, float(free or 0.0), float(used or 0.0))
 
-    def _load(self, blob: str) -> AssetBalance:
+    @staticmethod
+    def _load_legacy(blob: str) -> AssetBalance:
         return AssetBalance.from_dict(json.loads(blob))
 
+    @classmethod
+    def _from_hash(cls, flat: Mapping[str, str]) -> dict[str, AssetBalance]:
+        """Balances keyed by asset from the ``HGETALL`` of the balances hash."""
+        out: dict[str, AssetBalance] = {}
+        for field, value in flat.items():
+            asset, _, part = field.partition(":")
+            if not part:  # legacy JSON row not migrated yet
+                out[asset] = cls._load_legacy(value)
+                continue
+            bal = out.setdefault(asset, AssetBalance(asset))
+            if part in ("free", "used"):
+                setattr(bal, part, float(value))
+        return out
+
     # Public API ---------------------------------------------------------
     def get(self, asset: str) -> AssetBalance:
         """Return balance or a zeroed placeholder if none exists."""
         try:
             asset = asset.upper()
-            blob = self.conn.hget(self.key, asset)
-            return self._load(blob) if blob else AssetBalance(asset)
+            free, used = self.conn.hmget(self.key, self._fields(asset))
+            return self._bal(asset, free, used)
         except redis.RedisError as e:
             raise RuntimeError(f"Failed to get balance for {asset}: {e}") from e
 
+    def get_many(self, assets: list[str]) -> dict[str, AssetBalance]:
+        """Bulk :meth:`get` with one HMGET (missing assets come back zeroed)."""
+        assets = [a.upper() for a in assets]
+        if not assets:
+            return {}
+        vals = self.conn.hmget(self.key, [f for a in assets for f in self._fields(a)])
+        return {a: self._bal(a, vals[2 * i], vals[2 * i + 1]) for i, a in enumerate(assets)}
+
     def set(self, bal: AssetBalance) -> None:
         """Insert / overwrite a balance atomically (`HSET`)."""
-        self.conn.hset(self.key, bal.asset, self._dump(bal))
+        free_f, used_f = self._fields(bal.asset)
+        self.conn.hset(self.key, mapping={free_f: repr(bal.free), used_f: repr(bal.used)})
+
+    def apply_deltas(self, deltas: Mapping[str, tuple[float, float]]) -> dict[str, AssetBalance]:
+        """
+        Add ``(dfree, dused)`` to each asset in one MULTI/EXEC of
+        ``HINCRBYFLOAT`` commands and return the resulting balances.
+        """
+        assets = [a.upper() for a in deltas]
+        if not assets:
+            return {}
+        pipe = self.conn.pipeline()
+        for asset, (dfree, dused) in zip(assets, deltas.values(), strict=True):
+            free_f, used_f = self._fields(asset)
+            pipe.hincrbyfloat(self.key, free_f, dfree)
+            pipe.hincrbyfloat(self.key, used_f, dused)
+        res = pipe.execute()
+        return {a: self._bal(a, res[2 * i], res[2 * i + 1]) for i, a in enumerate(assets)}
 
     def all(self) -> dict[str, AssetBalance]:
-        """Return *all* balances as a dict keyed by asset."""
-        return {a: self._load(b) for a, b in self.conn.hgetall(self.key).items()}
+        """Return *all* balances as a dict keyed by asset (one HGETALL)."""
+        return self._from_hash(self.conn.hgetall(self.key))
+
+    def ensure_schema(self) -> int:
+        """Convert legacy JSON rows to numeric fields. Returns #assets converted."""
+        return int(self.conn.eval(_MIGRATE_LUA, 1, self.key))
 
     def clear(self) -> None:
         """Delete the entire hash – use with care."""
@@ -0,0 +1,1386 @@
+"""
+Storage backends behind :class:`~core.orderbook.OrderBook`,
+:class:`~core.portfolio.Portfolio`, :class:`~core.market.Market` and the
+engine.
+
+The stores speak a small key/value vocabulary – hashes, sets, sorted sets,
+lists, strings, pipelines and server-side scripts – captured by the
+:class:`Storage` protocol. A ``redis.Redis`` client (Valkey) satisfies it
+as is; :class:`MemoryStorage` implements it in-process for single-process
+runs (backtests, local simulations, tests), with the same semantics and
+no network round trips:
+
+* dicts for strings and hashes, sets for sets, lists for lists;
+* sorted sets as a member → score dict plus a ``(score, member)`` list kept
+  sorted with :mod:`bisect`, so range queries on the order indexes stay
+  logarithmic;
+* one lock per store: every command, pipeline and script runs alone, which
+  is what MULTI/EXEC and EVALSHA guarantee on the server;
+* scripts run as Python twins registered next to their Lua source with
+  :func:`script`;
+* optional snapshots to a JSON file, restored on open and rewritten every
+  ``every`` seconds and on :meth:`MemoryStorage.close`.
+
+For single-node deployments that must survive restarts without Valkey,
+:class:`SqliteStorage` keeps the same data in one SQLite file (WAL mode):
+a table per data type, sorted sets indexed on ``(key, score, member)``, and
+pipelines and scripts as transactions.
+
+:func:`open_storage` picks the backend from the URL the engine is started
+with: ``redis://…`` / ``rediss://…`` / ``unix://…`` connect to Valkey,
+``memory://[name][?snapshot=<path>&every=<seconds>]`` returns the process-wide
+memory store called *name*, and ``sqlite:///<path>`` the SQLite store on
+*path* – each shared by every actor opened on the same URL.
+"""
+
+# storage.py
+from __future__ import annotations
+
+import abc
+import atexit
+import bisect
+import builtins
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from operator import itemgetter
+from typing import Any, Protocol
+from urllib.parse import parse_qs, urlsplit
+
+import redis
+
+from .logging_config import logger
+
+ScriptFn = Callable[["Storage", list[str], list[str]], Any]
+_WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+class Storage(Protocol):
+    """The commands the stores and the engine issue (a subset of ``redis.Redis``)."""
+
+    def pipeline(self, transaction: bool = True) -> Any: ...
+    def register_script(self, script: str) -> Any: ...
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any: ...
+    def execute_command(self, *args: Any) -> Any: ...
+    # strings / keys
+    def get(self, name: str) -> Any: ...
+    def set(self, name: str, value: Any, *args: Any, **kwargs: Any) -> Any: ...
+    def incr(self, name: str, amount: int = 1) -> Any: ...
+    def pexpire(self, name: str, time: int) -> Any: ...
+    def delete(self, *names: str) -> Any: ...
+    def unlink(self, *names: str) -> Any: ...
+    def keys(self, pattern: str = "*") -> Any: ...
+    def scan_iter(self, match: str | None = None, count: int | None = None) -> Iterator[Any]: ...
+    # hashes
+    def hget(self, name: str, key: str) -> Any: ...
+    def hmget(self, name: str, keys: Any, *args: Any) -> Any: ...
+    def hgetall(self, name: str) -> Any: ...
+    def hset(self, name: str, *args: Any, **kwargs: Any) -> Any: ...
+    def hsetnx(self, name: str, key: str, value: Any) -> Any: ...
+    def hdel(self, name: str, *keys: str) -> Any: ...
+    def hlen(self, name: str) -> Any: ...
+    def hincrby(self, name: str, key: str, amount: int = 1) -> Any: ...
+    def hincrbyfloat(self, name: str, key: str, amount: float = 1.0) -> Any: ...
+    def hscan(self, name: str, cursor: int = 0, *args: Any, **kwargs: Any) -> Any: ...
+    def hscan_iter(self, name: str, *args: Any, **kwargs: Any) -> Iterator[Any]: ...
+    # sets
+    def sadd(self, name: str, *values: Any) -> Any: ...
+    def srem(self, name: str, *values: Any) -> Any: ...
+    def smembers(self, name: str) -> Any: ...
+    def scard(self, name: str) -> Any: ...
+    # sorted sets
+    def zadd(self, name: str, mapping: Mapping[str, float], *args: Any, **kwargs: Any) -> Any: ...
+    def zrem(self, name: str, *values: Any) -> Any: ...
+    def zcard(self, name: str) -> Any: ...
+    def zrange(self, name: str, start: int, end: int, *args: Any, **kwargs: Any) -> Any: ...
+    def zrangebyscore(self, name: str, min: Any, max: Any, *args: Any, **kwargs: Any) -> Any: ...
+    def zrevrangebyscore(self, name: str, max: Any, min: Any, *args: Any, **kwargs: Any) -> Any: ...
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> Any: ...
+    # lists
+    def rpush(self, name: str, *values: Any) -> Any: ...
+    def lrange(self, name: str, start: int, end: int) -> Any: ...
+    def llen(self, name: str) -> Any: ...
+    def lindex(self, name: str, index: int) -> Any: ...
+    def lset(self, name: str, index: int, value: Any) -> Any: ...
+
+
+# ---------- script twins ------------------------------------------------- #
+_SCRIPTS: dict[str, ScriptFn] = {}
+
+
+def script(lua: str) -> Callable[[ScriptFn], ScriptFn]:
+    """
+    Register *fn* as the in-process twin of the Lua *lua*:
+    ``fn(store, keys, args)`` runs under the store's lock and returns what
+    the Lua script would (as redis-py decodes it).
+    """
+
+    def register(fn: ScriptFn) -> ScriptFn:
+        _SCRIPTS[lua] = fn
+        return fn
+
+    return register
+
+
+def _enc(value: Any) -> str:
+    """Encode a command argument like redis-py does (values come back as str)."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, bool):
+        raise redis.DataError("Invalid input of type: 'bool'")
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    raise redis.DataError(f"Invalid input of type: {type(value).__name__!r}")
+
+
+def _fmt(x: float) -> str:
+    """Float reply as Valkey formats it (``INCRBYFLOAT`` and friends)."""
+    return str(int(x)) if x.is_integer() and abs(x) < 1e17 else repr(x)
+
+
+def _bound(value: Any) -> tuple[float, bool]:
+    """``ZRANGEBYSCORE`` bound → (score, exclusive)."""
+    s = _enc(value)
+    excl = s.startswith("(")
+    s = s[1:] if excl else s
+    return float(s.replace("+inf", "inf")), excl
+
+
+class _ZSet:
+    """Sorted set: member → score, plus ``(score, member)`` pairs kept sorted."""
+
+    __slots__ = ("scores", "items")
+
+    def __init__(self) -> None:
+        self.scores: dict[str, float] = {}
+        self.items: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def add(self, member: str, score: float) -> bool:
+        old = self.scores.get(member)
+        if old is not None:
+            if old == score:
+                return False
+            del self.items[bisect.bisect_left(self.items, (old, member))]
+        self.scores[member] = score
+        bisect.insort(self.items, (score, member))
+        return True
+
+    def remove(self, member: str) -> bool:
+        score = self.scores.pop(member, None)
+        if score is None:
+            return False
+        del self.items[bisect.bisect_left(self.items, (score, member))]
+        return True
+
+    def span(self, lo: Any, hi: Any) -> tuple[int, int]:
+        """Index range of the pairs with ``lo <= score <= hi`` (bounds as in ZRANGEBYSCORE)."""
+        lo_s, lo_x = _bound(lo)
+        hi_s, hi_x = _bound(hi)
+        key = itemgetter(0)
+        i = (bisect.bisect_right if lo_x else bisect.bisect_left)(self.items, lo_s, key=key)
+        j = (bisect.bisect_left if hi_x else bisect.bisect_right)(self.items, hi_s, key=key)
+        return i, max(i, j)
+
+
+def _page(items: list[Any], start: int | None, num: int | None) -> list[Any]:
+    if start is None:
+        return items
+    return items[start:] if num is None or num < 0 else items[start : start + num]
+
+
+# ---------- in-process backends ----------------------------------------- #
+class _LocalStorage(abc.ABC):
+    """
+    What the in-process backends share: pipelines, scripts (their Python
+    twins) and raw commands, each run inside :meth:`_write` – the store's
+    unit of atomicity.
+    """
+
+    @abc.abstractmethod
+    def _write(self) -> AbstractContextManager[Any]:
+        """Hold the store for one command, pipeline or script."""
+
+    def pipeline(self, transaction: bool = True) -> LocalPipeline:
+        return LocalPipeline(self)
+
+    def register_script(self, script: str) -> LocalScript:
+        return LocalScript(self, script)
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        return LocalScript(self, script)(
+            keys=list(keys_and_args[:numkeys]), args=list(keys_and_args[numkeys:])
+        )
+
+    def execute_command(self, *args: Any) -> Any:
+        """Run one raw command (``"ZADD", key, score, member, …``) as scripts issue them."""
+        name, *rest = args
+        handler = _RAW.get(str(name).upper())
+        if handler is None:
+            raise redis.ResponseError(f"unknown command '{name}'")
+        return handler(self, *rest)
+
+    def ping(self) -> bool:
+        return True
+
+    def expire(self, name: str, time_s: int) -> bool:
+        return self.pexpire(name, int(time_s) * 1000)  # type: ignore[attr-defined, no-any-return]
+
+    def unlink(self, *names: str) -> int:
+        return self.delete(*names)  # type: ignore[attr-defined, no-any-return]
+
+    def scan_iter(self, match: str | None = None, count: int | None = None) -> Iterator[str]:
+        yield from self.keys(match or "*")  # type: ignore[attr-defined]
+
+    def hscan(
+        self, name: str, cursor: int = 0, match: str | None = None, count: int | None = None
+    ) -> tuple[int, dict[str, str]]:
+        """One page with every field (COUNT is only a hint), cursor 0."""
+        page: dict[str, str] = self.hgetall(name)  # type: ignore[attr-defined]
+        if match is not None:
+            page = {k: v for k, v in page.items() if fnmatch.fnmatchcase(k, match)}
+        return 0, page
+
+    def hscan_iter(
+        self, name: str, match: str | None = None, count: int | None = None
+    ) -> Iterator[tuple[str, str]]:
+        yield from self.hscan(name, match=match)[1].items()
+
+
+class MemoryStorage(_LocalStorage):
+    """
+    In-process :class:`Storage` (see the module docstring). Thread-safe;
+    values are kept and returned as ``str`` like a ``decode_responses=True``
+    client.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, *, snapshot: str | None = None, every: float | None = None) -> None:
+        self._lock = threading.RLock()
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}  # key -> epoch seconds
+        self.snapshot_path = snapshot
+        self._stop = threading.Event()
+        self._saver: threading.Thread | None = None
+        if snapshot and os.path.exists(snapshot):
+            self.restore(snapshot)
+        if snapshot and every:
+            self._saver = threading.Thread(
+                target=self._save_loop, args=(every,), name="storage-snapshot", daemon=True
+            )
+            self._saver.start()
+
+    # ---------- plumbing -------------------------------------------- #
+    def _get(self, name: str, kind: type) -> Any:
+        deadline = self._expires.get(name)
+        if deadline is not None and deadline <= time.time():
+            self._data.pop(name, None)
+            del self._expires[name]
+        value = self._data.get(name)
+        if value is not None and not isinstance(value, kind):
+            raise redis.ResponseError(_WRONGTYPE)
+        return value
+
+    def _new(self, name: str, kind: type) -> Any:
+        value = self._get(name, kind)
+        if value is None:
+            value = self._data[name] = kind()
+        return value
+
+    def _drop_if_empty(self, name: str, value: Any) -> None:
+        if not value:
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+
+    def _exists(self, name: str) -> bool:
+        return self._get(name, object) is not None
+
+    def _live_keys(self) -> list[str]:
+        now = time.time()
+        return [k for k in self._data if self._expires.get(k, math.inf) > now]
+
+    def _write(self) -> AbstractContextManager[Any]:
+        return self._lock
+
+    # ---------- strings / keys -------------------------------------- #
+    def get(self, name: str) -> str | None:
+        with self._lock:
+            return self._get(name, str)  # type: ignore[no-any-return]
+
+    def set(
+        self,
+        name: str,
+        value: Any,
+        ex: int | None = None,
+        px: int | None = None,
+        nx: bool = False,
+        xx: bool = False,
+    ) -> bool | None:
+        with self._lock:
+            exists = self._exists(name)
+            if (nx and exists) or (xx and not exists):
+                return None
+            self._data[name] = _enc(value)
+            self._expires.pop(name, None)
+            if px is not None:
+                self._expires[name] = time.time() + px / 1000
+            elif ex is not None:
+                self._expires[name] = time.time() + ex
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._get(name, str) or 0) + amount
+            self._data[name] = str(value)
+            return value
+
+    def pexpire(self, name: str, time_ms: int) -> bool:
+        with self._lock:
+            if not self._exists(name):
+                return False
+            self._expires[name] = time.time() + int(time_ms) / 1000
+            return True
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._exists(n) for n in names)
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            n = 0
+            for name in names:
+                n += self._exists(name)
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+            return n
+
+    def keys(self, pattern: str = "*") -> list[str]:
+        with self._lock:
+            return [k for k in self._live_keys() if fnmatch.fnmatchcase(k, pattern)]
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+    # ---------- hashes ---------------------------------------------- #
+    def hget(self, name: str, key: str) -> str | None:
+        with self._lock:
+            h = self._get(name, dict)
+            return None if h is None else h.get(key)
+
+    def hmget(self, name: str, keys: Any, *args: Any) -> list[str | None]:
+        fields = [keys] if isinstance(keys, str) else list(keys)
+        fields += args
+        with self._lock:
+            h = self._get(name, dict) or {}
+            return [h.get(f) for f in fields]
+
+    def hgetall(self, name: str) -> dict[str, str]:
+        with self._lock:
+            return dict(self._get(name, dict) or {})
+
+    def hset(
+        self,
+        name: str,
+        key: str | None = None,
+        value: Any = None,
+        mapping: Mapping[str, Any] | None = None,
+        items: list[Any] | None = None,
+    ) -> int:
+        pairs: list[tuple[str, Any]] = []
+        if key is not None:
+            pairs.append((key, value))
+        if mapping:
+            pairs.extend(mapping.items())
+        if items:
+            pairs.extend(zip(items[::2], items[1::2], strict=True))
+        with self._lock:
+            h = self._new(name, dict)
+            added = 0
+            for f, v in pairs:
+                added += f not in h
+                h[f] = _enc(v)
+            return added
+
+    def hsetnx(self, name: str, key: str, value: Any) -> bool:
+        with self._lock:
+            h = self._new(name, dict)
+            if key in h:
+                return False
+            h[key] = _enc(value)
+            return True
+
+    def hdel(self, name: str, *keys: str) -> int:
+        with self._lock:
+            h = self._get(name, dict)
+            if h is None:
+                return 0
+            n = sum(h.pop(k, None) is not None for k in keys)
+            self._drop_if_empty(name, h)
+            return n
+
+    def hlen(self, name: str) -> int:
+        with self._lock:
+            return len(self._get(name, dict) or {})
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            h = self._new(name, dict)
+            value = int(h.get(key, 0)) + int(amount)
+            h[key] = str(value)
+            return value
+
+    def hincrbyfloat(self, name: str, key: str, amount: float = 1.0) -> float:
+        with self._lock:
+            h = self._new(name, dict)
+            value = float(h.get(key, 0)) + float(amount)
+            h[key] = _fmt(value)
+            return value
+
+    # ---------- sets ------------------------------------------------ #
+    def sadd(self, name: str, *values: Any) -> int:
+        with self._lock:
+            s = self._new(name, set)
+            before = len(s)
+            s.update(_enc(v) for v in values)
+            return len(s) - before
+
+    def srem(self, name: str, *values: Any) -> int:
+        with self._lock:
+            s = self._get(name, set)
+            if s is None:
+                return 0
+            before = len(s)
+            s.difference_update(_enc(v) for v in values)
+            self._drop_if_empty(name, s)
+            return before - len(s)
+
+    def smembers(self, name: str) -> builtins.set[str]:
+        with self._lock:
+            return set(self._get(name, set) or ())
+
+    def scard(self, name: str) -> int:
+        with self._lock:
+            return len(self._get(name, set) or ())
+
+    def sismember(self, name: str, value: Any) -> bool:
+        with self._lock:
+            return _enc(value) in (self._get(name, set) or ())
+
+    # ---------- sorted sets ----------------------------------------- #
+    def zadd(
+        self,
+        name: str,
+        mapping: Mapping[str, float],
+        nx: bool = False,
+        xx: bool = False,
+        ch: bool = False,
+    ) -> int:
+        with self._lock:
+            z = self._new(name, _ZSet)
+            n = 0
+            for member, score in mapping.items():
+                member = _enc(member)
+                exists = member in z.scores
+                if (nx and exists) or (xx and not exists):
+                    continue
+                changed = z.add(member, _bound(score)[0])
+                n += changed if ch else not exists
+            self._drop_if_empty(name, z)
+            return n
+
+    def zrem(self, name: str, *values: Any) -> int:
+        with self._lock:
+            z = self._get(name, _ZSet)
+            if z is None:
+                return 0
+            n = sum(z.remove(_enc(v)) for v in values)
+            self._drop_if_empty(name, z)
+            return n
+
+    def zcard(self, name: str) -> int:
+        with self._lock:
+            return len(self._get(name, _ZSet) or ())
+
+    def zscore(self, name: str, value: Any) -> float | None:
+        with self._lock:
+            z = self._get(name, _ZSet)
+            return None if z is None else z.scores.get(_enc(value))
+
+    @staticmethod
+    def _out(pairs: list[tuple[float, str]], withscores: bool) -> list[Any]:
+        return [(m, s) for s, m in pairs] if withscores else [m for _, m in pairs]
+
+    def zrange(
+        self, name: str, start: int, end: int, desc: bool = False, withscores: bool = False
+    ) -> list[Any]:
+        with self._lock:
+            items = (self._get(name, _ZSet) or _ZSet()).items
+            items = items[::-1] if desc else items
+            n = len(items)
+            start = max(start + n if start < 0 else start, 0)
+            end = end + n if end < 0 else end
+            return self._out(items[start : end + 1], withscores)
+
+    def zrangebyscore(
+        self,
+        name: str,
+        min: Any,
+        max: Any,
+        start: int | None = None,
+        num: int | None = None,
+        withscores: bool = False,
+    ) -> list[Any]:
+        with self._lock:
+            z = self._get(name, _ZSet) or _ZSet()
+            i, j = z.span(min, max)
+            return self._out(_page(z.items[i:j], start, num), withscores)
+
+    def zrevrangebyscore(
+        self,
+        name: str,
+        max: Any,
+        min: Any,
+        start: int | None = None,
+        num: int | None = None,
+        withscores: bool = False,
+    ) -> list[Any]:
+        with self._lock:
+            z = self._get(name, _ZSet) or _ZSet()
+            i, j = z.span(min, max)
+            return self._out(_page(z.items[i:j][::-1], start, num), withscores)
+
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> int:
+        with self._lock:
+            z = self._get(name, _ZSet)
+            if z is None:
+                return 0
+            i, j = z.span(min, max)
+            for _, member in z.items[i:j]:
+                del z.scores[member]
+            del z.items[i:j]
+            self._drop_if_empty(name, z)
+            return j - i
+
+    # ---------- lists ----------------------------------------------- #
+    def rpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            lst = self._new(name, list)
+            lst.extend(_enc(v) for v in values)
+            return len(lst)
+
+    def lrange(self, name: str, start: int, end: int) -> list[str]:
+        with self._lock:
+            lst = self._get(name, list) or []
+            n = len(lst)
+            start = max(start + n if start < 0 else start, 0)
+            end = end + n if end < 0 else end
+            return lst[start : end + 1]
+
+    def llen(self, name: str) -> int:
+        with self._lock:
+            return len(self._get(name, list) or ())
+
+    def lindex(self, name: str, index: int) -> str | None:
+        with self._lock:
+            lst = self._get(name, list) or []
+            index = int(index)
+            return lst[index] if -len(lst) <= index < len(lst) else None
+
+    def lset(self, name: str, index: int, value: Any) -> bool:
+        with self._lock:
+            lst = self._get(name, list)
+            if lst is None or not -len(lst) <= int(index) < len(lst):
+                raise redis.ResponseError("index out of range")
+            lst[int(index)] = _enc(value)
+            return True
+
+    # ---------- snapshots ------------------------------------------- #
+    def snapshot(self, path: str | None = None) -> int:
+        """Write every live key to *path* (default: the configured file) atomically."""
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("no snapshot path configured")
+        with self._lock:
+            data: dict[str, Any] = {}
+            for key in self._live_keys():
+                v = self._data[key]
+                if isinstance(v, _ZSet):
+                    data[key] = ["zset", [[m, s] for s, m in v.items]]
+                elif isinstance(v, set):
+                    data[key] = ["set", sorted(v)]
+                elif isinstance(v, dict):
+                    data[key] = ["hash", v]
+                elif isinstance(v, list):
+                    data[key] = ["list", v]
+                else:
+                    data[key] = ["string", v]
+            payload = json.dumps(
+                {
+                    "version": self.SNAPSHOT_VERSION,
+                    "data": data,
+                    "expires": {k: t for k, t in self._expires.items() if k in data},
+                },
+                separators=(",", ":"),
+            )
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        return len(data)
+
+    def restore(self, path: str) -> int:
+        """Replace the contents with the snapshot at *path*; returns the number of keys."""
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+        if snap.get("version") != self.SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {snap.get('version')!r}")
+        with self._lock:
+            self._data.clear()
+            self._expires = {k: float(t) for k, t in snap.get("expires", {}).items()}
+            for key, (kind, value) in snap["data"].items():
+                if kind == "zset":
+                    z = _ZSet()
+                    for member, score in value:
+                        z.add(member, float(score))
+                    self._data[key] = z
+                elif kind == "set":
+                    self._data[key] = set(value)
+                else:  # hash, list, string
+                    self._data[key] = value
+        logger.info("Restored %d keys from %s", len(snap["data"]), path)
+        return len(snap["data"])
+
+    def _save_loop(self, every: float) -> None:
+        while not self._stop.wait(every):
+            try:
+                self.snapshot()
+            except OSError as e:
+                logger.error("Snapshot to %s failed: %s", self.snapshot_path, e)
+
+    def close(self) -> None:
+        """Stop the snapshot thread and write a final snapshot (if configured)."""
+        self._stop.set()
+        if self._saver is not None:
+            self._saver.join()
+            self._saver = None
+        if self.snapshot_path:
+            self.snapshot()
+
+
+# ---------- SQLite backend ---------------------------------------------- #
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+  key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT, expires REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hashes (
+  key TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, field)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sets (
+  key TEXT NOT NULL, member TEXT NOT NULL, PRIMARY KEY (key, member)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS zsets (
+  key TEXT NOT NULL, member TEXT NOT NULL, score REAL NOT NULL, PRIMARY KEY (key, member)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS zsets_by_score ON zsets (key, score, member);
+CREATE TABLE IF NOT EXISTS lists (
+  key TEXT NOT NULL, idx INTEGER NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, idx)
+) WITHOUT ROWID;
+"""
+_TABLES = {"hash": "hashes", "set": "sets", "zset": "zsets", "list": "lists"}
+_CHUNK = 500  # bound parameters per IN (…) lookup
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _score_range(min: Any, max: Any) -> tuple[str, tuple[float, float]]:
+    """``ZRANGEBYSCORE`` bounds → SQL condition on ``score`` and its parameters."""
+    lo, lo_x = _bound(min)
+    hi, hi_x = _bound(max)
+    return f"score {'>' if lo_x else '>='} ? AND score {'<' if hi_x else '<='} ?", (lo, hi)
+
+
+class SqliteStorage(_LocalStorage):
+    """
+    :class:`Storage` on one SQLite file in WAL mode, for single-node
+    deployments without Valkey whose state must survive restarts.
+
+    Every key has a row in ``keys`` (kind, expiry, string value); hashes,
+    sets, sorted sets and lists live in one table each, keyed by
+    ``(key, field/member/index)``. Sorted sets carry a second index on
+    ``(key, score, member)``, so the order indexes (status, symbol,
+    ``ts_update``, ``limit_price`` – see core.orderbook) are B-tree range
+    scans. Each command, pipeline and script is one transaction;
+    :func:`write_batch` groups several into one commit.
+
+    Several processes may open the same file: writers take SQLite's write
+    lock (``BEGIN IMMEDIATE``) and wait up to *timeout* seconds for it.
+    """
+
+    def __init__(self, path: str, *, synchronous: str = "NORMAL", timeout: float = 5.0) -> None:
+        if synchronous.upper() not in _SYNCHRONOUS:
+            raise ValueError(f"synchronous must be one of {sorted(_SYNCHRONOUS)}")
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0  # open transaction + savepoints
+        self._db = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous.upper()}")
+        self._db.executescript(_SQLITE_SCHEMA)
+
+    # ---------- plumbing -------------------------------------------- #
+    @contextmanager
+    def _tx(self, savepoint: bool = False) -> Iterator[None]:
+        """
+        Run the body in a transaction: the outermost one commits (or rolls
+        back on error); nested ones join it, as a savepoint if asked.
+        """
+        with self._lock:
+            outer = self._depth == 0
+            if not (outer or savepoint):
+                yield
+                return
+            name = f"sp{self._depth}"
+            self._db.execute("BEGIN IMMEDIATE" if outer else f"SAVEPOINT {name}")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outer:
+                    self._db.execute("ROLLBACK")
+                else:
+                    self._db.execute(f"ROLLBACK TO {name}")
+                    self._db.execute(f"RELEASE {name}")
+                raise
+            self._depth -= 1
+            self._db.execute("COMMIT" if outer else f"RELEASE {name}")
+
+    def _write(self) -> AbstractContextManager[Any]:
+        return self._tx(savepoint=True)
+
+    def _row(self, name: str) -> tuple[str, str | None] | None:
+        """``(kind, value)`` of the live key *name*; expired keys read as missing."""
+        row = self._db.execute(
+            "SELECT kind, value, expires FROM keys WHERE key = ?", (name,)
+        ).fetchone()
+        if row is None or (row[2] is not None and row[2] <= time.time()):
+            return None
+        return row[0], row[1]
+
+    def _has(self, name: str, kind: str) -> bool:
+        row = self._row(name)
+        if row is not None and row[0] != kind:
+            raise redis.ResponseError(_WRONGTYPE)
+        return row is not None
+
+    def _new(self, name: str, kind: str) -> None:
+        """Make sure *name* exists as a *kind* (dropping it first if it expired)."""
+        row = self._db.execute("SELECT kind, expires FROM keys WHERE key = ?", (name,)).fetchone()
+        if row is not None and row[1] is not None and row[1] <= time.time():
+            self._purge(name, row[0])
+            row = None
+        if row is None:
+            self._db.execute("INSERT INTO keys (key, kind) VALUES (?, ?)", (name, kind))
+        elif row[0] != kind:
+            raise redis.ResponseError(_WRONGTYPE)
+
+    def _purge(self, name: str, kind: str) -> None:
+        self._db.execute("DELETE FROM keys WHERE key = ?", (name,))
+        if kind in _TABLES:
+            self._db.execute(f"DELETE FROM {_TABLES[kind]} WHERE key = ?", (name,))
+
+    def _drop_if_empty(self, name: str, kind: str) -> None:
+        sql = f"SELECT 1 FROM {_TABLES[kind]} WHERE key = ? LIMIT 1"
+        if self._db.execute(sql, (name,)).fetchone() is None:
+            self._db.execute("DELETE FROM keys WHERE key = ?", (name,))
+
+    def _lookup(
+        self, table: str, column: str, value: str, name: str, items: list[str]
+    ) -> dict[str, Any]:
+        """``{item: value}`` for the *items* (fields, members) of *name* present in *table*."""
+        found: dict[str, Any] = {}
+        for i in range(0, len(items), _CHUNK):
+            chunk = items[i : i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            sql = f"SELECT {column}, {value} FROM {table} WHERE key = ? AND {column} IN ({marks})"
+            found.update(self._db.execute(sql, (name, *chunk)).fetchall())
+        return found
+
+    # ---------- strings / keys -------------------------------------- #
+    def get(self, name: str) -> str | None:
+        with self._lock:
+            row = self._row(name)
+            if row is not None and row[0] != "string":
+                raise redis.ResponseError(_WRONGTYPE)
+            return None if row is None else row[1]
+
+    def set(
+        self,
+        name: str,
+        value: Any,
+        ex: int | None = None,
+        px: int | None = None,
+        nx: bool = False,
+        xx: bool = False,
+    ) -> bool | None:
+        with self._tx():
+            row = self._row(name)
+            if (nx and row is not None) or (xx and row is None):
+                return None
+            old = self._db.execute("SELECT kind FROM keys WHERE key = ?", (name,)).fetchone()
+            if old is not None:
+                self._purge(name, old[0])
+            expires = None
+            if px is not None:
+                expires = time.time() + px / 1000
+            elif ex is not None:
+                expires = time.time() + ex
+            self._db.execute(
+                "INSERT INTO keys (key, kind, value, expires) VALUES (?, 'string', ?, ?)",
+                (name, _enc(value), expires),
+            )
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._tx():
+            self._new(name, "string")
+            value = int(self._row(name)[1] or 0) + amount  # type: ignore[index]
+            self._db.execute("UPDATE keys SET value = ? WHERE key = ?", (str(value), name))
+            return value
+
+    def pexpire(self, name: str, time_ms: int) -> bool:
+        with self._tx():
+            if self._row(name) is None:
+                return False
+            expires = time.time() + int(time_ms) / 1000
+            self._db.execute("UPDATE keys SET expires = ? WHERE key = ?", (expires, name))
+            return True
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._row(n) is not None for n in names)
+
+    def delete(self, *names: str) -> int:
+        with self._tx():
+            n = 0
+            for name in names:
+                row = self._db.execute(
+                    "SELECT kind, expires FROM keys WHERE key = ?", (name,)
+                ).fetchone()
+                if row is not None:
+                    n += row[1] is None or row[1] > time.time()
+                    self._purge(name, row[0])
+            return n
+
+    def keys(self, pattern: str = "*") -> list[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key FROM keys WHERE key GLOB ? AND (expires IS NULL OR expires > ?)",
+                (pattern, time.time()),
+            )
+            return [r[0] for r in rows]
+
+    def flushdb(self) -> bool:
+        with self._tx():
+            for table in ("keys", *_TABLES.values()):
+                self._db.execute(f"DELETE FROM {table}")
+            return True
+
+    # ---------- hashes ---------------------------------------------- #
+    def hget(self, name: str, key: str) -> str | None:
+        with self._lock:
+            if not self._has(name, "hash"):
+                return None
+            row = self._db.execute(
+                "SELECT value FROM hashes WHERE key = ? AND field = ?", (name, key)
+            ).fetchone()
+            return None if row is None else row[0]
+
+    def hmget(self, name: str, keys: Any, *args: Any) -> list[str | None]:
+        fields = [keys] if isinstance(keys, str) else list(keys)
+        fields += args
+        with self._lock:
+            if not self._has(name, "hash"):
+                return [None] * len(fields)
+            found = self._lookup("hashes", "field", "value", name, fields)
+            return [found.get(f) for f in fields]
+
+    def hgetall(self, name: str) -> dict[str, str]:
+        with self._lock:
+            if not self._has(name, "hash"):
+                return {}
+            rows = self._db.execute("SELECT field, value FROM hashes WHERE key = ?", (name,))
+            return dict(rows.fetchall())
+
+    def hset(
+        self,
+        name: str,
+        key: str | None = None,
+        value: Any = None,
+        mapping: Mapping[str, Any] | None = None,
+        items: list[Any] | None = None,
+    ) -> int:
+        pairs: dict[str, str] = {}
+        if key is not None:
+            pairs[_enc(key)] = _enc(value)
+        if mapping:
+            pairs.update((_enc(f), _enc(v)) for f, v in mapping.items())
+        if items:
+            pairs.update((_enc(f), _enc(v)) for f, v in zip(items[::2], items[1::2], strict=True))
+        with self._tx():
+            self._new(name, "hash")
+            present = self._lookup("hashes", "field", "value", name, list(pairs))
+            self._db.executemany(
+                "INSERT INTO hashes (key, field, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (key, field) DO UPDATE SET value = excluded.value",
+                [(name, f, v) for f, v in pairs.items()],
+            )
+            return len(pairs) - len(present)
+
+    def hsetnx(self, name: str, key: str, value: Any) -> bool:
+        with self._tx():
+            self._new(name, "hash")
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO hashes (key, field, value) VALUES (?, ?, ?)",
+                (name, key, _enc(value)),
+            )
+            return cur.rowcount == 1
+
+    def hdel(self, name: str, *keys: str) -> int:
+        with self._tx():
+            if not self._has(name, "hash"):
+                return 0
+            cur = self._db.executemany(
+                "DELETE FROM hashes WHERE key = ? AND field = ?", [(name, k) for k in keys]
+            )
+            self._drop_if_empty(name, "hash")
+            return cur.rowcount
+
+    def hlen(self, name: str) -> int:
+        with self._lock:
+            if not self._has(name, "hash"):
+                return 0
+            return self._db.execute(  # type: ignore[no-any-return]
+                "SELECT COUNT(*) FROM hashes WHERE key = ?", (name,)
+            ).fetchone()[0]
+
+    def _hincr(self, name: str, key: str, step: Callable[[str | None], str]) -> str:
+        with self._tx():
+            self._new(name, "hash")
+            row = self._db.execute(
+                "SELECT value FROM hashes WHERE key = ? AND field = ?", (name, key)
+            ).fetchone()
+            value = step(None if row is None else row[0])
+            self._db.execute(
+                "INSERT OR REPLACE INTO hashes (key, field, value) VALUES (?, ?, ?)",
+                (name, key, value),
+            )
+            return value
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        return int(self._hincr(name, key, lambda v: str(int(v or 0) + int(amount))))
+
+    def hincrbyfloat(self, name: str, key: str, amount: float = 1.0) -> float:
+        return float(self._hincr(name, key, lambda v: _fmt(float(v or 0) + float(amount))))
+
+    # ---------- sets ------------------------------------------------ #
+    def sadd(self, name: str, *values: Any) -> int:
+        with self._tx():
+            self._new(name, "set")
+            cur = self._db.executemany(
+                "INSERT OR IGNORE INTO sets (key, member) VALUES (?, ?)",
+                [(name, _enc(v)) for v in values],
+            )
+            return cur.rowcount
+
+    def srem(self, name: str, *values: Any) -> int:
+        with self._tx():
+            if not self._has(name, "set"):
+                return 0
+            cur = self._db.executemany(
+                "DELETE FROM sets WHERE key = ? AND member = ?", [(name, _enc(v)) for v in values]
+            )
+            self._drop_if_empty(name, "set")
+            return cur.rowcount
+
+    def smembers(self, name: str) -> builtins.set[str]:
+        with self._lock:
+            if not self._has(name, "set"):
+                return set()
+            return {
+                r[0] for r in self._db.execute("SELECT member FROM sets WHERE key = ?", (name,))
+            }
+
+    def scard(self, name: str) -> int:
+        with self._lock:
+            if not self._has(name, "set"):
+                return 0
+            return self._db.execute(  # type: ignore[no-any-return]
+                "SELECT COUNT(*) FROM sets WHERE key = ?", (name,)
+            ).fetchone()[0]
+
+    def sismember(self, name: str, value: Any) -> bool:
+        with self._lock:
+            if not self._has(name, "set"):
+                return False
+            row = self._db.execute(
+                "SELECT 1 FROM sets WHERE key = ? AND member = ?", (name, _enc(value))
+            ).fetchone()
+            return row is not None
+
+    # ---------- sorted sets ----------------------------------------- #
+    def zadd(
+        self,
+        name: str,
+        mapping: Mapping[str, float],
+        nx: bool = False,
+        xx: bool = False,
+        ch: bool = False,
+    ) -> int:
+        scores = {_enc(m): _bound(s)[0] for m, s in mapping.items()}
+        with self._tx():
+            self._new(name, "zset")
+            old = self._lookup("zsets", "member", "score", name, list(scores))
+            rows, n = [], 0
+            for member, score in scores.items():
+                exists = member in old
+                if (nx and exists) or (xx and not exists):
+                    continue
+                changed = old.get(member) != score
+                if changed:
+                    rows.append((name, member, score))
+                n += changed if ch else not exists
+            self._db.executemany(
+                "INSERT INTO zsets (key, member, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (key, member) DO UPDATE SET score = excluded.score",
+                rows,
+            )
+            self._drop_if_empty(name, "zset")
+            return n
+
+    def zrem(self, name: str, *values: Any) -> int:
+        with self._tx():
+            if not self._has(name, "zset"):
+                return 0
+            cur = self._db.executemany(
+                "DELETE FROM zsets WHERE key = ? AND member = ?", [(name, _enc(v)) for v in values]
+            )
+            self._drop_if_empty(name, "zset")
+            return cur.rowcount
+
+    def zcard(self, name: str) -> int:
+        with self._lock:
+            if not self._has(name, "zset"):
+                return 0
+            return self._db.execute(  # type: ignore[no-any-return]
+                "SELECT COUNT(*) FROM zsets WHERE key = ?", (name,)
+            ).fetchone()[0]
+
+    def zscore(self, name: str, value: Any) -> float | None:
+        with self._lock:
+            if not self._has(name, "zset"):
+                return None
+            row = self._db.execute(
+                "SELECT score FROM zsets WHERE key = ? AND member = ?", (name, _enc(value))
+            ).fetchone()
+            return None if row is None else row[0]
+
+    def _zselect(
+        self,
+        name: str,
+        where: str,
+        params: tuple[Any, ...],
+        desc: bool,
+        offset: int | None,
+        limit: int | None,
+        withscores: bool,
+    ) -> list[Any]:
+        if not self._has(name, "zset"):
+            return []
+        order = "DESC" if desc else "ASC"
+        rows = self._db.execute(
+            f"SELECT member, score FROM zsets WHERE key = ? AND {where} "
+            f"ORDER BY score {order}, member {order} LIMIT ? OFFSET ?",
+            (name, *params, -1 if limit is None or limit < 0 else limit, offset or 0),
+        ).fetchall()
+        return rows if withscores else [m for m, _ in rows]
+
+    def zrange(
+        self, name: str, start: int, end: int, desc: bool = False, withscores: bool = False
+    ) -> list[Any]:
+        with self._lock:
+            if start < 0 or end < 0:
+                n = self.zcard(name)
+                start = max(start + n if start < 0 else start, 0)
+                end = end + n if end < 0 else end
+            if end < start:
+                return []
+            return self._zselect(name, "1", (), desc, start, end - start + 1, withscores)
+
+    def zrangebyscore(
+        self,
+        name: str,
+        min: Any,
+        max: Any,
+        start: int | None = None,
+        num: int | None = None,
+        withscores: bool = False,
+    ) -> list[Any]:
+        with self._lock:
+            where, params = _score_range(min, max)
+            return self._zselect(name, where, params, False, start, num, withscores)
+
+    def zrevrangebyscore(
+        self,
+        name: str,
+        max: Any,
+        min: Any,
+        start: int | None = None,
+        num: int | None = None,
+        withscores: bool = False,
+    ) -> list[Any]:
+        with self._lock:
+            where, params = _score_range(min, max)
+            return self._zselect(name, where, params, True, start, num, withscores)
+
+    def zremrangebyscore(self, name: str, min: Any, max: Any) -> int:
+        with self._tx():
+            if not self._has(name, "zset"):
+                return 0
+            where, params = _score_range(min, max)
+            cur = self._db.execute(f"DELETE FROM zsets WHERE key = ? AND {where}", (name, *params))
+            self._drop_if_empty(name, "zset")
+            return cur.rowcount
+
+    # ---------- lists ----------------------------------------------- #
+    def _llen(self, name: str) -> int:
+        row = self._db.execute("SELECT MAX(idx) FROM lists WHERE key = ?", (name,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def rpush(self, name: str, *values: Any) -> int:
+        with self._tx():
+            self._new(name, "list")
+            n = self._llen(name)
+            self._db.executemany(
+                "INSERT INTO lists (key, idx, value) VALUES (?, ?, ?)",
+                [(name, n + i, _enc(v)) for i, v in enumerate(values)],
+            )
+            return n + len(values)
+
+    def lrange(self, name: str, start: int, end: int) -> list[str]:
+        with self._lock:
+            if not self._has(name, "list"):
+                return []
+            n = self._llen(name)
+            start = max(start + n if start < 0 else start, 0)
+            end = end + n if end < 0 else end
+            rows = self._db.execute(
+                "SELECT value FROM lists WHERE key = ? AND idx BETWEEN ? AND ? ORDER BY idx",
+                (name, start, end),
+            )
+            return [r[0] for r in rows]
+
+    def llen(self, name: str) -> int:
+        with self._lock:
+            return self._llen(name) if self._has(name, "list") else 0
+
+    def lindex(self, name: str, index: int) -> str | None:
+        with self._lock:
+            if not self._has(name, "list"):
+                return None
+            index = int(index)
+            if index < 0:
+                index += self._llen(name)
+            row = self._db.execute(
+                "SELECT value FROM lists WHERE key = ? AND idx = ?", (name, index)
+            ).fetchone()
+            return None if row is None else row[0]
+
+    def lset(self, name: str, index: int, value: Any) -> bool:
+        with self._tx():
+            index = int(index)
+            if self._has(name, "list") and index < 0:
+                index += self._llen(name)
+            cur = self._db.execute(
+                "UPDATE lists SET value = ? WHERE key = ? AND idx = ?", (_enc(value), name, index)
+            )
+            if cur.rowcount == 0:
+                raise redis.ResponseError("index out of range")
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class LocalPipeline:
+    """Queues commands and runs them back to back as one write of the store."""
+
+    def __init__(self, store: _LocalStorage) -> None:
+        self._store = store
+        self._calls: list[Callable[[], Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __enter__(self) -> LocalPipeline:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._calls = []
+
+    def __getattr__(self, name: str) -> Callable[..., LocalPipeline]:
+        method = getattr(self._store, name)
+
+        def queue(*args: Any, **kwargs: Any) -> LocalPipeline:
+            self._calls.append(lambda: method(*args, **kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list[Any]:
+        calls, self._calls = self._calls, []
+        with self._store._write():
+            return [call() for call in calls]
+
+
+class LocalScript:
+    """A registered script: runs its Python twin (see :func:`script`)."""
+
+    def __init__(self, store: _LocalStorage, lua: str) -> None:
+        fn = _SCRIPTS.get(lua)
+        if fn is None:
+            sha = hashlib.sha1(lua.encode()).hexdigest()
+            first = lua.strip().splitlines()[0] if lua.strip() else ""
+            raise RuntimeError(
+                f"Lua script {sha} ({first[:40]!r}) has no in-process twin;"
+                " register one with core.storage.script"
+            )
+        self._store = store
+        self._fn = fn
+
+    def __call__(
+        self,
+        keys: list[Any] | None = None,
+        args: list[Any] | None = None,
+        client: Any = None,
+    ) -> Any:
+        keys_ = [_enc(k) for k in keys or ()]
+        args_ = [_enc(a) for a in args or ()]
+        if isinstance(client, LocalPipeline):
+            client._calls.append(lambda: self(keys_, args_))
+            return client
+        with self._store._write():
+            return self._fn(self._store, keys_, args_)  # type: ignore[arg-type]
+
+
+def _call(method: str) -> Callable[..., Any]:
+    return lambda store, *args: getattr(store, method)(*args)
+
+
+def _zadd_raw(store: Any, name: str, *score_members: str) -> int:
+    pairs = zip(score_members[1::2], score_members[::2], strict=True)
+    return store.zadd(name, dict(pairs))
+
+
+# raw command name -> handler(store, *args) for _LocalStorage.execute_command
+_RAW: dict[str, Callable[..., Any]] = {
+    "GET": _call("get"),
+    "DEL": _call("delete"),
+    "INCR": _call("incr"),
+    "PEXPIRE": _call("pexpire"),
+    "HGET": _call("hget"),
+    "HMGET": lambda s, name, *fields: s.hmget(name, list(fields)),
+    "HGETALL": _call("hgetall"),
+    "HSET": lambda s, name, *fv: s.hset(name, items=list(fv)),
+    "HDEL": _call("hdel"),
+    "HINCRBY": lambda s, name, key, n: s.hincrby(name, key, int(n)),
+    "HINCRBYFLOAT": lambda s, name, key, n: s.hincrbyfloat(name, key, float(n)),
+    "SADD": _call("sadd"),
+    "SREM": _call("srem"),
+    "SCARD": _call("scard"),
+    "ZADD": _zadd_raw,
+    "ZREM": _call("zrem"),
+    "RPUSH": _call("rpush"),
+    "LLEN": _call("llen"),
+    "LINDEX": _call("lindex"),
+    "LSET": _call("lset"),
+}
+
+
+# ---------- selection ---------------------------------------------------- #
+_LOCAL: dict[tuple[str, str], _LocalStorage] = {}
+_LOCAL_LOCK = threading.Lock()
+
+
+def _open_local(scheme: str, name: str, q: dict[str, str]) -> _LocalStorage:
+    if scheme == "memory":
+        every = float(q["every"]) if "every" in q else None
+        memory = MemoryStorage(snapshot=q.get("snapshot"), every=every)
+        if memory.snapshot_path:
+            atexit.register(memory.close)
+        return memory
+    if not name:
+        raise ValueError("sqlite:// needs a database path, e.g. sqlite:///engine.db")
+    sqlite = SqliteStorage(name, synchronous=q.get("synchronous", "NORMAL"))
+    atexit.register(sqlite.close)
+    return sqlite
+
+
+def is_local(url: str) -> bool:
+    """Whether *url* names an in-process store (``memory://``, ``sqlite://``), not Valkey."""
+    return urlsplit(url).scheme in ("memory", "sqlite")
+
+
+def open_storage(url: str) -> Storage:
+    """
+    Storage for *url*:
+
+    * ``memory://[name][?snapshot=<path>&every=<s>]`` → the shared
+      :class:`MemoryStorage` *name* (created on first use);
+    * ``sqlite:///<path>[?synchronous=<mode>]`` → the shared
+      :class:`SqliteStorage` on *path* (``sqlite:////abs/path`` for an
+      absolute one, as in SQLAlchemy);
+    * anything else → a ``redis.Redis`` client with ``decode_responses=True``.
+    """
+    if not is_local(url):
+        return redis.from_url(url, decode_responses=True)  # type: ignore[no-any-return]
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite" and not parts.netloc:
+        name = parts.path[1:]
+    else:
+        name = parts.netloc + parts.path
+    with _LOCAL_LOCK:
+        store = _LOCAL.get((parts.scheme, name))
+        if store is None:
+            q = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            store = _LOCAL[parts.scheme, name] = _open_local(parts.scheme, name, q)
+        return store  # type: ignore[return-value]
+
+
+def write_batch(conn: Storage) -> AbstractContextManager[Any]:
+    """
+    Group the writes issued inside into one commit on :class:`SqliteStorage`
+    (each script still all-or-nothing, as a savepoint). Valkey and the
+    memory store have no commits to save, so elsewhere this is a no-op.
+    Only issue commands on *conn* from the calling thread inside.
+    """
+    return conn._write() if isinstance(conn, SqliteStorage) else nullcontext()
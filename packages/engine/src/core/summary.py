@@ -0,0 +1,313 @@
+"""
+Overview and dry-run maths shared by
+:class:`~core.engine_actors.ExchangeEngineActor` and the async read façade
+(:mod:`core.aio`).
+
+Everything here is pure: callers fetch the portfolio, open orders, prices,
+trade counters and investment accounts (blocking or ``await``-ed) and hand
+them in, so both paths return identical payloads.
+"""
+
+# summary.py
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Mapping
+from typing import Any, TypedDict
+
+import pandas as pd
+
+from ._types import Order
+from .constants import OrderSide
+from .logging_config import logger
+
+TRADES_INDEX_COUNT = "trades:index:count"
+TRADES_INDEX_AMOUNT = "trades:index:amount"
+TRADES_INDEX_NOTIONAL = "trades:index:notional"
+TRADES_INDEX_FEE = "trades:index:fee"
+# metric → SET of its ``trades:<side>:<base>:<metric>`` hashes
+TRADES_INDEX = {
+    "count": TRADES_INDEX_COUNT,
+    "amount": TRADES_INDEX_AMOUNT,
+    "notional": TRADES_INDEX_NOTIONAL,
+    "fee": TRADES_INDEX_FEE,
+}
+
+DEPOSITS_INDEX = "deposits:index"
+WITHDRAWALS_INDEX = "withdrawals:index"
+
+
+class CanExecuteResult(TypedDict):
+    ok: bool
+    reason: str | None
+
+
+class Summaries:
+    """
+    Mixin for the ``/overview/*`` payloads and the ``can_execute`` dry run;
+    the host provides ``cash_asset`` and ``commission``.
+    """
+
+    cash_asset: str
+    commission: float
+
+    def _can_execute(
+        self, symbol: str, side: OrderSide, amount: float, px: float, have: float
+    ) -> CanExecuteResult:
+        """*have* is the free quote balance for a BUY, the free base balance for a SELL."""
+        base, quote = symbol.split("/")
+        if side is OrderSide.BUY:
+            notion = amount * px
+            need = notion + notion * self.commission
+            ok = have >= need
+            reason = None if ok else f"need {need:.2f} {quote}, have {have:.2f}"
+        else:  # sell
+            ok = have >= amount
+            reason = None if ok else f"need {amount:.8f} {base}, have {have:.8f}"
+        return {"ok": ok, "reason": reason}
+
+    def _get_assetslist_and_tickerslist_from_portfolio(
+        self, portfolio: Mapping[str, Any]
+    ) -> tuple[list[str], list[str]]:
+        """Get a list of assets and their tickers from the portfolio.
+        This function extracts the assets from the portfolio, EXCLUDING the cash asset.
+        It returns a tuple of two lists: the first list contains the asset names,
+        the second list contains the asset tickers.
+        """
+        assets_list = [a for a in portfolio.keys() if a != self.cash_asset]
+        tickers_list = [f"{a}/{self.cash_asset}" for a in assets_list]
+        if not assets_list:
+            logger.warning("No assets found in portfolio, returning empty lists")
+            return ([], [])
+        return (assets_list, tickers_list)
+
+    def _get_summary_assets_balance(
+        self, portfolio: Mapping[str, Mapping[str, float]], prices: Mapping[str, float]
+    ) -> dict[str, float]:
+        """Get a summary of the assets in the portfolio.
+        This function calculates the total value of all assets in the portfolio.
+        It returns a dict with the total value of each asset, including cash.
+        The values are calculated based on the prices of the assets in the portfolio.
+        If there are no assets in the portfolio, it returns a dict with all values set to 0.0.
+        """
+        _assets = {}
+        assets_list, tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(portfolio)
+        cash_balance = portfolio.get(self.cash_asset)
+        if cash_balance is None:
+            cash = {"free": 0.0, "used": 0.0}
+        else:
+            # cash_balance is a dict from AssetBalance.to_dict()
+            cash = {
+                "free": cash_balance.get("free", 0.0),
+                "used": cash_balance.get("used", 0.0),
+            }
+        for a, t in zip(assets_list, tickers_list, strict=False):
+            asset_balance = {}
+            if a == self.cash_asset:
+                continue
+            if prices.get(t) is None:
+                logger.warning("No price for asset %s, skipping", t)
+                continue
+            # portfolio[a] is a dict from AssetBalance.to_dict()
+            asset_balance["free"] = portfolio[a].get("free", 0.0)
+            asset_balance["used"] = portfolio[a].get("used", 0.0)
+            asset_balance["price"] = prices[t]
+            _assets[a] = asset_balance
+        # Convert to pandas to vector operations
+        assets_pd = pd.DataFrame(_assets).T
+        # If there are no assets, return a dict with all values set to 0.0
+        if assets_pd.empty:
+            _tmp_assets_dict = {
+                "assets_free_value": 0.0,
+                "assets_frozen_value": 0.0,
+                "assets_total_value": 0.0,
+            }
+            assets_pd_summary = pd.Series(_tmp_assets_dict)
+        else:
+            assets_pd["assets_free_value"] = assets_pd["free"] * assets_pd["price"]
+            assets_pd["assets_frozen_value"] = assets_pd["used"] * assets_pd["price"]
+            assets_pd["assets_total_value"] = (
+                assets_pd["assets_free_value"] + assets_pd["assets_frozen_value"]
+            )
+            assets_pd.drop(columns=["free", "used", "price"], inplace=True)
+            assets_pd_summary = assets_pd.sum(numeric_only=True)
+        balance_value = assets_pd_summary.to_dict()
+        balance_value["cash_free_value"] = cash.get("free", 0.0)
+        balance_value["cash_frozen_value"] = cash.get("used", 0.0)
+        balance_value["cash_total_value"] = (
+            balance_value["cash_free_value"] + balance_value["cash_frozen_value"]
+        )
+        balance_value["total_free_value"] = (
+            balance_value["cash_free_value"] + balance_value["assets_free_value"]
+        )
+        balance_value["total_frozen_value"] = (
+            balance_value["cash_frozen_value"] + balance_value["assets_frozen_value"]
+        )
+        balance_value["total_equity"] = (
+            balance_value["cash_total_value"] + balance_value["assets_total_value"]
+        )
+        return balance_value
+
+    def _get_summary_assets_orders(
+        self, open_orders: list[Order], prices: dict[str, float]
+    ) -> dict[str, float]:
+        """Get a summary of the frozen assets in open orders.
+        This function calculates the total value of reserved assets and fees in open orders.
+        It returns a dict with the total reserved value of assets and quotes, and the total frozen value.
+        The values are calculated based on the prices of the assets in the open orders.
+        If there are no open orders, it returns a dict with all values set to 0.0.
+        """
+        RELEVANT_COLS = [
+            "symbol",
+            "side",
+            "amount",
+            "actual_filled",
+            "reserved_notion_left",
+            "reserved_fee_left",
+        ]
+        if not open_orders:
+            return {
+                "assets_frozen_value": 0.0,
+                "cash_frozen_value": 0.0,
+                "total_frozen_value": 0.0,
+            }
+        open_orders_pd = pd.DataFrame([o.to_dict() for o in open_orders])
+        open_orders_pd = open_orders_pd[RELEVANT_COLS]
+        open_orders_pd["price"] = open_orders_pd["symbol"].map(prices)  # type: ignore[attr-defined]
+        # We need to calculate the reserved assets, but this only makes sense for SELL orders.
+        open_orders_pd["assets_frozen_value"] = 0.0
+        open_orders_pd.loc[open_orders_pd["side"] == OrderSide.SELL, "assets_frozen_value"] = (
+            open_orders_pd["amount"] - open_orders_pd["actual_filled"]
+        ) * open_orders_pd["price"]
+        open_orders_pd["cash_frozen_value"] = (
+            open_orders_pd["reserved_notion_left"] + open_orders_pd["reserved_fee_left"]
+        )
+        open_orders_pd = open_orders_pd[["assets_frozen_value", "cash_frozen_value"]]
+        open_orders_pd_summary = open_orders_pd.sum(numeric_only=True)  # type: ignore[attr-defined]
+        orders_frozen_value = open_orders_pd_summary.to_dict()
+        orders_frozen_value["total_frozen_value"] = (
+            orders_frozen_value["assets_frozen_value"] + orders_frozen_value["cash_frozen_value"]
+        )
+        return orders_frozen_value  # type: ignore[dict-item,unused-ignore]
+
+    def _summary_assets_tickers(
+        self, portfolio: Mapping[str, Any], open_orders: list[Order]
+    ) -> list[str]:
+        """Tickers priced by :meth:`_summary_assets`: portfolio assets + open orders."""
+        tickers_list_portfolio = self._get_assetslist_and_tickerslist_from_portfolio(portfolio)[1]
+        # My expectation is that all open orders tickers are also in the portfolio,
+        # but I am not sure if this is always the case.
+        tickers_list_orders = [o.symbol for o in open_orders]
+        return list(set(tickers_list_portfolio + tickers_list_orders))
+
+    def _summary_assets(
+        self,
+        portfolio: Mapping[str, Mapping[str, float]],
+        open_orders: list[Order],
+        prices: Mapping[str, float],
+    ) -> dict[str, Any]:
+        """Balance vs. open-order valuation at one set of *prices*, and their mismatch."""
+        output = {}
+        output["balance_source"] = self._get_summary_assets_balance(portfolio, prices)
+        output["orders_source"] = self._get_summary_assets_orders(open_orders, dict(prices))
+        b_source = output["balance_source"]
+        o_source = output["orders_source"]
+        # Check for mismatches between balance and orders
+        _mismatch = {}
+        TOLERANCE = 1e-3  # in cash value units (e.g. 0.001 USDT)
+        for k in o_source.keys():
+            o_val = o_source[k]
+            b_val = b_source.get(k, 0.0)
+            if math.isclose(o_val, b_val, rel_tol=0.0, abs_tol=TOLERANCE):  # type: ignore[arg-type,unused-ignore]
+                _mismatch[k] = False
+            else:
+                _mismatch[k] = True
+
+        output["misc"] = {  # type: ignore[dict-item]
+            "cash_asset": self.cash_asset,
+            "mismatch": _mismatch,
+        }
+        return output  # type: ignore[return-value]
+
+    # ---------- trade stats ------------------------------------------- #
+    @staticmethod
+    def _trade_filters(
+        side: OrderSide | str | None, assets: list[str] | str | None
+    ) -> tuple[list[OrderSide], list[str] | None]:
+        """Normalise the ``get_trade_stats`` filters: sides to report, assets to keep."""
+        if isinstance(side, str):
+            side = OrderSide(side)
+        if isinstance(assets, str):
+            assets = [assets]
+        return ([side] if side else [OrderSide.BUY, OrderSide.SELL]), assets
+
+    @staticmethod
+    def _trade_stat_keys(
+        keys: Iterable[str], side: OrderSide, assets: list[str] | None
+    ) -> list[tuple[str, str]]:
+        """``(base, key)`` for the ``trades:<side>:<base>:<metric>`` hashes to read."""
+        out = []
+        for k in keys:
+            parts = k.split(":")
+            if parts[1] != side.value or (assets and parts[2] not in assets):
+                continue
+            out.append((parts[2], k))
+        return out
+
+    # ---------- capital ----------------------------------------------- #
+    @staticmethod
+    def _investment_assets(
+        deposit_keys: Iterable[str], withdrawal_keys: Iterable[str]
+    ) -> list[str]:
+        """Assets with a ``deposits:<asset>`` or ``withdrawals:<asset>`` account."""
+        return list({key.split(":")[1] for key in (*deposit_keys, *withdrawal_keys)})
+
+    @staticmethod
+    def _fmt_investment(d: Mapping[str, str]) -> dict[str, Any]:
+        FLOAT_KEYS = ("asset_quantity", "ref_value")
+        return {k: float(v) if k in FLOAT_KEYS else v for k, v in d.items()}
+
+    def _summary_capital(
+        self,
+        balance: dict[str, Any],
+        prices: Mapping[str, float],
+        investment_accounts: Mapping[str, Mapping[str, Any]],
+        aggregation: bool,
+    ) -> dict[str, Any]:
+        """Value *balance* at *prices* and set it against deposits / withdrawals."""
+        assets_list, tickers_list = self._get_assetslist_and_tickerslist_from_portfolio(balance)
+        for a, t in zip(assets_list, tickers_list, strict=False):
+            _price = prices.get(t)
+            balance[a]["price"] = _price
+            balance[a]["value"] = _price * balance[a]["total"]
+        if balance.get(self.cash_asset) is not None:
+            balance[self.cash_asset]["price"] = 1.0  # cash asset is always 1.0
+            balance[self.cash_asset]["value"] = balance[self.cash_asset]["total"]
+        # AGGREGATION ----------------------------------------
+        # If aggregation is requested, we will aggregate the investment accounts
+        # by summing up the free and used amounts for each asset.
+        # This will give us a total capital in the portfolio.
+        if aggregation:
+            # Aggregate the investment accounts
+            equity = 0.0
+            deposits = 0.0
+            withdrawals = 0.0
+            for b in balance.values():
+                equity += b["value"]
+            for invest in investment_accounts.values():
+                deposits += invest.get("deposits", {}).get("ref_value", 0.0)  # type: ignore[union-attr,call-overload]
+                withdrawals += invest.get("withdrawals", {}).get("ref_value", 0.0)  # type: ignore[union-attr,call-overload]
+            # Prepare the output
+            output = {
+                "equity": equity,
+                "deposits": deposits,
+                "withdrawals": withdrawals,
+                "profit_loss": equity - (deposits - withdrawals),
+            }
+            return output
+        else:
+            # If aggregation is not requested, we will return the balance and investment accounts as is
+            return {
+                "balance": balance,
+                "investment_assets": investment_accounts,
+            }
@@ -0,0 +1,44 @@
+"""
+End-to-end check for **batch order placement** (``POST /orders/batch``).
+
+Goals
+~~~~~
+1. One request places many orders and returns one result per item, in order.
+2. Funds are checked *cumulatively*: once the earlier items of the batch
+   have locked the cash, a later item that no longer fits is rejected.
+3. Invalid items (unknown ticker) are reported inline without failing the
+   rest of the batch.
+"""
+
+# --------------------------------------------------------------------------- #
+# Imports & helpers
+# --------------------------------------------------------------------------- #
+from .helpers import get_ticker_price, reset_and_deposit
+
+QUOTE = "USDT"
+SYMBOL = f"BTC/{QUOTE}"
+N_ORDERS = 4
+
+
+def test_batch_orders_check_funds_cumulatively(client):
+    px = get_ticker_price(client, SYMBOL)
+    limit_px = px / 2  # resting buy orders, never filled during the test
+    per_order = limit_px * 1.0 * 1.01  # notional + generous fee head-room
+    reset_and_deposit(client, QUOTE, per_order * (N_ORDERS - 0.5))
+
+    order = {"symbol": SYMBOL, "side": "buy", "type": "limit", "amount": 1.0}
+    payload = [{**order, "limit_price": limit_px} for _ in range(N_ORDERS)]
+    payload.append({**order, "symbol": "NOPE/USDT", "limit_price": 1.0})
+
+    resp = client.post("/orders/batch", json=payload)
+    resp.raise_for_status()
+    results = resp.json()
+
+    assert len(results) == N_ORDERS + 1
+    assert [r["status"] for r in results[: N_ORDERS - 1]] == ["new"] * (N_ORDERS - 1)
+    assert results[N_ORDERS - 1]["status"] == "rejected"  # no cash left for the last one
+    assert "error" in results[-1]
+
+    bal = client.get(f"/balance/{QUOTE}").json()
+    reserved = sum(r["initial_booked_notion"] + r["initial_booked_fee"] for r in results[:-1])
+    assert abs(bal["used"] - reserved) < 1e-6
@@ -0,0 +1,49 @@
+"""
+End-to-end check for **bulk cancel** (``POST /orders/cancel``).
+
+Goals
+~~~~~
+1. Filters (``symbol`` / ``ids``) only touch the matching open orders.
+2. Everything reserved by the canceled orders is freed in one call.
+3. ``all=true`` flattens the book; unknown / closed ids are reported back.
+"""
+
+# --------------------------------------------------------------------------- #
+# Imports & helpers
+# --------------------------------------------------------------------------- #
+from .helpers import assert_no_locked_funds, get_ticker_price, reset_and_deposit
+
+QUOTE = "USDT"
+SYMBOLS = [f"BTC/{QUOTE}", f"ETH/{QUOTE}"]
+N_PER_SYMBOL = 3
+
+
+def test_bulk_cancel_releases_everything(client):
+    reset_and_deposit(client, QUOTE, 1_000_000)
+    payload = []
+    for sym in SYMBOLS:
+        limit_px = get_ticker_price(client, sym) / 2  # resting, never filled
+        payload += [
+            {"symbol": sym, "side": "buy", "type": "limit", "amount": 0.1, "limit_price": limit_px}
+        ] * N_PER_SYMBOL
+    resp = client.post("/orders/batch", json=payload)
+    resp.raise_for_status()
+    orders = resp.json()
+
+    # 1️⃣  by symbol – only that symbol's orders go
+    res = client.post("/orders/cancel", json={"symbol": SYMBOLS[0]}).json()
+    assert len(res["canceled_orders"]) == N_PER_SYMBOL
+    assert {o["symbol"] for o in res["canceled_orders"]} == {SYMBOLS[0]}
+    assert res["freed"][QUOTE] > 0
+
+    # 2️⃣  by ids – an already-canceled id is skipped
+    ids = [orders[0]["id"], orders[-1]["id"]]
+    res = client.post("/orders/cancel", json={"ids": ids}).json()
+    assert [o["id"] for o in res["canceled_orders"]] == [orders[-1]["id"]]
+    assert res["skipped"] == [orders[0]["id"]]
+
+    # 3️⃣  everything else, then nothing may stay locked
+    res = client.post("/orders/cancel", json={"all": True}).json()
+    assert len(res["canceled_orders"]) == N_PER_SYMBOL - 1
+    assert client.post("/orders/cancel", json={}).status_code == 400
+    assert_no_locked_funds(client)
@@ -0,0 +1,59 @@
+"""
+End-to-end check for **order amendment** (``PATCH /orders/{oid}``).
+
+Goals
+~~~~~
+1. Raising / lowering the limit price keeps the order id and moves only the
+   reservation delta.
+2. Shrinking the amount frees the difference; the balance stays consistent.
+3. An amendment that does not fit the free balance is refused unchanged.
+"""
+
+# --------------------------------------------------------------------------- #
+# Imports & helpers
+# --------------------------------------------------------------------------- #
+from .helpers import (
+    assert_no_locked_funds,
+    cancel_order,
+    get_ticker_price,
+    place_order,
+    reset_and_deposit,
+)
+
+QUOTE = "USDT"
+SYMBOL = f"BTC/{QUOTE}"
+DEPOSIT = 1_000_000
+
+
+def _used(client, asset):
+    return client.get("/balance").json()[asset]["used"]
+
+
+def test_amend_moves_only_the_delta(client):
+    reset_and_deposit(client, QUOTE, DEPOSIT)
+    limit_px = get_ticker_price(client, SYMBOL) / 4  # resting, never filled
+    order = place_order(
+        client,
+        {"symbol": SYMBOL, "side": "buy", "type": "limit", "amount": 1, "limit_price": limit_px},
+    )
+    used_before = _used(client, QUOTE)
+
+    # 1️⃣  higher price – same id, more reserved
+    res = client.patch(f"/orders/{order['id']}", json={"limit_price": limit_px * 2}).json()
+    assert res["amended_order"]["id"] == order["id"]
+    assert res["amended_order"]["limit_price"] == limit_px * 2
+    assert res["reserved"][QUOTE] > 0
+    assert _used(client, QUOTE) > used_before
+
+    # 2️⃣  smaller amount – the difference comes back
+    res = client.patch(f"/orders/{order['id']}", json={"amount": 0.5}).json()
+    assert res["reserved"][QUOTE] < 0
+    assert abs(_used(client, QUOTE) - used_before) < 1e-6
+
+    # 3️⃣  too big – refused, nothing changes
+    res = client.patch(f"/orders/{order['id']}", json={"amount": DEPOSIT}).json()
+    assert "error" in res
+    assert abs(_used(client, QUOTE) - used_before) < 1e-6
+
+    cancel_order(client, order["id"])
+    assert_no_locked_funds(client)
@@ -0,0 +1,55 @@
+"""
+End-to-end check for the **bulk order lookup** (``POST /orders/query``).
+
+Goals
+~~~~~
+1. Known ids come back in request order, unknown ids under ``missing``.
+2. ``fields`` projects every order down to the requested keys (+ ``id``).
+3. Unknown field names are rejected.
+"""
+
+# --------------------------------------------------------------------------- #
+# Imports & helpers
+# --------------------------------------------------------------------------- #
+from .helpers import get_ticker_price, place_order, reset_and_deposit
+
+QUOTE = "USDT"
+SYMBOL = f"BTC/{QUOTE}"
+N_ORDERS = 5
+
+
+def test_query_orders_by_ids(client):
+    reset_and_deposit(client, QUOTE, 1_000_000)
+    limit_px = get_ticker_price(client, SYMBOL) / 2  # resting, never filled
+    ids = [
+        place_order(
+            client,
+            {
+                "symbol": SYMBOL,
+                "side": "buy",
+                "type": "limit",
+                "amount": 0.1,
+                "limit_price": limit_px,
+            },
+        )["id"]
+        for _ in range(N_ORDERS)
+    ]
+
+    # 1️⃣  request order kept, unknown ids reported
+    wanted = [*reversed(ids), "does-not-exist"]
+    res = client.post("/orders/query", json={"ids": wanted}).json()
+    assert [o["id"] for o in res["orders"]] == ids[::-1]
+    assert res["missing"] == ["does-not-exist"]
+
+    # 2️⃣  projection + history
+    res = client.post(
+        "/orders/query", json={"ids": ids, "fields": ["status"], "include_history": True}
+    ).json()
+    for o in res["orders"]:
+        assert set(o) == {"id", "status", "history"}
+        assert o["status"] == "new"
+        assert len(o["history"]) >= 1
+
+    # 3️⃣  bad input
+    assert client.post("/orders/query", json={"ids": ids, "fields": ["nope"]}).status_code == 400
+    assert client.post("/orders/query", json={"ids": []}).status_code == 400
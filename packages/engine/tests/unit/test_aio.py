@@ -0,0 +1,203 @@
+"""
+Unit tests for the asyncio read façade.
+"""
+
+import asyncio
+import math
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+import redis.asyncio as aioredis
+
+from core._types import AssetBalance, Order, OrderSide, OrderType
+from core.aio import (
+    AsyncEngine,
+    AsyncMarket,
+    AsyncOrderBook,
+    AsyncPortfolio,
+    keyspace_channel,
+)
+from core.codec import CompactCodec
+from core.engine_actors import ExchangeEngineActor
+
+
+def _blob(oid, ts, status="new"):
+    return CompactCodec().encode_order(
+        Order(
+            id=oid,
+            symbol="BTC/USDT",
+            side=OrderSide.BUY,
+            type=OrderType.LIMIT,
+            amount=1.0,
+            notion_currency="USDT",
+            fee_currency="USDT",
+            fee_rate=0.001,
+            limit_price=1.0,
+            status=status,
+            ts_update=ts,
+        )
+    )
+
+
+class TestAsyncReaders(unittest.TestCase):
+    """Test cases for AsyncMarket / AsyncPortfolio / AsyncOrderBook."""
+
+    def test_portfolio_all_reads_numeric_and_legacy_rows(self):
+        mock_redis = Mock()
+        mock_redis.hgetall = AsyncMock(
+            return_value={
+                "BTC:free": "1.5",
+                "BTC:used": "0.5",
+                "ETH": '{"asset": "ETH", "free": 2.0, "used": 0.0}',
+            }
+        )
+        balances = asyncio.run(AsyncPortfolio(mock_redis).all())
+        assert balances == {
+            "BTC": AssetBalance("BTC", 1.5, 0.5),
+            "ETH": AssetBalance("ETH", 2.0, 0.0),
+        }
+
+    def test_fetch_tickers_is_one_pipeline(self):
+        """Unknown tickers map to None; every HGETALL shares one round trip."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute = AsyncMock(return_value=[{"price": "100", "timestamp": "1"}, {}])
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        ticks = asyncio.run(AsyncMarket(mock_redis).fetch_tickers(["BTC/USDT", "XX/USDT"]))
+
+        assert ticks["BTC/USDT"].price == 100.0
+        assert ticks["XX/USDT"] is None
+        mock_pipeline.hgetall.assert_any_call("tickers:BTC/USDT")
+        mock_pipeline.execute.assert_awaited_once()
+
+    def test_page_matches_the_blocking_walk(self):
+        """Same cursor semantics as OrderBook.page (score + ids passed at it)."""
+        blobs = {"o1": _blob("o1", 10), "o2": _blob("o2", 20), "o3": _blob("o3", 20)}
+        mock_redis = Mock()
+        mock_redis.zrangebyscore = AsyncMock(return_value=[("o1", 10.0), ("o2", 20.0)])
+        mock_redis.hmget = AsyncMock(side_effect=lambda _key, ids: [blobs[i] for i in ids])
+        orderbook = AsyncOrderBook(mock_redis)
+
+        orders, cursor = asyncio.run(orderbook.page(limit=2))
+
+        assert [o.id for o in orders] == ["o1", "o2"]
+        assert orderbook.decode_cursor(cursor) == (20.0, 1)
+        mock_redis.zrangebyscore.assert_awaited_once_with(
+            "orders:ts", -math.inf, math.inf, start=0, num=2, withscores=True
+        )
+
+    def test_list_open_orders_uses_the_open_set(self):
+        mock_redis = Mock()
+        mock_redis.smembers = AsyncMock(return_value={"o1", "o2"})
+        mock_redis.hmget = AsyncMock(return_value=[_blob("o1", 10), _blob("o2", 20, "filled")])
+
+        orders = asyncio.run(AsyncOrderBook(mock_redis).list(status="new", symbol="BTC/USDT"))
+
+        assert [o.id for o in orders] == ["o1"]  # stale set entry filtered out
+        mock_redis.smembers.assert_awaited_once_with("open:BTC/USDT")
+
+    def test_lookup_is_one_round_trip(self):
+        """Duplicates collapse, missing ids are reported, history rides the same pipeline."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute = AsyncMock(return_value=[[_blob("o1", 10), None], [], []])
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        found, missing = asyncio.run(
+            AsyncOrderBook(mock_redis).lookup(["o1", "nope", "o1"], include_history=True)
+        )
+
+        assert [o.id for o in found] == ["o1"]
+        assert missing == ["nope"]
+        mock_pipeline.hmget.assert_called_once_with("orders", ["o1", "nope"])
+        assert mock_pipeline.lrange.call_count == 2
+        mock_pipeline.execute.assert_awaited_once()
+
+    def test_iter_walks_every_page(self):
+        blobs = {"o1": _blob("o1", 10), "o2": _blob("o2", 20), "o3": _blob("o3", 30)}
+        mock_redis = Mock()
+        mock_redis.zrangebyscore = AsyncMock(
+            side_effect=[[("o1", 10.0), ("o2", 20.0)], [("o3", 30.0)]]
+        )
+        mock_redis.hmget = AsyncMock(side_effect=lambda _key, ids: [blobs[i] for i in ids])
+
+        async def collect():
+            return [o.id async for o in AsyncOrderBook(mock_redis).iter(chunk=2)]
+
+        assert asyncio.run(collect()) == ["o1", "o2", "o3"]
+        assert mock_redis.zrangebyscore.await_count == 2
+
+
+class TestAsyncEngine(unittest.TestCase):
+    """Test cases for AsyncEngine.can_execute."""
+
+    def setUp(self):
+        self.engine = AsyncEngine("redis://localhost:6379/0", commission=0.001)
+        self.engine.market = Mock()
+        self.engine.market.fetch_ticker = AsyncMock(return_value=Mock(price=100.0))
+        self.engine.portfolio = Mock()
+
+    def test_buy_needs_notional_plus_fee(self):
+        self.engine.portfolio.get = AsyncMock(return_value=AssetBalance("USDT", 100.0, 0.0))
+
+        res = asyncio.run(
+            self.engine.can_execute(symbol="BTC/USDT", side=OrderSide.BUY, amount=1.0)
+        )
+
+        assert res == {"ok": False, "reason": "need 100.10 USDT, have 100.00"}
+        self.engine.portfolio.get.assert_awaited_once_with("USDT")
+
+    def test_sell_uses_base_balance_and_given_price(self):
+        self.engine.portfolio.get = AsyncMock(return_value=AssetBalance("BTC", 2.0, 0.0))
+
+        res = asyncio.run(
+            self.engine.can_execute(symbol="BTC/USDT", side=OrderSide.SELL, amount=1.5, price=120.0)
+        )
+
+        assert res == {"ok": True, "reason": None}
+        self.engine.market.fetch_ticker.assert_not_awaited()
+        self.engine.portfolio.get.assert_awaited_once_with("BTC")
+
+
+class TestAsyncEngineOnLocalStorage(unittest.TestCase):
+    """AsyncEngine on ``memory://`` reads the engine's in-process store."""
+
+    def test_reads_what_the_engine_wrote(self):
+        url = "memory://aio-test"
+        engine = ExchangeEngineActor(redis_url=url, commission=0.001, inline=True)
+        self.addCleanup(engine.redis.flushdb)
+        engine.redis.hset("tickers:BTC/USDT", mapping={"price": 100, "timestamp": 1})
+        engine.deposit_asset("USDT", 1000)
+        placed = engine.create_order(
+            symbol="BTC/USDT", side="buy", type="limit", amount=1, limit_price=90
+        )
+        aio = AsyncEngine(url)
+
+        async def read():
+            try:
+                return (
+                    await aio.tickers(),
+                    await aio.fetch_balance("USDT"),
+                    await aio.order_book.list(status="new"),
+                )
+            finally:
+                await aio.aclose()
+
+        tickers, balance, orders = asyncio.run(read())
+        assert aio.pool is None
+        assert tickers == ["BTC/USDT"]
+        assert balance == engine.fetch_balance("USDT")
+        assert [o.id for o in orders] == [placed["id"]]
+
+
+class TestKeyspaceChannel(unittest.TestCase):
+    """Test cases for keyspace_channel."""
+
+    def test_channel_names_the_db_of_the_url(self):
+        for url, channel in [
+            ("redis://localhost:6379", "__keyspace@0__:tickers:"),
+            ("redis://localhost:6379/3", "__keyspace@3__:tickers:"),
+        ]:
+            conn = aioredis.from_url(url, decode_responses=True)  # connects lazily
+            assert keyspace_channel(conn, "tickers:") == channel
@@ -0,0 +1,108 @@
+"""
+Unit tests for the AtomicBatch class.
+"""
+
+import unittest
+from unittest.mock import Mock
+
+import pytest
+
+from core.atomic import AtomicBatch, InsufficientFunds, LeaseLost, WriteConflict
+
+
+class TestAtomicBatch(unittest.TestCase):
+    """Test cases for the AtomicBatch class."""
+
+    def test_ops_are_flattened_into_one_script_call(self):
+        """Balance moves and writes travel as <name> <argc> <args…> in one EVALSHA."""
+        mock_redis = Mock()
+        script = mock_redis.register_script.return_value
+        script.return_value = ["ok", "10.5", "2"]
+
+        batch = AtomicBatch(mock_redis)
+        batch.reserve("USDT", 10.5)
+        batch.hset("orders", "o1", "{}")
+        batch.zadd("open:px:BTC/USDT:buy", {"o1": float("inf")})
+        batch.release("BTC", 3)
+        batch.srem_if_empty("open:BTC/USDT", "open:symbols", "BTC/USDT")
+
+        assert batch.execute() == [10.5, 2.0]
+        script.assert_called_once_with(
+            keys=["balances"],
+            args=[
+                "reserve", 2, "USDT", "10.5",
+                "HSET", 3, "orders", "o1", "{}",
+                "ZADD", 3, "open:px:BTC/USDT:buy", "inf", "o1",
+                "release", 2, "BTC", "3.0",
+                "srem_if_empty", 3, "open:BTC/USDT", "open:symbols", "BTC/USDT",
+            ],
+        )  # fmt: skip
+        assert len(batch) == 0
+
+    def test_insufficient_funds(self):
+        """A failed reservation raises with the asset and what was free."""
+        mock_redis = Mock()
+        script = mock_redis.register_script.return_value
+        script.return_value = ["insufficient", "reserve", "USDT", "4.5"]
+
+        batch = AtomicBatch(mock_redis).reserve("USDT", 10)
+
+        with pytest.raises(InsufficientFunds, match="insufficient USDT to reserve") as exc:
+            batch.execute()
+        assert exc.value.asset == "USDT"
+        assert exc.value.have == 4.5
+
+    def test_require_checks_total(self):
+        """A failed requirement reports the total balance the script saw."""
+        mock_redis = Mock()
+        script = mock_redis.register_script.return_value
+        script.return_value = ["insufficient", "require", "BTC", "0.5"]
+
+        batch = AtomicBatch(mock_redis).require("BTC", 1)
+
+        with pytest.raises(InsufficientFunds, match="insufficient BTC") as exc:
+            batch.execute()
+        assert exc.value.op == "require"
+        script.assert_called_once_with(
+            keys=["balances"], args=["require", 3, "BTC", "1.0", "1e-12"]
+        )
+
+    def test_debit_is_checked_like_a_reservation(self):
+        """A debit larger than the free balance fails the batch and names the op."""
+        mock_redis = Mock()
+        script = mock_redis.register_script.return_value
+        script.return_value = ["insufficient", "debit", "USDT", "3"]
+
+        with pytest.raises(InsufficientFunds) as exc:
+            AtomicBatch(mock_redis).debit("USDT", 5).execute()
+
+        assert exc.value.op == "debit"
+        assert exc.value.have == 3.0
+        script.assert_called_once_with(keys=["balances"], args=["debit", 2, "USDT", "5.0"])
+
+    def test_guards_abort_the_batch(self):
+        """A moved history or a lost lease raise, naming the key the script checked."""
+        mock_redis = Mock()
+        script = mock_redis.register_script.return_value
+        script.side_effect = [["conflict", "orders:o1:hist"], ["fenced", "engine:lease:0"]]
+
+        batch = AtomicBatch(mock_redis).fence("engine:lease:0", "7")
+        batch.expect_len("orders:o1:hist", 2)
+        assert script.call_count == 0
+        with pytest.raises(WriteConflict) as conflict:
+            batch.execute()
+        with pytest.raises(LeaseLost) as lost:
+            AtomicBatch(mock_redis).fence("engine:lease:0", "7").execute()
+
+        assert conflict.value.key == "orders:o1:hist"
+        assert lost.value.key == "engine:lease:0"
+        assert script.call_args_list[0].kwargs["args"] == [
+            "fence", 2, "engine:lease:0", "7",
+            "expect_len", 2, "orders:o1:hist", 2,
+        ]  # fmt: skip
+
+    def test_empty_batch_skips_round_trip(self):
+        """Nothing queued, nothing sent."""
+        mock_redis = Mock()
+        assert AtomicBatch(mock_redis).execute() == []
+        mock_redis.register_script.return_value.assert_not_called()
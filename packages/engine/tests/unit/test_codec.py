@@ -0,0 +1,102 @@
+"""
+Unit tests for the order codecs.
+"""
+
+import json
+import unittest
+from unittest.mock import Mock
+
+import pytest
+
+from core._types import Order, OrderHistory, OrderSide, OrderState, OrderType
+from core.codec import CompactCodec, JsonCodec, is_compact
+from core.orderbook import OrderBook
+
+
+def _order(**kw):
+    base = {
+        "id": "o1",
+        "symbol": "BTC/USDT",
+        "side": OrderSide.SELL,
+        "type": OrderType.LIMIT,
+        "amount": 1.5,
+        "notion_currency": "USDT",
+        "fee_currency": "USDT",
+        "fee_rate": 0.001,
+        "limit_price": 101.0,
+        "status": OrderState.PARTIALLY_FILLED,
+    }
+    base.update(kw)
+    return Order(**base)
+
+
+class TestCodec(unittest.TestCase):
+    """Test cases for JsonCodec / CompactCodec."""
+
+    def test_compact_round_trip(self):
+        """Positional blob decodes to the same order, enums included."""
+        codec = CompactCodec()
+        order = _order(comment="partial")
+        blob = codec.encode_order(order)
+
+        assert is_compact(blob)
+        assert "symbol" not in blob  # no field names
+        decoded = codec.decode_order(blob)
+        assert decoded.to_dict(include_history=False) == order.to_dict(include_history=False)
+        assert decoded.side is OrderSide.SELL
+        assert decoded.status is OrderState.PARTIALLY_FILLED
+        assert decoded.history == {}
+        assert decoded._history_saved == order.history_count
+
+    def test_compact_blob_is_smaller(self):
+        order = _order()
+        assert len(CompactCodec().encode_order(order)) < len(JsonCodec().encode_order(order)) / 2
+
+    def test_reads_both_formats(self):
+        """Either codec decodes legacy JSON objects and compact arrays."""
+        order = _order()
+        entry = OrderHistory(ts=1, status="filled", price=100.0)
+        for codec in (JsonCodec(), CompactCodec()):
+            for writer in (JsonCodec(), CompactCodec()):
+                o = codec.decode_order(writer.encode_order(order))
+                assert o.to_dict(include_history=False) == order.to_dict(include_history=False)
+                assert codec.decode_history(writer.encode_history(entry)) == entry
+
+    def test_blob_bytes_match_the_stdlib_spelling(self):
+        """orjson and the json fallback write the same text, non-ASCII included."""
+        blob = CompactCodec().encode_order(_order(comment="stop-loss ≥ 5 % – café"))
+        assert "≥" in blob  # raw UTF-8, not \u2265
+        assert blob == json.dumps(json.loads(blob), ensure_ascii=False, separators=(",", ":"))
+
+    def test_unknown_version_is_rejected(self):
+        with pytest.raises(ValueError, match="Unsupported compact blob version"):
+            CompactCodec().decode_order('[99,"o1"]')
+
+    def test_migrate_codec_rewrites_stale_blobs_with_cas(self):
+        """Only blobs in another format are re-encoded, each as a compare-and-set."""
+        legacy = JsonCodec().encode_order(_order())
+        current = CompactCodec().encode_order(_order(id="o2"))
+        entry = OrderHistory(ts=1, status="new").to_json()
+
+        mock_redis = Mock()
+        mock_redis.hscan.return_value = (0, {"o1": legacy, "o2": current})
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        mock_pipeline.execute.return_value = [[entry], []]
+        orderbook = OrderBook(mock_redis)
+        orderbook._cas_hset = Mock(return_value=1)
+        orderbook._cas_lset = Mock(return_value=1)
+
+        assert orderbook.migrate_codec() == 2
+        orderbook._cas_hset.assert_called_once_with(
+            keys=["orders"], args=["o1", legacy, CompactCodec().recode(legacy)]
+        )
+        orderbook._cas_lset.assert_called_once_with(
+            args=["orders:hist:o1", 0, entry, CompactCodec().recode(entry, history=True)]
+        )
+
+    def test_ensure_codec_skips_when_migrated(self):
+        mock_redis = Mock()
+        mock_redis.get.return_value = "compact"
+        OrderBook(mock_redis).ensure_codec()
+        mock_redis.hscan.assert_not_called()
@@ -0,0 +1,146 @@
+"""
+Unit tests for the inline store proxy and the matching shards of the engine actor.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from core.engine_actors import (
+    SETTLE_DUE_KEY,
+    ExchangeEngineActor,
+    MatchingShardActor,
+    _InlineProxy,
+    shard_of,
+)
+from core.market import Market
+
+
+class TestInlineProxy(unittest.TestCase):
+    """Test cases for _InlineProxy."""
+
+    def test_method_calls_resolve_like_a_future(self):
+        mock_redis = Mock()
+        mock_redis.hgetall.return_value = {"price": "100", "timestamp": "1"}
+        market = _InlineProxy(Market(mock_redis))
+
+        assert market.last_price("BTC/USDT").get() == 100.0
+        assert market.last_price("BTC/USDT").get(timeout=1) == 100.0
+        mock_redis.hgetall.assert_called_with("tickers:BTC/USDT")
+
+    def test_properties_are_read_on_every_access(self):
+        mock_redis = Mock()
+        mock_redis.scan_iter.side_effect = [["tickers:BTC/USDT"], ["tickers:ETH/USDT"]]
+        market = _InlineProxy(Market(mock_redis))
+
+        assert market.tickers.get() == ["BTC/USDT"]
+        assert market.tickers.get() == ["ETH/USDT"]
+
+    def test_errors_raise_at_the_call(self):
+        mock_redis = Mock()
+        mock_redis.hgetall.return_value = {}
+        market = _InlineProxy(Market(mock_redis))
+
+        with self.assertRaises(RuntimeError):
+            market.last_price("XX/USDT")
+        with self.assertRaises(AttributeError):
+            market.no_such_method  # noqa: B018
+
+    @patch("core.engine_actors.MarketActor.start")
+    @patch("core.storage.redis.from_url")
+    def test_inline_engine_starts_no_child_actors(self, mock_from_url, mock_start):
+        engine = ExchangeEngineActor(redis_url="redis://x", commission=0.0, inline=True)
+
+        mock_start.assert_not_called()
+        assert mock_from_url.call_count == 1  # one client, shared by every store
+        assert engine.market._target is engine._market_store
+        assert engine.order_book._target is engine._order_store
+
+
+class TestMatchingShards(unittest.TestCase):
+    """Test cases for shard_of / MatchingShardActor."""
+
+    def test_shard_of_is_stable_and_spreads_symbols(self):
+        symbols = [f"S{i}/USDT" for i in range(64)]
+        assert shard_of("BTC/USDT", 4) == 3  # crc32 – same in every process
+        assert {shard_of(s, 4) for s in symbols} == {0, 1, 2, 3}
+        assert all(shard_of(s, 1) == 0 for s in symbols)
+
+    @patch("core.storage.redis.from_url")
+    def test_shard_sweeps_only_its_symbols(self, mock_from_url):
+        mock_from_url.return_value.smembers.return_value = {"BTC/USDT", "ETH/USDT", "SOL/USDT"}
+        shards = [
+            MatchingShardActor(
+                redis_url="redis://x", commission=0.0, cash_asset="USDT", index=i, shards=2
+            )
+            for i in range(2)
+        ]
+
+        owned = [shard.active_symbols() for shard in shards]
+
+        assert sorted(owned[0] + owned[1]) == ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+        for i, symbols in enumerate(owned):
+            assert all(shard_of(s, 2) == i for s in symbols)
+
+    def test_shard_admits_a_market_order_onto_the_settle_queue(self):
+        shard = MatchingShardActor(
+            redis_url="memory://shard-test", commission=0.0, cash_asset="USDT", index=0, shards=1
+        )
+        db = shard.redis
+        self.addCleanup(db.flushdb)
+        db.hset("tickers:BTC/USDT", mapping={"price": 100, "bid": 100, "ask": 100, "timestamp": 1})
+        shard.deposit_asset("USDT", 1000)
+
+        order = shard.create_order(symbol="BTC/USDT", side="buy", type="market", amount=1)
+
+        assert db.zscore(SETTLE_DUE_KEY, order["id"]) is not None
+
+    @patch("core.storage.redis.from_url")
+    def test_engine_rejects_zero_shards(self, mock_from_url):
+        with self.assertRaises(ValueError):
+            ExchangeEngineActor(redis_url="redis://x", commission=0.0, inline=True, shards=0)
+
+    @patch("core.storage.redis.from_url")
+    def test_sweep_without_the_lease_touches_nothing(self, mock_from_url):
+        engine = ExchangeEngineActor(redis_url="redis://x", commission=0.0, inline=True)
+
+        assert engine.process_price_ticks(leases={1: "7"})["symbols"] == 0
+        mock_from_url.return_value.smembers.assert_not_called()
+        assert engine._fence is None
+
+
+class TestBatchAdmission(unittest.TestCase):
+    """Test cases for ExchangeEngineActor.create_orders."""
+
+    def test_incomplete_items_fail_alone(self):
+        engine = ExchangeEngineActor(redis_url="memory://batch-test", commission=0.0, inline=True)
+        db = engine.redis
+        self.addCleanup(db.flushdb)
+        db.hset("tickers:BTC/USDT", mapping={"price": 100, "bid": 100, "ask": 100, "timestamp": 1})
+        engine.deposit_asset("USDT", 1000)
+
+        ok = {"symbol": "BTC/USDT", "side": "buy", "type": "limit", "amount": 1, "limit_price": 90}
+        results = engine.create_orders(
+            [
+                {k: v for k, v in ok.items() if k != "symbol"},
+                {k: v for k, v in ok.items() if k != "amount"},
+                {**ok, "amount": None},
+                ok,
+            ]
+        )
+
+        assert results[0] == {"error": "missing field 'symbol'"}
+        assert results[1] == {"error": "missing field 'amount'"}
+        assert "error" in results[2]
+        assert results[3]["status"] == "new"
+
+
+class TestBulkCancel(unittest.TestCase):
+    """Test cases for ExchangeEngineActor.cancel_orders."""
+
+    def test_skipped_ids_keep_the_request_order(self):
+        engine = ExchangeEngineActor(redis_url="memory://cancel-test", commission=0.0, inline=True)
+        self.addCleanup(engine.redis.flushdb)
+
+        res = engine.cancel_orders(ids=["zz", "aa", "zz", "mm"])
+
+        assert res == {"canceled_orders": [], "freed": {}, "skipped": ["zz", "aa", "mm"]}
@@ -0,0 +1,61 @@
+"""
+Unit tests for the ShardLeases class.
+"""
+
+import unittest
+from unittest.mock import Mock
+
+import pytest
+
+from core.lease import ShardLeases
+
+
+def _leases(workers: int, shards: int = 4) -> tuple[ShardLeases, Mock, Mock]:
+    mock_redis = Mock()
+    mock_redis.pipeline.return_value.execute.return_value = [1, 0, workers]
+    acquire, release = Mock(), Mock()
+    mock_redis.register_script.side_effect = [acquire, release]
+    return ShardLeases(mock_redis, shards=shards, owner="w1", ttl_ms=1000), acquire, release
+
+
+class TestShardLeases(unittest.TestCase):
+    """Test cases for the ShardLeases class."""
+
+    def test_takes_up_to_the_fair_share(self):
+        """Two live workers over four shards: this one stops after two leases."""
+        leases, acquire, release = _leases(workers=2)
+        acquire.side_effect = [None, "5", "6"]  # first shard tried is held elsewhere
+
+        held = leases.refresh()
+
+        assert len(held) == 2
+        assert sorted(held.values()) == ["5", "6"]
+        assert acquire.call_count == 3
+        release.assert_not_called()
+        assert leases.key(3) == "engine:lease:3"
+
+    def test_renews_held_leases_first_and_hands_back_the_excess(self):
+        """When a worker joins, the leases above the new fair share are released."""
+        leases, acquire, release = _leases(workers=2)
+        leases.held = {0: "1", 1: "2", 2: "3"}
+        acquire.side_effect = ["1", "2"]
+
+        assert leases.refresh() == {0: "1", 1: "2"}
+        first = acquire.call_args_list[0].kwargs
+        assert first["keys"] == ["engine:lease:0", "engine:lease:0:token"]
+        assert first["args"] == ["1", 1000]  # renew with the token we hold
+        release.assert_called_once_with(keys=["engine:lease:2"], args=["3"])
+
+    def test_release_hands_back_everything(self):
+        leases, _, release = _leases(workers=1)
+        leases.held = {0: "1"}
+
+        leases.release()
+
+        assert leases.held == {}
+        release.assert_called_once_with(keys=["engine:lease:0"], args=["1"])
+        leases.r.zrem.assert_called_once_with("engine:workers", "w1")
+
+    def test_rejects_zero_shards(self):
+        with pytest.raises(ValueError):
+            ShardLeases(Mock(), shards=0, owner="w1")
@@ -161,6 +161,27 @@ class TestMarket(unittest.TestCase):
         self.assertIn("TradingPair must have a symbol", str(context.exception))
         mock_redis.hset.assert_not_called()
 
+    def test_fetch_tickers_batch(self):
+        """Test fetching many tickers in one pipeline."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [
+            {"price": "50000.0", "timestamp": "1640995200.0", "bid": "49900.0", "ask": "50100.0"},
+            {},
+        ]
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        market = Market(mock_redis)
+        result = market.fetch_tickers(["BTC/USDT", "GONE/USDT"])
+
+        assert result["BTC/USDT"].bid == 49900.0
+        assert result["BTC/USDT"].ask == 50100.0
+        assert result["GONE/USDT"] is None
+        mock_pipeline.hgetall.assert_any_call("tickers:BTC/USDT")
+        mock_pipeline.hgetall.assert_any_call("tickers:GONE/USDT")
+        mock_pipeline.execute.assert_called_once()
+        mock_redis.hgetall.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
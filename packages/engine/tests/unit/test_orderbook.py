@@ -2,10 +2,15 @@
 Unit tests for the OrderBook class.
 """
 
+import math
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
-from core._types import Order, OrderState
+import pytest
+
+from core._types import Order, OrderHistory, OrderSide, OrderState, OrderType
+from core.atomic import AtomicBatch
+from core.codec import CompactCodec, JsonCodec
 from core.orderbook import OrderBook
 
 
@@ -20,46 +25,75 @@ class TestOrderBook(unittest.TestCase):
         assert orderbook.HASH_KEY == "orders"
         assert orderbook.OPEN_ALL_KEY == "open:set"
         assert orderbook.OPEN_SYM_KEY == "open:{sym}"
+        assert orderbook.TS_ALL_KEY == "orders:ts"
 
     def test_add_order(self):
         """Test adding an order to the orderbook."""
         mock_redis = Mock()
-        orderbook = OrderBook(mock_redis)
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis, codec=JsonCodec())
 
         # Create a mock order
         mock_order = Mock(spec=Order)
         mock_order.id = "order123"
         mock_order.symbol = "BTC/USDT"
+        mock_order.side = OrderSide.BUY
+        mock_order.type = OrderType.LIMIT
+        mock_order.limit_price = 50000.0
         mock_order.status = OrderState.NEW
+        mock_order.ts_update = 1000
+        mock_order.history = {0: OrderHistory(ts=1000, status="new")}
         mock_order.to_json.return_value = '{"id": "order123", "symbol": "BTC/USDT"}'
 
         orderbook.add(mock_order)
 
-        mock_redis.hset.assert_called_once_with(
+        mock_pipeline.hset.assert_called_once_with(
             "orders", "order123", '{"id": "order123", "symbol": "BTC/USDT"}'
         )
-        mock_redis.sadd.assert_any_call("open:set", "order123")
-        mock_redis.sadd.assert_any_call("open:BTC/USDT", "order123")
+        mock_order.to_json.assert_called_once_with(include_history=False)
+        # history goes to its own list, written from scratch for a new order
+        mock_pipeline.delete.assert_called_once_with("orders:hist:order123")
+        mock_pipeline.rpush.assert_called_once_with(
+            "orders:hist:order123", mock_order.history[0].to_json()
+        )
+        mock_order.mark_history_saved.assert_called_once()
+        mock_pipeline.zadd.assert_any_call("orders:ts", {"order123": 1000})
+        mock_pipeline.zadd.assert_any_call("orders:ts:status:new", {"order123": 1000})
+        mock_pipeline.zadd.assert_any_call("orders:ts:sym:BTC/USDT", {"order123": 1000})
+        mock_pipeline.zadd.assert_any_call("orders:ts:status:new:BTC/USDT", {"order123": 1000})
+        mock_pipeline.sadd.assert_any_call("open:set", "order123")
+        mock_pipeline.sadd.assert_any_call("open:BTC/USDT", "order123")
+        mock_pipeline.zadd.assert_any_call("open:px:BTC/USDT:buy", {"order123": 50000.0})
+        mock_pipeline.sadd.assert_any_call("open:symbols", "BTC/USDT")
+        mock_pipeline.execute.assert_called_once()
 
     def test_add_closed_order(self):
         """Test adding a closed order (should not be indexed)."""
         mock_redis = Mock()
-        orderbook = OrderBook(mock_redis)
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis, codec=JsonCodec())
 
         # Create a mock closed order
         mock_order = Mock(spec=Order)
         mock_order.id = "order123"
         mock_order.symbol = "BTC/USDT"
+        mock_order.side = OrderSide.BUY
+        mock_order.type = OrderType.LIMIT
+        mock_order.limit_price = 50000.0
         mock_order.status = OrderState.FILLED
+        mock_order.ts_update = 1000
+        mock_order.history = {}
         mock_order.to_json.return_value = '{"id": "order123", "status": "filled"}'
 
         orderbook.add(mock_order)
 
-        mock_redis.hset.assert_called_once_with(
+        mock_pipeline.hset.assert_called_once_with(
             "orders", "order123", '{"id": "order123", "status": "filled"}'
         )
         # Should not add to open indexes
-        mock_redis.sadd.assert_not_called()
+        mock_pipeline.sadd.assert_not_called()
 
     def test_get_order(self):
         """Test getting an order from the orderbook."""
@@ -77,9 +111,35 @@ class TestOrderBook(unittest.TestCase):
             assert result is mock_order
             mock_redis.hget.assert_called_once_with("orders", "order123")
             mock_from_json.assert_called_once_with(
-                '{"id": "order123", "symbol": "BTC/USDT", "status": "open"}',
-                include_history=False,
+                '{"id": "order123", "symbol": "BTC/USDT", "status": "open"}'
             )
+            # history is not touched unless asked for
+            mock_redis.pipeline.assert_not_called()
+
+    def test_get_order_with_history(self):
+        """include_history=True reads the history list in the same call."""
+        mock_redis = Mock()
+        mock_redis.hget.return_value = "{}"
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [
+            [
+                OrderHistory(ts=1, status="new").to_json(),
+                OrderHistory(ts=2, status="filled").to_json(),
+            ]
+        ]
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            mock_order = Mock(spec=Order)
+            mock_order.id = "order123"
+            mock_from_json.return_value = mock_order
+
+            result = orderbook.get("order123", include_history=True)
+
+        mock_pipeline.lrange.assert_called_once_with("orders:hist:order123", 0, -1)
+        assert [h.status for h in result.history.values()] == ["new", "filled"]
+        assert result.history_count == 2
 
     def test_get_order_not_found(self):
         """Test getting an order that doesn't exist."""
@@ -94,22 +154,105 @@ class TestOrderBook(unittest.TestCase):
         self.assertIn("Order nonexistent not found", str(context.exception))
         mock_redis.hget.assert_called_once_with("orders", "nonexistent")
 
+    def test_lookup_orders(self):
+        """lookup() resolves ids and their history in one pipeline, reporting the missing."""
+        codec = CompactCodec()
+        blob = codec.encode_order(
+            Order(
+                id="o1",
+                symbol="BTC/USDT",
+                side=OrderSide.BUY,
+                type=OrderType.LIMIT,
+                amount=1.0,
+                notion_currency="USDT",
+                fee_currency="USDT",
+                fee_rate=0.0,
+                limit_price=100.0,
+            )
+        )
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [
+            [None, blob],
+            [],
+            [codec.encode_history(OrderHistory(ts=1, status="new"))],
+        ]
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis)
+
+        found, missing = orderbook.lookup(["nope", "o1", "nope"], include_history=True)
+
+        mock_pipeline.hmget.assert_called_once_with("orders", ["nope", "o1"])
+        mock_pipeline.lrange.assert_any_call("orders:hist:o1", 0, -1)
+        mock_pipeline.execute.assert_called_once()
+        assert [o.id for o in found] == ["o1"]
+        assert missing == ["nope"]
+        assert found[0].history_count == 1
+
     def test_update_order(self):
         """Test updating an existing order."""
         mock_redis = Mock()
-        orderbook = OrderBook(mock_redis)
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis, codec=JsonCodec())
 
         # Create a mock order
         mock_order = Mock(spec=Order)
         mock_order.id = "order123"
+        mock_order.symbol = "BTC/USDT"
+        mock_order.side = OrderSide.BUY
+        mock_order.type = OrderType.LIMIT
+        mock_order.limit_price = 50000.0
+        mock_order.status = OrderState.FILLED
+        mock_order.ts_update = 2000
         mock_order.to_json.return_value = '{"id": "order123", "updated": true}'
+        new_entry = OrderHistory(ts=2000, status="filled")
+        mock_order.unsaved_history.return_value = [new_entry]
 
         orderbook.update(mock_order)
 
-        mock_redis.hset.assert_called_once_with(
+        mock_pipeline.hset.assert_called_once_with(
             "orders", "order123", '{"id": "order123", "updated": true}'
         )
-        mock_order.to_json.assert_called_once_with(include_history=True)
+        mock_order.to_json.assert_called_once_with(include_history=False)
+        # only the new history entry is appended
+        mock_pipeline.rpush.assert_called_once_with("orders:hist:order123", new_entry.to_json())
+        mock_pipeline.delete.assert_not_called()
+        # moved between status indexes
+        mock_pipeline.zadd.assert_any_call("orders:ts:status:filled", {"order123": 2000})
+        mock_pipeline.zrem.assert_any_call("orders:ts:status:new", "order123")
+        mock_pipeline.zrem.assert_any_call("orders:ts:status:new:BTC/USDT", "order123")
+        # a closed order leaves the open indexes
+        mock_pipeline.srem.assert_any_call("open:set", "order123")
+        mock_pipeline.srem.assert_any_call("open:BTC/USDT", "order123")
+        # …and the symbol leaves the active set if that was its last open order
+        mock_redis.register_script.return_value.assert_called_once_with(
+            keys=["open:BTC/USDT", "open:symbols"], args=["BTC/USDT"], client=mock_pipeline
+        )
+        mock_pipeline.execute.assert_called_once()
+
+    def test_update_in_atomic_batch_is_compare_and_set(self):
+        """Inside an AtomicBatch the history length loaded is checked before any write."""
+        batch = Mock(spec=AtomicBatch)
+        orderbook = OrderBook(Mock(), codec=JsonCodec())
+        order = Order(
+            id="order123",
+            symbol="BTC/USDT",
+            side=OrderSide.BUY,
+            type=OrderType.LIMIT,
+            amount=1.0,
+            notion_currency="USDT",
+            fee_currency="USDT",
+            fee_rate=0.001,
+            limit_price=100.0,
+            status=OrderState.PARTIALLY_FILLED,
+            _history_saved=3,
+        )
+
+        orderbook.update(order, pipe=batch)
+
+        assert batch.method_calls[0] == call.expect_len("orders:hist:order123", 3)
+        batch.execute.assert_not_called()  # the caller runs the batch
 
     def test_remove_order(self):
         """Test removing an order from the orderbook."""
@@ -124,15 +267,21 @@ class TestOrderBook(unittest.TestCase):
             mock_order = Mock(spec=Order)
             mock_order.id = "order123"
             mock_order.symbol = "BTC/USDT"
+            mock_order.side = OrderSide.BUY
+            mock_order.type = OrderType.LIMIT
+            mock_order.limit_price = 50000.0
             mock_order.status = OrderState.NEW
             mock_from_json.return_value = mock_order
 
             orderbook.remove("order123")
 
             mock_redis.hget.assert_called_once_with("orders", "order123")
-            mock_redis.srem.assert_any_call("open:set", "order123")
-            mock_redis.srem.assert_any_call("open:BTC/USDT", "order123")
+            mock_pipeline.srem.assert_any_call("open:set", "order123")
+            mock_pipeline.srem.assert_any_call("open:BTC/USDT", "order123")
             mock_pipeline.hdel.assert_called_once_with("orders", "order123")
+            mock_pipeline.zrem.assert_any_call("orders:ts", "order123")
+            mock_pipeline.zrem.assert_any_call("orders:ts:status:new", "order123")
+            mock_pipeline.zrem.assert_any_call("orders:ts:sym:BTC/USDT", "order123")
             mock_pipeline.execute.assert_called_once()
 
     def test_remove_nonexistent_order(self):
@@ -199,6 +348,9 @@ class TestOrderBook(unittest.TestCase):
             mock_order = Mock(spec=Order)
             mock_order.id = "order123"
             mock_order.symbol = "BTC/USDT"
+            mock_order.side = OrderSide.BUY
+            mock_order.type = OrderType.LIMIT
+            mock_order.limit_price = 50000.0
             mock_order.status = OrderState.NEW
             mock_order.ts_update = 1000
             mock_from_json.return_value = mock_order
@@ -209,10 +361,283 @@ class TestOrderBook(unittest.TestCase):
             mock_redis.smembers.assert_called_once_with("open:BTC/USDT")
             mock_redis.hmget.assert_called_once_with("orders", "order123")
 
+    def test_list_tail_uses_time_index(self):
+        """A non-open query with tail reads one ZSET page plus one HMGET."""
+        mock_redis = Mock()
+        mock_redis.zrevrangebyscore.return_value = ["order456", "order123"]
+        mock_redis.hmget.return_value = ["blob456", "blob123"]
+
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            mock_order1 = Mock(spec=Order)
+            mock_order1.symbol = "BTC/USDT"
+            mock_order1.status = OrderState.FILLED
+            mock_order1.side = "buy"
+            mock_order2 = Mock(spec=Order)
+            mock_order2.symbol = "BTC/USDT"
+            mock_order2.status = OrderState.FILLED
+            mock_order2.side = "sell"
+            mock_from_json.side_effect = [mock_order2, mock_order1]
+
+            result = orderbook.list(status=OrderState.FILLED, tail=2, since=500)
+
+            assert result == [mock_order2, mock_order1]
+            mock_redis.zrevrangebyscore.assert_called_once_with(
+                "orders:ts:status:filled", "+inf", 500, start=0, num=2
+            )
+            mock_redis.hmget.assert_called_once_with("orders", ["order456", "order123"])
+            mock_redis.hscan_iter.assert_not_called()
+
+    def test_list_pages_until_tail_is_filled(self):
+        """Filters the index can't express trigger another page, not a full scan."""
+        mock_redis = Mock()
+        mock_redis.zrevrangebyscore.side_effect = [["o3", "o2"], ["o1"]]
+        mock_redis.hmget.side_effect = [["b3", "b2"], ["b1"]]
+
+        orderbook = OrderBook(mock_redis)
+
+        orders = []
+        for side in ("sell", "sell", "buy"):
+            o = Mock(spec=Order)
+            o.symbol = "BTC/USDT"
+            o.status = OrderState.FILLED
+            o.side = side
+            orders.append(o)
+
+        with patch("core.orderbook.Order.from_json", side_effect=orders):
+            result = orderbook.list(status=OrderState.FILLED, side="buy", tail=2)
+
+        assert result == [orders[2]]
+        assert mock_redis.zrevrangebyscore.call_count == 2
+        mock_redis.zrevrangebyscore.assert_called_with(
+            "orders:ts:status:filled", "+inf", "-inf", start=2, num=2
+        )
+
+    def test_ensure_indexes_rebuilds_when_out_of_sync(self):
+        """Stores written before the time indexes existed get back-filled."""
+        mock_redis = Mock()
+        mock_redis.get.return_value = str(OrderBook.INDEX_VERSION)
+        mock_redis.hlen.return_value = 3
+        mock_redis.zcard.return_value = 0
+        orderbook = OrderBook(mock_redis)
+
+        with patch.object(orderbook, "rebuild_indexes") as rebuild:
+            orderbook.ensure_indexes()
+            rebuild.assert_called_once()
+
+        mock_redis.zcard.return_value = 3
+        with patch.object(orderbook, "rebuild_indexes") as rebuild:
+            orderbook.ensure_indexes()
+            rebuild.assert_not_called()
+
+        # an older index layout is rebuilt even when the counts match
+        mock_redis.get.return_value = None
+        with patch.object(orderbook, "rebuild_indexes") as rebuild:
+            orderbook.ensure_indexes()
+            rebuild.assert_called_once()
+
+    def test_list_status_and_symbol_uses_composite_index(self):
+        """`status=filled&symbol=X` reads the status × symbol ZSET."""
+        mock_redis = Mock()
+        mock_redis.zrevrangebyscore.return_value = []
+
+        orderbook = OrderBook(mock_redis)
+        assert orderbook.list(status=OrderState.FILLED, symbol="BTC/USDT", tail=5) == []
+
+        mock_redis.zrevrangebyscore.assert_called_once_with(
+            "orders:ts:status:filled:BTC/USDT", "+inf", "-inf", start=0, num=5
+        )
+
+    def test_get_many(self):
+        """Bulk lookup: one HMGET, unknown ids skipped, nothing sent for no ids."""
+        mock_redis = Mock()
+        mock_redis.hmget.return_value = ["blob1", None]
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            mock_from_json.return_value = Mock(spec=Order)
+            result = orderbook.get_many(["o1", "o2"])
+
+        assert result == [mock_from_json.return_value]
+        mock_redis.hmget.assert_called_once_with("orders", ["o1", "o2"])
+        assert orderbook.get_many([]) == []
+        mock_redis.hmget.assert_called_once()
+
+    def test_page_resumes_inside_equal_timestamps(self):
+        """The cursor keeps the score and how many ids at it were passed."""
+        codec = CompactCodec()
+        blobs = {
+            oid: codec.encode_order(
+                Order(
+                    id=oid,
+                    symbol="BTC/USDT",
+                    side=OrderSide.BUY,
+                    type=OrderType.LIMIT,
+                    amount=1.0,
+                    notion_currency="USDT",
+                    fee_currency="USDT",
+                    fee_rate=0.001,
+                    limit_price=1.0,
+                    ts_update=ts,
+                )
+            )
+            for oid, ts in (("o1", 10), ("o2", 20), ("o3", 20))
+        }
+        mock_redis = Mock()
+        mock_redis.zrangebyscore.return_value = [("o1", 10.0), ("o2", 20.0)]
+        mock_redis.hmget.side_effect = lambda _key, ids: [blobs[i] for i in ids]
+        orderbook = OrderBook(mock_redis)
+
+        orders, cursor = orderbook.page(limit=2)
+
+        assert [o.id for o in orders] == ["o1", "o2"]
+        assert orderbook.decode_cursor(cursor) == (20.0, 1)
+        mock_redis.zrangebyscore.assert_called_once_with(
+            "orders:ts", -math.inf, math.inf, start=0, num=2, withscores=True
+        )
+
+        mock_redis.zrangebyscore.reset_mock()
+        mock_redis.zrangebyscore.return_value = [("o3", 20.0)]
+        orders, cursor = orderbook.page(limit=2, cursor=cursor)
+
+        assert [o.id for o in orders] == ["o3"] and cursor is None
+        mock_redis.zrangebyscore.assert_called_once_with(
+            "orders:ts", 20.0, math.inf, start=1, num=2, withscores=True
+        )
+
+    def test_decode_cursor_rejects_garbage(self):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            OrderBook.decode_cursor("not-a-cursor")
+
+    def test_remove_many(self):
+        """Bulk removal: one HMGET and one pipeline, skipping ids already gone."""
+        mock_redis = Mock()
+        mock_redis.hmget.return_value = ["blob1", None]
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            mock_order = Mock(spec=Order)
+            mock_order.id = "o1"
+            mock_order.symbol = "BTC/USDT"
+            mock_order.side = OrderSide.BUY
+            mock_order.type = OrderType.LIMIT
+            mock_order.limit_price = 50000.0
+            mock_order.status = OrderState.FILLED
+            mock_from_json.return_value = mock_order
+
+            assert orderbook.remove_many(["o1", "o2"]) == 1
+
+        mock_redis.hmget.assert_called_once_with("orders", ["o1", "o2"])
+        mock_pipeline.hdel.assert_called_once_with("orders", "o1")
+        mock_pipeline.zrem.assert_any_call("orders:ts:status:filled:BTC/USDT", "o1")
+        mock_pipeline.execute.assert_called_once()
+
+    def test_market_orders_sit_at_infinity_in_price_index(self):
+        """Market orders always cross: buys score +inf, sells -inf."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        orderbook = OrderBook(mock_redis, codec=JsonCodec())
+
+        for side, score in ((OrderSide.BUY, float("inf")), (OrderSide.SELL, float("-inf"))):
+            mock_order = Mock(spec=Order)
+            mock_order.id = "mkt"
+            mock_order.symbol = "BTC/USDT"
+            mock_order.side = side
+            mock_order.type = OrderType.MARKET
+            mock_order.limit_price = None
+            mock_order.status = OrderState.NEW
+            mock_order.ts_update = 1000
+            mock_order.history = {}
+            mock_order.to_json.return_value = "{}"
+            orderbook.add(mock_order)
+            mock_pipeline.zadd.assert_any_call(f"open:px:BTC/USDT:{side.value}", {"mkt": score})
+
+    def test_crossing_range_queries_each_side(self):
+        """Only buys at/above the ask and sells at/below the bid are loaded."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [["b1"], ["s1"]]
+        mock_redis.pipeline.return_value = mock_pipeline
+        mock_redis.hmget.return_value = ["blob_b1", "blob_s1"]
+
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            buy = Mock(spec=Order)
+            buy.symbol = "BTC/USDT"
+            buy.status = OrderState.NEW
+            sell = Mock(spec=Order)
+            sell.symbol = "BTC/USDT"
+            sell.status = OrderState.FILLED  # stale entry, filtered out
+            mock_from_json.side_effect = [buy, sell]
+
+            result = orderbook.crossing("BTC/USDT", bid=99.0, ask=101.0)
+
+        assert result == [buy]
+        mock_pipeline.zrevrangebyscore.assert_called_once_with(
+            "open:px:BTC/USDT:buy", "+inf", 101.0
+        )
+        mock_pipeline.zrangebyscore.assert_called_once_with("open:px:BTC/USDT:sell", "-inf", 99.0)
+        mock_redis.hmget.assert_called_once_with("orders", ["b1", "s1"])
+
+    def test_crossing_nothing_to_fill(self):
+        """A quiet tick costs one pipelined round-trip and no HMGET."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [[], []]
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        orderbook = OrderBook(mock_redis)
+
+        assert orderbook.crossing("BTC/USDT", bid=99.0, ask=101.0) == []
+        mock_redis.hmget.assert_not_called()
+
+    def test_crossing_many_groups_by_symbol(self):
+        """All symbols share one pipeline and one HMGET."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_pipeline.execute.return_value = [["b1"], [], [], ["s2"], [], []]
+        mock_redis.pipeline.return_value = mock_pipeline
+        mock_redis.hmget.return_value = ["blob_b1", "blob_s2"]
+
+        orderbook = OrderBook(mock_redis)
+
+        with patch("core.orderbook.Order.from_json") as mock_from_json:
+            btc = Mock(spec=Order)
+            btc.symbol = "BTC/USDT"
+            btc.status = OrderState.NEW
+            eth = Mock(spec=Order)
+            eth.symbol = "ETH/USDT"
+            eth.status = OrderState.PARTIALLY_FILLED
+            mock_from_json.side_effect = [btc, eth]
+
+            result = orderbook.crossing_many(
+                {"BTC/USDT": (99.0, 101.0), "ETH/USDT": (9.0, 10.0), "XRP/USDT": (1.0, 1.1)}
+            )
+
+        assert result == {"BTC/USDT": [btc], "ETH/USDT": [eth], "XRP/USDT": []}
+        mock_pipeline.execute.assert_called_once()
+        mock_redis.hmget.assert_called_once_with("orders", ["b1", "s2"])
+
+    def test_active_symbols(self):
+        """Active symbols come from one SMEMBERS, sorted."""
+        mock_redis = Mock()
+        mock_redis.smembers.return_value = {"ETH/USDT", "BTC/USDT"}
+        orderbook = OrderBook(mock_redis)
+
+        assert orderbook.active_symbols() == ["BTC/USDT", "ETH/USDT"]
+        mock_redis.smembers.assert_called_once_with("open:symbols")
+
     def test_clear_orderbook(self):
         """Test clearing the entire orderbook."""
         mock_redis = Mock()
         mock_redis.keys.return_value = ["open:BTC/USDT", "open:ETH/USDT"]
+        mock_redis.scan_iter.return_value = iter(["orders:hist:o1", "orders:hist:o2"])
         mock_pipeline = Mock()
         mock_redis.pipeline.return_value = mock_pipeline
 
@@ -228,6 +653,8 @@ class TestOrderBook(unittest.TestCase):
         mock_pipeline.delete.assert_any_call("open:BTC/USDT")
         mock_pipeline.delete.assert_any_call("open:ETH/USDT")
         mock_pipeline.execute.assert_called_once()
+        # …and every history list
+        mock_redis.delete.assert_called_once_with("orders:hist:o1", "orders:hist:o2")
 
 
 if __name__ == "__main__":
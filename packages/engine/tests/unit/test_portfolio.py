@@ -0,0 +1,74 @@
+"""
+Unit tests for the Portfolio class.
+"""
+
+import unittest
+from unittest.mock import Mock
+
+from core._types import AssetBalance
+from core.portfolio import Portfolio
+
+
+class TestPortfolio(unittest.TestCase):
+    """Test cases for the Portfolio class."""
+
+    def test_get_reads_numeric_fields(self):
+        """One HMGET of <ASSET>:free / <ASSET>:used, no JSON."""
+        mock_redis = Mock()
+        mock_redis.hmget.return_value = ["1.5", "0.25"]
+        portfolio = Portfolio(mock_redis)
+
+        bal = portfolio.get("btc")
+
+        assert bal == AssetBalance("BTC", 1.5, 0.25)
+        mock_redis.hmget.assert_called_once_with("balances", ("BTC:free", "BTC:used"))
+
+    def test_get_missing_asset_is_zero(self):
+        """Unknown assets come back as a zeroed placeholder."""
+        mock_redis = Mock()
+        mock_redis.hmget.return_value = [None, None]
+        assert Portfolio(mock_redis).get("ETH") == AssetBalance("ETH")
+
+    def test_set_overwrites_both_fields(self):
+        """set() writes free and used with one HSET."""
+        mock_redis = Mock()
+        Portfolio(mock_redis).set(AssetBalance("USDT", 10.0, 2.5))
+        mock_redis.hset.assert_called_once_with(
+            "balances", mapping={"USDT:free": "10.0", "USDT:used": "2.5"}
+        )
+
+    def test_apply_deltas(self):
+        """Each (dfree, dused) pair is two HINCRBYFLOATs in one MULTI/EXEC."""
+        mock_redis = Mock()
+        mock_pipeline = Mock()
+        mock_redis.pipeline.return_value = mock_pipeline
+        mock_pipeline.execute.return_value = ["9.0", "1.0", "0.5", "0"]
+        portfolio = Portfolio(mock_redis)
+
+        result = portfolio.apply_deltas({"USDT": (-1.0, 1.0), "BTC": (0.5, 0.0)})
+
+        assert result == {
+            "USDT": AssetBalance("USDT", 9.0, 1.0),
+            "BTC": AssetBalance("BTC", 0.5, 0.0),
+        }
+        mock_pipeline.hincrbyfloat.assert_any_call("balances", "USDT:free", -1.0)
+        mock_pipeline.hincrbyfloat.assert_any_call("balances", "USDT:used", 1.0)
+        mock_pipeline.hincrbyfloat.assert_any_call("balances", "BTC:free", 0.5)
+        assert mock_pipeline.hincrbyfloat.call_count == 4
+        mock_pipeline.execute.assert_called_once()
+
+    def test_all_groups_fields_and_reads_legacy_rows(self):
+        """all() is one HGETALL; a not-yet-migrated JSON row is still understood."""
+        mock_redis = Mock()
+        mock_redis.hgetall.return_value = {
+            "BTC:free": "2",
+            "BTC:used": "0.5",
+            "ETH": '{"asset":"ETH","free":1.0,"used":0.0,"total":1.0}',
+        }
+
+        result = Portfolio(mock_redis).all()
+
+        assert result == {
+            "BTC": AssetBalance("BTC", 2.0, 0.5),
+            "ETH": AssetBalance("ETH", 1.0, 0.0),
+        }
@@ -0,0 +1,210 @@
+"""
+Unit tests for the in-process storage backends and an engine run on top of them.
+"""
+
+import tempfile
+import time
+import unittest
+
+import pytest
+import redis
+
+from core.atomic import AtomicBatch, InsufficientFunds
+from core.engine_actors import ExchangeEngineActor
+from core.storage import MemoryStorage, SqliteStorage, open_storage, script, write_batch
+
+# a script that writes, then fails – SqliteStorage undoes its write
+_FAILING_LUA = "redis.call('HSET', KEYS[1], 'x', 1) error('boom')"
+
+
+@script(_FAILING_LUA)
+def _failing_py(db, keys, argv):
+    db.hset(keys[0], "x", 1)
+    raise redis.ResponseError("boom")
+
+
+def _tmp_dir(case):
+    d = tempfile.TemporaryDirectory()
+    case.addCleanup(d.cleanup)
+    return d.name
+
+
+class _CommandCases:
+    """Command semantics every backend shares; ``setUp`` provides ``self.db``."""
+
+    def test_sorted_set_ranges(self):
+        db = self.db
+        assert db.zadd("z", {"a": 1, "b": 2, "c": 3, "d": 3}) == 4
+        assert db.zadd("z", {"a": 5}, ch=True) == 1  # score change counts with ch
+        assert db.zadd("z", {"b": 9}, nx=True) == 0
+
+        assert db.zrange("z", 0, -1) == ["b", "c", "d", "a"]
+        assert db.zrangebyscore("z", "(2", "+inf") == ["c", "d", "a"]
+        assert db.zrangebyscore("z", "-inf", 3, start=1, num=1) == ["c"]
+        assert db.zrevrangebyscore("z", "+inf", "(3", withscores=True) == [("a", 5.0)]
+        assert db.zremrangebyscore("z", 3, 3) == 2
+        assert db.zcard("z") == 2
+        assert db.zscore("z", "a") == 5.0
+
+    def test_hashes_lists_and_types(self):
+        db = self.db
+        db.hset("h", mapping={"x": 1, "y": 2.5})
+        assert db.hgetall("h") == {"x": "1", "y": "2.5"}
+        assert db.hincrbyfloat("h", "y", 0.5) == 3.0
+        assert db.hmget("h", ["x", "nope"]) == ["1", None]
+        assert db.rpush("l", "a", "b") == 2
+        assert db.lindex("l", -1) == "b"
+
+        with pytest.raises(redis.ResponseError):
+            db.hget("l", "a")  # WRONGTYPE, like the server
+        db.hdel("h", "x", "y")
+        assert db.exists("h") == 0  # emptied containers disappear
+
+    def test_expiry_and_set_options(self):
+        db = self.db
+        assert db.set("k", "v", nx=True)
+        assert not db.set("k", "w", nx=True)
+        db.pexpire("k", 1)
+        time.sleep(0.01)
+        assert db.get("k") is None
+        assert db.keys("*") == []
+
+    def test_pipeline_and_execute_command(self):
+        db = self.db
+        pipe = db.pipeline(transaction=False)
+        pipe.incr("n").incr("n").get("n")
+        assert pipe.execute() == [1, 2, "2"]
+        assert db.execute_command("HSET", "h", "a", 1) == 1
+        assert db.execute_command("HGET", "h", "a") == "1"
+
+    def test_scripts_run_their_python_twin(self):
+        db = self.db
+        db.hset("balances", mapping={"USDT:free": 10, "USDT:used": 0})
+
+        with pytest.raises(InsufficientFunds):
+            AtomicBatch(db).reserve("USDT", 11).execute()
+        AtomicBatch(db).reserve("USDT", 4).execute()
+
+        assert db.hgetall("balances") == {"USDT:free": "6", "USDT:used": "4"}
+        with pytest.raises(RuntimeError, match="has no in-process twin"):
+            db.register_script("return 1")
+
+
+class TestMemoryStorage(_CommandCases, unittest.TestCase):
+    """Test cases for MemoryStorage."""
+
+    def setUp(self):
+        self.db = MemoryStorage()
+
+    def test_snapshot_roundtrip(self):
+        db = self.db
+        db.zadd("z", {"a": 1.5})
+        db.sadd("s", "x")
+        db.hset("h", "f", "v")
+        db.rpush("l", "1", "2")
+        db.set("k", "v", ex=60)
+        path = self._tmp_path()
+
+        assert db.snapshot(path) == 5
+        other = MemoryStorage(snapshot=path)
+
+        assert other.zrange("z", 0, -1, withscores=True) == [("a", 1.5)]
+        assert other.smembers("s") == {"x"}
+        assert other.lrange("l", 0, -1) == ["1", "2"]
+        assert other.get("k") == "v"
+
+    def test_memory_urls_share_one_store(self):
+        assert open_storage("memory://shared") is open_storage("memory://shared")
+        assert open_storage("memory://shared") is not open_storage("memory://other")
+
+    def _tmp_path(self):
+        return _tmp_dir(self) + "/snap.json"
+
+
+class TestSqliteStorage(_CommandCases, unittest.TestCase):
+    """Test cases for SqliteStorage."""
+
+    def setUp(self):
+        self.path = _tmp_dir(self) + "/engine.db"
+        self.db = SqliteStorage(self.path)
+        self.addCleanup(self.db.close)
+
+    def test_survives_reopen(self):
+        self.db.zadd("z", {"buy": float("-inf"), "a": 2.5})
+        self.db.rpush("l", "1", "2")
+        self.db.close()
+
+        db = SqliteStorage(self.path)
+        self.addCleanup(db.close)
+        assert db.zrangebyscore("z", "-inf", "+inf", withscores=True) == [
+            ("buy", float("-inf")),
+            ("a", 2.5),
+        ]
+        assert db.lrange("l", -1, -1) == ["2"]
+
+    def test_write_batch_rolls_back_as_a_whole_or_per_script(self):
+        db = self.db
+        db.hset("balances", mapping={"USDT:free": 10, "USDT:used": 0})
+
+        with pytest.raises(RuntimeError), write_batch(db):
+            AtomicBatch(db).reserve("USDT", 4).execute()
+            raise RuntimeError("sweep failed")
+        assert db.hget("balances", "USDT:free") == "10"
+
+        with write_batch(db):
+            AtomicBatch(db).reserve("USDT", 4).execute()
+            with pytest.raises(redis.ResponseError):
+                db.eval(_FAILING_LUA, 1, "balances")  # its own write is undone
+        assert db.hgetall("balances") == {"USDT:free": "6", "USDT:used": "4"}
+
+    def test_sqlite_urls(self):
+        url = f"sqlite:///{self.path}"
+        assert open_storage(url) is open_storage(url)
+        with pytest.raises(ValueError):
+            open_storage("sqlite://")
+
+
+class TestEngineOnLocalStorage(unittest.TestCase):
+    """The engine end to end on ``memory://`` and ``sqlite://`` – no Valkey, no mocks."""
+
+    def _ticker(self, db, price, ts):
+        db.hset(
+            "tickers:BTC/USDT",
+            mapping={
+                "symbol": "BTC/USDT",
+                "price": price,
+                "bid": price,
+                "ask": price,
+                "bidVolume": 1e9,
+                "askVolume": 1e9,
+                "timestamp": ts,
+            },
+        )
+
+    def test_order_lifecycle_in_memory(self):
+        self._order_lifecycle("memory://engine-test")
+
+    def test_order_lifecycle_on_sqlite(self):
+        self._order_lifecycle(f"sqlite:///{_tmp_dir(self)}/engine.db")
+
+    def _order_lifecycle(self, url):
+        engine = ExchangeEngineActor(redis_url=url, commission=0.001, inline=True)
+        db = engine.redis
+        self.addCleanup(db.flushdb)
+        now = time.time()
+        self._ticker(db, 100.0, now)
+        engine.deposit_asset("USDT", 1000)
+
+        near = engine.create_order(
+            symbol="BTC/USDT", side="buy", type="limit", amount=1, limit_price=90
+        )
+        far = engine.create_order(
+            symbol="BTC/USDT", side="buy", type="limit", amount=1, limit_price=50
+        )
+        self._ticker(db, 85.0, now + 1)
+
+        assert engine.process_price_ticks()["fills"] == 1
+        assert engine.cancel_order(far["id"])["canceled_order"]["status"] == "canceled"
+        assert engine.order_book.get(near["id"]).get().status.value == "filled"
+        assert engine.check_consistency() == {}
+        assert db.zcard("orders:ts:status:filled:BTC/USDT") == 1
@@ -0,0 +1,56 @@
+"""
+Unit tests for the shared dataclasses.
+"""
+
+import unittest
+
+import pytest
+
+from core._types import AssetBalance, Order, OrderHistory, OrderSide, OrderState, OrderType
+
+
+def _order():
+    return Order(
+        id="o1",
+        symbol="BTC/USDT",
+        side=OrderSide.BUY,
+        type=OrderType.LIMIT,
+        amount=2.0,
+        notion_currency="USDT",
+        fee_currency="USDT",
+        fee_rate=0.001,
+        limit_price=100.0,
+    )
+
+
+class TestTypes(unittest.TestCase):
+    """Test cases for Order / OrderHistory / AssetBalance."""
+
+    def test_models_are_slotted(self):
+        for obj in (_order(), OrderHistory(ts=1, status="new"), AssetBalance("BTC")):
+            assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            _order().unknown = 1
+
+    def test_to_dict_round_trip(self):
+        """to_dict carries public fields only, history as plain dicts."""
+        order = _order()
+        order.status = OrderState.FILLED
+        order.add_history(ts=2, status=order.status, actual_filled=2.0)
+
+        d = order.to_dict()
+        assert d["side"] == "buy" and d["status"] == "filled"
+        assert d["history"][1] == {
+            **OrderHistory(ts=2, status="filled").to_dict(),
+            "actual_filled": 2.0,
+        }
+        assert "_seed_history" not in d and "_history_saved" not in d
+        assert "history" not in order.to_dict(include_history=False)
+
+        back = Order.from_json(order.to_json(), include_history=True)
+        assert back.to_dict(include_history=False) == order.to_dict(include_history=False)
+        assert back.history_count == 2 and back.status is OrderState.FILLED
+
+    def test_from_dict_ignores_unknown_fields(self):
+        d = _order().to_dict(include_history=False) | {"legacy_field": 1}
+        assert Order.from_dict(d).id == "o1"